@@ -0,0 +1,376 @@
+"""
+Shared MySQL connection handling for the AHG Python tools.
+
+Long-running jobs such as the RiC extractor and the Discovery indexers
+read the AtoM database for hours. ConnectionFactory keeps those reads off
+the primary that serves AtoM users whenever a read replica is configured,
+and gives every tool the same connect retries, query timeout and
+reconnect behaviour, for mysql-connector-python or PyMySQL:
+
+    primary = {'host': 'localhost', 'user': 'atom', 'password': '...', 'database': 'archive'}
+    factory = ConnectionFactory(primary, driver='pymysql',
+                                replica=replica_config_from_env(primary),
+                                query_timeout=600)
+    db = ManagedConnection(factory)
+    rows = db.run(fetch_records, offset, limit)
+
+Read connections go to the replica while it is reachable and at most
+max_replica_lag seconds behind its source, and to the primary otherwise.
+The lag check needs the REPLICATION CLIENT (MySQL) or REPLICA MONITOR
+(MariaDB) privilege on the replica.
+
+Environment (replica_config_from_env):
+    ATOM_DB_REPLICA_HOST      Read replica host (unset: everything reads the primary)
+    ATOM_DB_REPLICA_PORT      Replica port (default: 3306)
+    ATOM_DB_REPLICA_USER      Replica user (default: the primary's)
+    ATOM_DB_REPLICA_PASSWORD  Replica password (default: the primary's)
+"""
+
+import configparser
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+DRIVERS = ('mysql.connector', 'pymysql')
+
+# MySQL error numbers worth a reconnect: can't connect, server gone away,
+# lost connection (twice), lock wait timeout, deadlock
+TRANSIENT_ERRNOS = frozenset({2003, 2006, 2013, 2055, 1205, 1213})
+# Statement aborted by max_execution_time (MySQL) or max_statement_time (MariaDB)
+QUERY_TIMEOUT_ERRNOS = frozenset({3024, 1969})
+ER_PARSE_ERROR = 1064
+ER_UNKNOWN_SYSTEM_VARIABLE = 1193
+
+
+def error_code(error: BaseException) -> Optional[int]:
+    """MySQL error number of a mysql-connector (errno) or PyMySQL (first argument) exception."""
+    code = getattr(error, 'errno', None)
+    if code is None and error.args and isinstance(error.args[0], int):
+        code = error.args[0]
+    return code
+
+
+def is_transient_error(error: BaseException) -> bool:
+    return error_code(error) in TRANSIENT_ERRNOS
+
+
+def read_mycnf_password(path: str = '~/.my.cnf') -> str:
+    """Password from the [client] section of ~/.my.cnf, if any (matches mysql CLI behaviour)."""
+    path = os.path.expanduser(path)
+    if not os.path.isfile(path):
+        return ''
+    try:
+        cfg = configparser.ConfigParser()
+        cfg.read(path)
+        return cfg.get('client', 'password', fallback='')
+    except Exception:
+        return ''
+
+
+def replica_config_from_env(primary: Dict, prefix: str = 'ATOM_DB_REPLICA_') -> Optional[Dict]:
+    """Connection settings of the read replica from the environment, or None when none is set.
+
+    User, password, database and charset default to the primary's.
+    """
+    host = os.environ.get(prefix + 'HOST')
+    if not host:
+        return None
+    replica = {key: primary[key] for key in ('user', 'password', 'database', 'charset') if key in primary}
+    replica['host'] = host
+    if os.environ.get(prefix + 'PORT'):
+        replica['port'] = int(os.environ[prefix + 'PORT'])
+    for key in ('user', 'password'):
+        value = os.environ.get(prefix + key.upper())
+        if value is not None:
+            replica[key] = value
+    return replica
+
+
+def close_quietly(connection):
+    """Close a connection that may already be dead."""
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionFactory:
+    """Opens connections to the primary, or for reads to a lag-checked replica."""
+
+    DEFAULT_MAX_REPLICA_LAG = 30.0
+    DEFAULT_RETRIES = 3
+    DEFAULT_RETRY_DELAY = 2.0
+    # Once the replica is found unusable, reads go to the primary this long before it is checked again
+    REPLICA_RECHECK_SECONDS = 60.0
+
+    def __init__(self, primary: Dict, driver: str = 'mysql.connector',
+                 replica: Optional[Dict] = None,
+                 max_replica_lag: float = DEFAULT_MAX_REPLICA_LAG,
+                 query_timeout: Optional[float] = None,
+                 retries: int = DEFAULT_RETRIES,
+                 retry_delay: float = DEFAULT_RETRY_DELAY,
+                 connect_args: Optional[Dict] = None):
+        if driver not in DRIVERS:
+            raise ValueError(f"Unknown MySQL driver: {driver}")
+        self.primary = dict(primary)
+        self.driver = driver
+        self.replica = dict(replica) if replica else None
+        self.max_replica_lag = max_replica_lag
+        # Seconds any one statement may run server-side; None leaves the server default
+        self.query_timeout = query_timeout
+        self.retries = max(0, retries)
+        self.retry_delay = retry_delay
+        # Extra driver arguments for every connection, e.g. a PyMySQL cursorclass
+        self.connect_args = dict(connect_args or {})
+        self._replica_retry_at = 0.0
+        self._replica_connections = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def connect(self, read_only: bool = True):
+        """Open a connection: on the replica for reads while it is usable, else on the primary.
+
+        Transient failures to reach the primary are retried with exponential
+        backoff, then raised. A replica that cannot be reached, reports no
+        running replication or lags more than max_replica_lag seconds is
+        skipped (not retried) for REPLICA_RECHECK_SECONDS.
+        """
+        if read_only and self.replica is not None and time.monotonic() >= self._replica_retry_at:
+            connection = self._open_replica()
+            if connection is not None:
+                return connection
+        return self._open_primary()
+
+    def is_replica(self, connection) -> bool:
+        """Whether connection was opened on the read replica."""
+        return connection in self._replica_connections
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number attempt (1-based)."""
+        return self.retry_delay * 2 ** (attempt - 1)
+
+    @staticmethod
+    def is_alive(connection) -> bool:
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def replica_lag(self, connection) -> Optional[float]:
+        """Seconds the server behind connection is behind its source; None when it is not replicating.
+
+        Multi-source replicas report their slowest channel.
+        """
+        cursor = self._dict_cursor(connection)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Exception as e:
+                # MySQL before 8.0.22 and MariaDB before 10.5.1 only know the old spelling
+                if error_code(e) != ER_PARSE_ERROR:
+                    raise
+                cursor.execute("SHOW SLAVE STATUS")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        lags = [row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master')) for row in rows]
+        if not lags or any(lag is None for lag in lags):
+            return None
+        return float(max(lags))
+
+    def _open_replica(self):
+        connection = None
+        try:
+            connection = self._open(self.replica)
+            lag = self.replica_lag(connection)
+            if lag is None:
+                reason = 'replication is not running'
+            elif lag > self.max_replica_lag:
+                reason = f'{lag:g}s behind, over the {self.max_replica_lag:g}s limit'
+            else:
+                self._replica_connections.add(connection)
+                return connection
+        except Exception as e:
+            reason = str(e)
+        if connection is not None:
+            close_quietly(connection)
+        with self._lock:
+            self._replica_retry_at = time.monotonic() + self.REPLICA_RECHECK_SECONDS
+        print(f"Read replica {self.replica.get('host')} unusable ({reason}); reading from the primary")
+        return None
+
+    def _open_primary(self):
+        attempt = 0
+        while True:
+            try:
+                return self._open(self.primary)
+            except Exception as e:
+                if attempt < self.retries and is_transient_error(e):
+                    attempt += 1
+                    delay = self.backoff(attempt)
+                    print(f"Database connection error: {e}; retrying in {delay:g}s ({attempt}/{self.retries})")
+                    time.sleep(delay)
+                    continue
+                raise
+
+    def _open(self, config: Dict):
+        args = dict(config, **self.connect_args)
+        if self.driver == 'pymysql':
+            import pymysql
+            connection = pymysql.connect(**args)
+        else:
+            import mysql.connector
+            connection = mysql.connector.connect(**args)
+        if self.query_timeout:
+            try:
+                self._set_query_timeout(connection)
+            except Exception:
+                close_quietly(connection)
+                raise
+        return connection
+
+    def _set_query_timeout(self, connection):
+        """Cap statement run time server-side: max_execution_time (MySQL, SELECTs, ms) or max_statement_time (MariaDB, s)."""
+        cursor = connection.cursor()
+        try:
+            try:
+                cursor.execute("SET SESSION max_execution_time = %s", (int(self.query_timeout * 1000),))
+            except Exception as e:
+                if error_code(e) != ER_UNKNOWN_SYSTEM_VARIABLE:
+                    raise
+                cursor.execute("SET SESSION max_statement_time = %s", (float(self.query_timeout),))
+        finally:
+            cursor.close()
+
+    def _dict_cursor(self, connection):
+        if self.driver == 'pymysql':
+            import pymysql.cursors
+            return connection.cursor(pymysql.cursors.DictCursor)
+        return connection.cursor(dictionary=True)
+
+
+class ManagedConnection:
+    """One connection from a factory, reopened and the call rerun after a transient error.
+
+    run() may execute fn more than once, so it is for reads and other
+    idempotent work. The connection is opened on first use; a reopened one
+    is routed again, so it moves between replica and primary as the
+    replica's lag changes.
+    """
+
+    def __init__(self, factory: ConnectionFactory, read_only: bool = True):
+        self.factory = factory
+        self.read_only = read_only
+        self.connection = None
+
+    def open(self):
+        if self.connection is None:
+            self.connection = self.factory.connect(self.read_only)
+        return self.connection
+
+    @property
+    def on_replica(self) -> bool:
+        return self.connection is not None and self.factory.is_replica(self.connection)
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Return fn(connection, *args, **kwargs), reconnecting up to factory.retries times."""
+        attempt = 0
+        while True:
+            try:
+                return fn(self.open(), *args, **kwargs)
+            except Exception as e:
+                if attempt >= self.factory.retries or not is_transient_error(e):
+                    raise
+                attempt += 1
+                delay = self.factory.backoff(attempt)
+                print(f"Database error: {e}; reconnecting in {delay:g}s ({attempt}/{self.factory.retries})")
+                self.close()
+                time.sleep(delay)
+
+    def close(self):
+        if self.connection is not None:
+            close_quietly(self.connection)
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """Up to size pooled items (connections, or sessions wrapping one), each used by one thread at a time.
+
+    acquire() hands out an idle item that still passes is_alive, replacing
+    one that died while idle, opens a new one while fewer than size are
+    open, and otherwise waits for a release.
+    """
+
+    def __init__(self, open_item: Callable, size: int, close_item: Callable = close_quietly,
+                 is_alive: Optional[Callable] = None):
+        self.open_item = open_item
+        self.close_item = close_item
+        self.is_alive = is_alive
+        self.size = max(1, size)
+        self._idle = []
+        self._open = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def for_factory(cls, factory: ConnectionFactory, size: int, read_only: bool = True) -> 'ConnectionPool':
+        """A pool of plain connections from factory."""
+        return cls(lambda: factory.connect(read_only), size, is_alive=factory.is_alive)
+
+    @property
+    def idle(self) -> List:
+        """The items currently released to the pool."""
+        with self._condition:
+            return list(self._idle)
+
+    def acquire(self):
+        with self._condition:
+            while not self._idle and self._open >= self.size:
+                self._condition.wait()
+            item = self._idle.pop() if self._idle else None
+            if item is None:
+                self._open += 1
+        if item is not None:
+            if self.is_alive is None or self.is_alive(item):
+                return item
+            self._close(item)
+        try:
+            return self.open_item()
+        except BaseException:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, item, discard: bool = False):
+        """Return an item to the pool, or close it when discard is set (e.g. after an error)."""
+        if discard:
+            self._close(item)
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            return
+        with self._condition:
+            self._idle.append(item)
+            self._condition.notify()
+
+    def close(self):
+        """Close the idle items; items still acquired are closed when they are discarded."""
+        with self._condition:
+            items, self._idle = self._idle, []
+            self._open -= len(items)
+        for item in items:
+            self._close(item)
+
+    def _close(self, item):
+        try:
+            self.close_item(item)
+        except Exception:
+            pass
@@ -16,7 +16,11 @@ Usage:
 Environment:
     QDRANT_URL       Qdrant REST endpoint (default: http://localhost:6333)
     MYSQL_HOST       MySQL host (default: localhost)
+    MYSQL_SOCKET     MySQL socket of the primary (default: /var/run/mysqld/mysqld.sock)
     MYSQL_PASSWORD   MySQL password (default: empty)
+    ATOM_DB_REPLICA_HOST, ATOM_DB_REPLICA_PORT, ATOM_DB_REPLICA_USER, ATOM_DB_REPLICA_PASSWORD
+                     Read replica to index from while it is within --max-replica-lag
+                     (see ahgCorePlugin/lib/python/ahg_db.py)
     ATOM_ROOT        AtoM installation root (default: /usr/share/nginx/archive)
 """
 
@@ -38,6 +42,11 @@ from qdrant_client.models import (
 )
 from sentence_transformers import SentenceTransformer
 
+# Connection factory shared with the other AHG Python tools (ahgCorePlugin)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                "..", "..", "ahgCorePlugin", "lib", "python"))
+from ahg_db import ConnectionFactory, ManagedConnection, read_mycnf_password, replica_config_from_env
+
 # ── Configuration ──────────────────────────────────────────────────
 
 MODEL_NAME = "clip-ViT-B-32"
@@ -57,32 +66,32 @@ IMAGE_MIMES = {
 }
 
 
-def _read_mycnf_password():
-    """Read password from ~/.my.cnf if it exists (matches mysql CLI behaviour)."""
-    cnf = os.path.expanduser("~/.my.cnf")
-    if not os.path.isfile(cnf):
-        return ""
-    try:
-        import configparser
-        cfg = configparser.ConfigParser()
-        cfg.read(cnf)
-        return cfg.get("client", "password", fallback="")
-    except Exception:
-        return ""
-
-
-def get_db_connection(args):
-    """Create MySQL connection via PyMySQL."""
-    password = os.environ.get("MYSQL_PASSWORD", "") or args.db_password or _read_mycnf_password()
-    return pymysql.connect(
-        host=os.environ.get("MYSQL_HOST", "localhost"),
-        user=args.db_user,
-        password=password,
-        database=args.db_name,
-        charset="utf8mb4",
-        unix_socket="/var/run/mysqld/mysqld.sock",
-        cursorclass=pymysql.cursors.DictCursor,
+def get_db_connection(args) -> ManagedConnection:
+    """PyMySQL connection, on the read replica when one is configured and within --max-replica-lag.
+
+    The returned ManagedConnection reconnects and reruns a query after a
+    dropped connection (e.g. wait_timeout while a batch was being embedded).
+    """
+    password = os.environ.get("MYSQL_PASSWORD", "") or args.db_password or read_mycnf_password()
+    primary = {
+        "host": os.environ.get("MYSQL_HOST", "localhost"),
+        "user": args.db_user,
+        "password": password,
+        "database": args.db_name,
+        "charset": "utf8mb4",
+        "unix_socket": os.environ.get("MYSQL_SOCKET", "/var/run/mysqld/mysqld.sock"),
+    }
+    factory = ConnectionFactory(
+        primary,
+        driver="pymysql",
+        replica=replica_config_from_env(primary),
+        max_replica_lag=args.max_replica_lag,
+        query_timeout=args.query_timeout,
+        connect_args={"cursorclass": pymysql.cursors.DictCursor},
     )
+    db = ManagedConnection(factory)
+    db.open()
+    return db
 
 
 def count_images(conn) -> int:
@@ -204,6 +213,10 @@ def main():
     parser.add_argument("--db-name", default="archive", help="MySQL database name")
     parser.add_argument("--db-user", default="root", help="MySQL user")
     parser.add_argument("--db-password", default="", help="MySQL password")
+    parser.add_argument("--max-replica-lag", type=float, default=ConnectionFactory.DEFAULT_MAX_REPLICA_LAG,
+                        help="Read from the ATOM_DB_REPLICA_HOST replica only while it is at most "
+                             "this many seconds behind")
+    parser.add_argument("--query-timeout", type=float, help="Abort any query running longer than this many seconds")
     parser.add_argument("--collection", default=None, help="Qdrant collection name (default: {db-name}_images)")
     parser.add_argument("--qdrant-url", default=os.environ.get("QDRANT_URL", "http://localhost:6333"))
     parser.add_argument("--atom-root", default=os.environ.get("ATOM_ROOT", "/usr/share/nginx/archive"))
@@ -224,7 +237,8 @@ def main():
 
     # ── Connect to services ──
     print("Connecting to MySQL...")
-    conn = get_db_connection(args)
+    db = get_db_connection(args)
+    print(f"  Reading from the {'read replica' if db.on_replica else 'primary'}")
 
     print("Connecting to Qdrant...")
     qdrant = QdrantClient(url=args.qdrant_url)
@@ -238,7 +252,7 @@ def main():
     setup_collection(qdrant, collection_name, args.reset)
 
     # ── Count images ──
-    total = count_images(conn)
+    total = db.run(count_images)
     if args.limit > 0:
         total = min(total, args.offset + args.limit)
     print(f"\n  Images to index: {total - args.offset:,}")
@@ -251,7 +265,7 @@ def main():
 
     while offset < total:
         batch_limit = min(BATCH_SIZE, total - offset) if args.limit > 0 else BATCH_SIZE
-        rows = fetch_images(conn, offset, batch_limit, args.atom_root)
+        rows = db.run(fetch_images, offset, batch_limit, args.atom_root)
 
         if not rows:
             break
@@ -321,7 +335,7 @@ def main():
     info = qdrant.get_collection(collection_name)
     print(f"  Collection points: {info.points_count:,}")
 
-    conn.close()
+    db.close()
     print("\nDone.")
 
 
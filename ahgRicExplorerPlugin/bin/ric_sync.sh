@@ -10,10 +10,14 @@
 #   ./ric_sync.sh                    # Sync all fonds
 #   ./ric_sync.sh --fonds 776,829    # Sync specific fonds
 #   ./ric_sync.sh --clear            # Clear and resync all
+#   ./ric_sync.sh --incremental      # Only reload descriptions changed since last sync
+#   ./ric_sync.sh --workers 8        # Extract with 8 parallel workers
+#   ./ric_sync.sh --format nt        # Load gzipped N-Triples instead of JSON-LD
 #   ./ric_sync.sh --validate         # Run SHACL validation after sync
 #   ./ric_sync.sh --backup           # Backup before sync
 #   ./ric_sync.sh --link-authorities # Run authority linking after sync
 #   ./ric_sync.sh --cron             # Silent mode for cron
+#   ./ric_sync.sh --cron --metrics-file /var/lib/node_exporter/textfile_collector/ric.prom
 #   ./ric_sync.sh --status           # Show triplestore status
 #
 
@@ -34,6 +38,26 @@ FUSEKI_PASS="${FUSEKI_PASS:-admin123}"
 BACKUP_DIR="${BACKUP_DIR:-/var/backups/fuseki}"
 EXTRACT_DIR="${EXTRACT_DIR:-/tmp/ric_extract}"
 LOG_FILE="${LOG_FILE:-/var/log/ric_sync.log}"
+WATERMARK_FILE="${WATERMARK_FILE:-${EXTRACT_DIR}/watermarks.json}"
+FINGERPRINT_FILE="${FINGERPRINT_FILE:-${EXTRACT_DIR}/fingerprints.json}"
+# Term/taxonomy name dictionary reused by every extractor call until a term changes
+TERM_CACHE="${RIC_TERM_CACHE:-${EXTRACT_DIR}/terms.json}"
+# Checkpoints of an interrupted full sync: fonds extracted (extractor journal)
+# and fonds loaded. Removed once a run finishes without failures.
+EXPORT_JOURNAL="${EXTRACT_DIR}/export.journal"
+LOAD_JOURNAL="${EXTRACT_DIR}/loaded.journal"
+RESUME_MAX_HOURS="${RIC_RESUME_MAX_HOURS:-24}"
+# curl retries (with backoff) on timeouts and HTTP 408/429/5xx from Fuseki
+HTTP_RETRIES="${RIC_HTTP_RETRIES:-3}"
+# Skip uploading fonds whose graph fingerprint matches the last successful load
+SKIP_UNCHANGED="${RIC_SKIP_UNCHANGED:-true}"
+WORKERS="${RIC_WORKERS:-$(nproc 2>/dev/null || echo 1)}"
+METRICS_FILE="${RIC_METRICS_FILE:-}"
+# jsonld, nt or nq (nq loads each fonds into its own named graph, which queries
+# of the default graph only see when the dataset sets tdb2:unionDefaultGraph)
+FORMAT="${RIC_FORMAT:-jsonld}"
+# Comma-separated AtoM cultures for language-tagged literals (empty: source culture only)
+CULTURES="${RIC_CULTURES:-}"
 
 export ATOM_DB_HOST="${ATOM_DB_HOST:-localhost}"
 export ATOM_DB_USER="${ATOM_DB_USER:-root}"
@@ -44,28 +68,56 @@ export ATOM_INSTANCE_ID="${ATOM_INSTANCE_ID:-atom-psis}"
 
 # Options
 CLEAR_FIRST=false
+INCREMENTAL=false
 CRON_MODE=false
 VALIDATE=false
 BACKUP=false
 LINK_AUTHORITIES=false
 SPECIFIC_FONDS=""
 STATUS_ONLY=false
+BATCH_EXTRACTED=false
+RESTART=false
+CHECKPOINT=false
+RESUMING=false
+GRAPHS="${RIC_GRAPHS:-false}"
+CHANGED_ONLY=false
+LOADED_FONDS=""
 
 # Parse arguments
 while [[ $# -gt 0 ]]; do
     case $1 in
         --clear) CLEAR_FIRST=true; shift ;;
+        --restart) RESTART=true; shift ;;
+        --incremental) INCREMENTAL=true; shift ;;
         --cron) CRON_MODE=true; shift ;;
         --validate) VALIDATE=true; shift ;;
         --backup) BACKUP=true; shift ;;
         --link-authorities) LINK_AUTHORITIES=true; shift ;;
         --fonds) SPECIFIC_FONDS="$2"; shift 2 ;;
+        --workers) WORKERS="$2"; shift 2 ;;
+        --metrics-file) METRICS_FILE="$2"; shift 2 ;;
+        --format) FORMAT="$2"; shift 2 ;;
+        --cultures) CULTURES="$2"; shift 2 ;;
+        --graphs) GRAPHS=true; shift ;;
+        --changed-only) CHANGED_ONLY=true; shift ;;
+        --no-skip-unchanged) SKIP_UNCHANGED=false; shift ;;
         --status) STATUS_ONLY=true; shift ;;
         --help) 
             echo "Usage: $0 [options]"
             echo "Options:"
             echo "  --clear            Clear triplestore before sync"
+            echo "  --restart          Ignore the checkpoints of an interrupted sync and start over"
+            echo "  --incremental      Only reload descriptions changed since the last sync"
             echo "  --fonds IDS        Sync specific fonds (comma-separated)"
+            echo "  --workers N        Parallel extraction workers (default: CPU count)"
+            echo "  --metrics-file F   Write per-phase extraction metrics as a Prometheus textfile"
+            echo "  --format FMT       Load format: jsonld (default), nt or nq (gzipped)"
+            echo "                     (nq fills named graphs: dataset needs tdb2:unionDefaultGraph)"
+            echo "  --cultures LIST    Emit language-tagged literals for these cultures (e.g. en,af)"
+            echo "  --graphs           Replace one named graph per fonds instead of appending"
+            echo "                     (dataset needs tdb2:unionDefaultGraph; --clear is not needed)"
+            echo "  --changed-only     With --graphs, only reload fonds changed since their last load"
+            echo "  --no-skip-unchanged Upload every fonds even if its graph fingerprint is unchanged"
             echo "  --validate         Run SHACL validation after sync"
             echo "  --backup           Create backup before sync"
             echo "  --link-authorities Run authority linking after sync"
@@ -77,6 +129,36 @@ while [[ $# -gt 0 ]]; do
     esac
 done
 
+case "$FORMAT" in
+    jsonld|nt|nq) ;;
+    *) echo "Unknown format: $FORMAT"; exit 1 ;;
+esac
+if [ "$FORMAT" = nq ] && [ "$INCREMENTAL" = true ]; then
+    echo "--format nq cannot be combined with --incremental (delta updates target the default graph)"
+    exit 1
+fi
+if [ "$GRAPHS" = true ]; then
+    if [ "$INCREMENTAL" = true ]; then
+        echo "--graphs cannot be combined with --incremental (each fonds graph is replaced whole)"
+        exit 1
+    fi
+    if [ "$FORMAT" = nq ]; then
+        echo "--graphs needs --format jsonld or nt (the graph name comes from the request)"
+        exit 1
+    fi
+elif [ "$CHANGED_ONLY" = true ]; then
+    echo "--changed-only requires --graphs"
+    exit 1
+fi
+# A cleared store needs every fonds; incremental runs only load deltas anyway
+if [ "$CLEAR_FIRST" = true ] || [ "$INCREMENTAL" = true ]; then
+    SKIP_UNCHANGED=false
+fi
+
+# Options common to every extraction
+EXTRACT_ARGS=(--term-cache "$TERM_CACHE")
+[ -n "$CULTURES" ] && EXTRACT_ARGS+=(--cultures "$CULTURES")
+
 # Logging
 log() {
     local msg="[$(date '+%Y-%m-%d %H:%M:%S')] $1"
@@ -214,28 +296,201 @@ clear_triplestore() {
     log "Triplestore cleared"
 }
 
+# Print the IDs of an extractor --json listing, one per line
+listing_ids() {
+    python3 "$EXTRACTOR" "$@" --json 2>/dev/null | \
+        python3 -c 'import json, sys; print("\n".join(str(row["id"]) for row in json.load(sys.stdin)))'
+}
+
 # Get list of fonds
 get_fonds_list() {
-    python3 "$EXTRACTOR" --list-fonds 2>/dev/null | grep -E '^\s*[0-9]+' | awk '{print $1}'
+    listing_ids --list-fonds
 }
 
 get_standalone_list() {
-    python3 "$EXTRACTOR" --list-standalone 2>/dev/null | grep -E "^\s*[0-9]+" | awk "{print \$1}"
+    listing_ids --list-standalone
+}
+
+# Output file for a fonds in the configured format; RDF formats are gzipped
+fonds_output_file() {
+    if [ "$FORMAT" = jsonld ]; then
+        echo "${EXTRACT_DIR}/fonds_$1.jsonld"
+    else
+        echo "${EXTRACT_DIR}/fonds_$1.${FORMAT}.gz"
+    fi
+}
+
+# Named graph holding a fonds; must match RiCExtractor.graph_uri()
+graph_uri() {
+    echo "${RIC_BASE_URI%/}/${ATOM_INSTANCE_ID}/graph/$1"
+}
+
+# Print the ids from $2.. that appear in the space-separated list $1
+filter_ids() {
+    local keep=" $1 "
+    shift
+    local id
+    for id in "$@"; do
+        [[ "$keep" == *" $id "* ]] && echo "$id"
+    done
+}
+
+# Drop fonds graphs whose fonds no longer exist in AtoM
+drop_orphan_graphs() {
+    local keep=" $* "
+    local prefix=$(graph_uri "")
+    local query="SELECT DISTINCT ?g WHERE { GRAPH ?g { } FILTER(STRSTARTS(STR(?g), \"${prefix}\")) }"
+    local graph
+    
+    curl -s -u "${FUSEKI_USER}:${FUSEKI_PASS}" \
+        -X POST "${FUSEKI_URL}/${FUSEKI_DATASET}/query" \
+        -H "Content-Type: application/sparql-query" \
+        -H "Accept: text/csv" \
+        --data-binary "$query" | tail -n +2 | tr -d '\r' | while read -r graph; do
+        [ -z "$graph" ] && continue
+        if [[ "$keep" != *" ${graph#$prefix} "* ]]; then
+            log "  Dropping graph of removed fonds ${graph#$prefix}"
+            curl -s -o /dev/null -u "${FUSEKI_USER}:${FUSEKI_PASS}" \
+                -X POST "${FUSEKI_URL}/${FUSEKI_DATASET}/update" \
+                -H "Content-Type: application/sparql-update" \
+                --data-binary "DROP SILENT GRAPH <${graph}>"
+        fi
+    done
+}
+
+# Extract many fonds in one run over the extractor's worker pool
+# Writes the fonds_output_file of each ID; failed fonds leave no file
+extract_batch() {
+    local ids=$(echo "$*" | tr ' ' ',')
+    
+    [ -z "$ids" ] && return 0
+    
+    local extra_args=(--format "$FORMAT" "${EXTRACT_ARGS[@]}")
+    [ "$FORMAT" != jsonld ] && extra_args+=(--gzip)
+    # Every graph has to stand alone, so repeat shared agents per fonds (the
+    # extractor already does so for fingerprinted runs and N-Quads)
+    [ "$GRAPHS" = true ] && extra_args+=(--no-entity-dedup)
+    [ "$SKIP_UNCHANGED" = true ] && extra_args+=(--fingerprint-file "$FINGERPRINT_FILE")
+    # Fonds finished by an interrupted run are not extracted again
+    [ "$CHECKPOINT" = true ] && extra_args+=(--journal "$EXPORT_JOURNAL")
+    [ -n "$METRICS_FILE" ] && extra_args+=(--metrics-file "$METRICS_FILE")
+    
+    log "Extracting $(echo "$*" | wc -w) fonds with $WORKERS workers..."
+    if ! python3 "$EXTRACTOR" --fonds-ids "$ids" --workers "$WORKERS" \
+            --output-dir "$EXTRACT_DIR" "${extra_args[@]}" 2>/dev/null; then
+        log_error "Batch extraction reported failures, see ${EXTRACT_DIR}/summary.json"
+    fi
+    BATCH_EXTRACTED=true
+}
+
+# Extract and load only what changed in a fonds since its watermark
+extract_fonds_incremental() {
+    local fonds_id=$1
+    local output_file="${EXTRACT_DIR}/fonds_${fonds_id}.delta.jsonld"
+    local update_file="${EXTRACT_DIR}/fonds_${fonds_id}.delta.ru"
+    
+    log "Extracting changes for fonds $fonds_id..."
+    
+    # Keep the previous watermark so a failed load is retried next run
+    local previous_watermarks="${WATERMARK_FILE}.prev"
+    [ -f "$WATERMARK_FILE" ] && cp "$WATERMARK_FILE" "$previous_watermarks"
+    
+    if ! python3 "$EXTRACTOR" --fonds-id "$fonds_id" --output "$output_file" --stream \
+            --watermark-file "$WATERMARK_FILE" --update-watermark \
+            --update-output "$update_file" "${EXTRACT_ARGS[@]}" 2>/dev/null; then
+        log_error "Extraction failed for fonds $fonds_id"
+        return 1
+    fi
+    
+    if [ ! -s "$update_file" ]; then
+        log "  No changes"
+        return 0
+    fi
+    
+    log "  Replacing changed subjects in Fuseki..."
+    
+    local response=$(curl -s -w "%{http_code}" -o /dev/null --retry "$HTTP_RETRIES" \
+        -u "${FUSEKI_USER}:${FUSEKI_PASS}" \
+        -X POST "${FUSEKI_URL}/${FUSEKI_DATASET}/update" \
+        -H "Content-Type: application/sparql-update" \
+        --data-binary "@${update_file}")
+    
+    if [ "$response" = "200" ] || [ "$response" = "204" ]; then
+        response=$(curl -s -w "%{http_code}" -o /dev/null --retry "$HTTP_RETRIES" \
+            -u "${FUSEKI_USER}:${FUSEKI_PASS}" \
+            -X POST "${FUSEKI_URL}/${FUSEKI_DATASET}/data" \
+            -H "Content-Type: application/ld+json" \
+            --data-binary "@${output_file}")
+    fi
+    
+    if [ "$response" = "200" ] || [ "$response" = "204" ]; then
+        log "  Loaded changes successfully"
+        return 0
+    else
+        log_error "Incremental load failed for fonds $fonds_id (HTTP $response)"
+        if [ -f "$previous_watermarks" ]; then
+            mv "$previous_watermarks" "$WATERMARK_FILE"
+        else
+            rm -f "$WATERMARK_FILE"
+        fi
+        return 1
+    fi
+}
+
+# Record the fingerprint of a loaded fonds; until then it only sits in the
+# pending file, so a fonds extracted but never loaded is uploaded next run
+commit_fingerprint() {
+    [ "$SKIP_UNCHANGED" = true ] || return 0
+    python3 "$EXTRACTOR" --commit-fingerprints --fonds-id "$1" \
+        --fingerprint-file "$FINGERPRINT_FILE" >/dev/null 2>&1
 }
 
 # Extract and load a fonds
 extract_fonds() {
     local fonds_id=$1
-    local output_file="${EXTRACT_DIR}/fonds_${fonds_id}.jsonld"
+    
+    if [ "$INCREMENTAL" = true ]; then
+        extract_fonds_incremental "$fonds_id"
+        return
+    fi
+    
+    if [ "$RESUMING" = true ] && grep -qx "$fonds_id" "$LOAD_JOURNAL" 2>/dev/null; then
+        log "Fonds $fonds_id already loaded by the interrupted run, skipping"
+        return 0
+    fi
+    local output_file=$(fonds_output_file "$fonds_id")
+    local content_type="application/ld+json"
+    local encoding_header=()
+    local fingerprint_args=()
+    [ "$SKIP_UNCHANGED" = true ] && fingerprint_args=(--fingerprint-file "$FINGERPRINT_FILE")
+    case "$FORMAT" in
+        nt) content_type="application/n-triples"; encoding_header=(-H "Content-Encoding: gzip") ;;
+        nq) content_type="application/n-quads"; encoding_header=(-H "Content-Encoding: gzip") ;;
+    esac
     
     log "Extracting fonds $fonds_id..."
     
-    # Extract to JSON-LD
-    if ! python3 "$EXTRACTOR" --fonds-id "$fonds_id" --output "$output_file" 2>/dev/null; then
+    # Extract, unless the batch run already did
+    if [ "$BATCH_EXTRACTED" = true ]; then
+        if [ ! -f "$output_file" ]; then
+            log_error "Extraction failed for fonds $fonds_id"
+            return 1
+        fi
+    elif ! python3 "$EXTRACTOR" --fonds-id "$fonds_id" --output "$output_file" --stream \
+            --format "$FORMAT" "${fingerprint_args[@]}" "${EXTRACT_ARGS[@]}" 2>/dev/null; then
         log_error "Extraction failed for fonds $fonds_id"
         return 1
     fi
     
+    # The extractor leaves an empty file when the fingerprint is unchanged
+    if [ "$SKIP_UNCHANGED" = true ] && [ -f "$output_file" ] && [ ! -s "$output_file" ]; then
+        log "  Unchanged since last load, skipped"
+        commit_fingerprint "$fonds_id"
+        LOADED_FONDS="$LOADED_FONDS $fonds_id"
+        [ "$CHECKPOINT" = true ] && echo "$fonds_id" >> "$LOAD_JOURNAL"
+        return 2
+    fi
+    
     if [ ! -s "$output_file" ]; then
         log_error "Empty output for fonds $fonds_id"
         return 1
@@ -243,17 +498,26 @@ extract_fonds() {
     
     log "  Extracted to $output_file"
     
-    # Load to Fuseki
+    # Load to Fuseki; in graph mode PUT replaces the fonds graph atomically
     log "  Loading to Fuseki..."
+    local method=POST
+    local target="${FUSEKI_URL}/${FUSEKI_DATASET}/data"
+    if [ "$GRAPHS" = true ]; then
+        method=PUT
+        target="${target}?graph=$(graph_uri "$fonds_id")"
+    fi
     
-    local response=$(curl -s -w "%{http_code}" -o /dev/null \
+    local response=$(curl -s -w "%{http_code}" -o /dev/null --retry "$HTTP_RETRIES" \
         -u "${FUSEKI_USER}:${FUSEKI_PASS}" \
-        -X POST "${FUSEKI_URL}/${FUSEKI_DATASET}/data" \
-        -H "Content-Type: application/ld+json" \
+        -X "$method" "$target" \
+        -H "Content-Type: ${content_type}" "${encoding_header[@]}" \
         --data-binary "@${output_file}")
     
-    if [ "$response" = "200" ] || [ "$response" = "204" ]; then
+    if [ "$response" = "200" ] || [ "$response" = "201" ] || [ "$response" = "204" ]; then
         log "  Loaded successfully"
+        commit_fingerprint "$fonds_id"
+        LOADED_FONDS="$LOADED_FONDS $fonds_id"
+        [ "$CHECKPOINT" = true ] && echo "$fonds_id" >> "$LOAD_JOURNAL"
         return 0
     else
         log_error "Load failed for fonds $fonds_id (HTTP $response)"
@@ -310,8 +574,19 @@ main() {
         backup_triplestore
     fi
     
-    # Clear if requested
-    if [ "$CLEAR_FIRST" = true ]; then
+    # Full syncs are checkpointed; resume an interrupted one unless told to start over
+    [ "$RESTART" = true ] && rm -f "$EXPORT_JOURNAL" "$LOAD_JOURNAL"
+    if [ "$INCREMENTAL" = false ] && [ -z "$SPECIFIC_FONDS" ]; then
+        CHECKPOINT=true
+        find "$EXPORT_JOURNAL" "$LOAD_JOURNAL" -mmin +$((RESUME_MAX_HOURS * 60)) -delete 2>/dev/null
+        if [ -f "$EXPORT_JOURNAL" ] || [ -f "$LOAD_JOURNAL" ]; then
+            RESUMING=true
+            log "Resuming interrupted sync ($(cat "$LOAD_JOURNAL" 2>/dev/null | wc -l) fonds already loaded)"
+        fi
+    fi
+    
+    # Clear if requested (an interrupted run already did)
+    if [ "$CLEAR_FIRST" = true ] && [ "$RESUMING" = false ]; then
         clear_triplestore
     fi
     
@@ -326,33 +601,70 @@ main() {
     local total=$(echo "$fonds_list" | wc -w)
     log "Found $total fonds to process"
     
+    local standalone_list
+    standalone_list=$(get_standalone_list)
+    
+    local all_ids="$fonds_list $standalone_list"
+    local sync_started=""
+    if [ "$GRAPHS" = true ]; then
+        # Taken before extracting so edits made during the run are seen next time
+        sync_started=$(python3 "$EXTRACTOR" --database-now 2>/dev/null)
+        if [ "$CHANGED_ONLY" = true ]; then
+            local changed=$(python3 "$EXTRACTOR" --list-changed \
+                --fonds-ids "$(echo $all_ids | tr ' ' ',')" \
+                --watermark-file "$WATERMARK_FILE" 2>/dev/null)
+            fonds_list=$(filter_ids "$changed" $fonds_list)
+            standalone_list=$(filter_ids "$changed" $standalone_list)
+            log "$(echo $fonds_list $standalone_list | wc -w) changed since their last load"
+        fi
+    fi
+    
+    if [ "$INCREMENTAL" = false ] && { [ "$WORKERS" -gt 1 ] || [ -n "$METRICS_FILE" ]; }; then
+        if [ "$RESUMING" = false ]; then
+            rm -f "${EXTRACT_DIR}"/fonds_*.jsonld "${EXTRACT_DIR}"/fonds_*.n[tq].gz
+        fi
+        extract_batch $fonds_list $standalone_list
+    fi
+    
     local skipped=0
+    local unchanged=0
     for fonds_id in $fonds_list; do
-        if extract_fonds "$fonds_id"; then
-            processed=$((processed + 1))
-        else
-            skipped=$((skipped + 1))
-        fi
+        extract_fonds "$fonds_id"
+        case $? in
+            0) processed=$((processed + 1)) ;;
+            2) unchanged=$((unchanged + 1)) ;;
+            *) skipped=$((skipped + 1)) ;;
+        esac
     done
 
     # Process standalone records (non-fonds at top level)
     log "Processing standalone records..."
-    local standalone_list
-    standalone_list=$(get_standalone_list)
     local standalone_total=$(echo "$standalone_list" | wc -w)
     log "Found $standalone_total standalone records to process"
     local standalone_processed=0
     local standalone_skipped=0
     for record_id in $standalone_list; do
-        if extract_fonds "$record_id"; then
-            standalone_processed=$((standalone_processed + 1))
-        else
-            standalone_skipped=$((standalone_skipped + 1))
-        fi
+        extract_fonds "$record_id"
+        case $? in
+            0) standalone_processed=$((standalone_processed + 1)) ;;
+            2) unchanged=$((unchanged + 1)) ;;
+            *) standalone_skipped=$((standalone_skipped + 1)) ;;
+        esac
     done
     processed=$((processed + standalone_processed))
     skipped=$((skipped + standalone_skipped))
 
+    if [ "$GRAPHS" = true ]; then
+        if [ -n "$sync_started" ] && [ -n "$LOADED_FONDS" ]; then
+            python3 "$EXTRACTOR" --set-watermark "$sync_started" \
+                --fonds-ids "$(echo $LOADED_FONDS | tr ' ' ',')" \
+                --watermark-file "$WATERMARK_FILE" 2>/dev/null
+        fi
+        if [ -z "$SPECIFIC_FONDS" ]; then
+            drop_orphan_graphs $all_ids
+        fi
+    fi
+
     # Post-sync tasks
     if [ "$VALIDATE" = true ]; then
         run_validation
@@ -362,11 +674,17 @@ main() {
         run_authority_linking
     fi
 
+    # A clean run leaves nothing to resume; after failures the next run retries only those
+    if [ "$CHECKPOINT" = true ] && [ "$skipped" -eq 0 ]; then
+        rm -f "$EXPORT_JOURNAL" "$LOAD_JOURNAL"
+    fi
+
     # Final status
     local final_count=$(get_status)
     log "=========================================="
     log "RiC Sync Complete"
     log "  Processed: $processed records ($standalone_processed standalone)"
+    log "  Unchanged (not uploaded): $unchanged records"
     log "  Skipped: $skipped records"
     log "  Total triples: $final_count"
     log "=========================================="
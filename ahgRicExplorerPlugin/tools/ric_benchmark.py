@@ -0,0 +1,803 @@
+#!/usr/bin/env python3
+"""
+RiC Extractor Benchmark - Synthetic AtoM Dataset
+================================================
+
+Generates a synthetic AtoM-shaped dataset in a scratch database, then runs
+RiCExtractor.extract_fonds (or, with --stream, stream_fonds writing the
+chosen --format) against fonds of increasing size and reports time, memory
+and query counts per extraction phase.
+
+The dataset holds the AtoM tables and columns the extractor reads: a
+description tree of configurable depth and breadth, agents with creation
+events, subject/place/genre terms, rights, digital objects, related
+material, Spectrum condition checks, valuations, loans and movements, and
+GRAP heritage assets. The DDL and inserts are plain SQL that MySQL and
+SQLite both accept, given the driver's paramstyle (SyntheticDataset takes
+it); the extractor itself needs MySQL.
+
+Generated fonds are kept and reused by later runs with the same dataset
+options, so the (slow) million-record fonds is only built once.
+
+Usage:
+    python ric_benchmark.py --database ric_bench --sizes 1000,10000
+    python ric_benchmark.py --database ric_bench --sizes 1000,10000,100000,1000000 --output bench.json
+    python ric_benchmark.py --database ric_bench --sizes 1000,10000 --baseline bench.json --max-regression 25
+    python ric_benchmark.py --database ric_bench --sizes 1000,10000 --stream --format nq
+    python ric_benchmark.py --database ric_bench --depth 6 --breadth 4 --agents 5000 --recreate
+
+Never point --database at a real AtoM database: --recreate drops the tables.
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ric_extractor_v5 import MISSING_DRIVER, RiCExtractor, format_profile, mysql, open_output  # noqa: E402
+
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+# Tables the extractor reads, with only the columns it uses
+SCHEMA = {
+    'object': "id INT NOT NULL PRIMARY KEY, class_name VARCHAR(255), created_at DATETIME, updated_at DATETIME",
+    'information_object': "id INT NOT NULL PRIMARY KEY, parent_id INT, identifier VARCHAR(1024), "
+                          "level_of_description_id INT, source_culture VARCHAR(16), repository_id INT, "
+                          "lft INT, rgt INT",
+    'information_object_i18n': "id INT NOT NULL, culture VARCHAR(16) NOT NULL, title VARCHAR(1024), "
+                               "scope_and_content TEXT, arrangement TEXT, extent_and_medium TEXT, "
+                               "archival_history TEXT, acquisition TEXT, appraisal TEXT, accruals TEXT, "
+                               "physical_characteristics TEXT, finding_aids TEXT, location_of_originals TEXT, "
+                               "location_of_copies TEXT, related_units_of_description TEXT, rules TEXT, "
+                               "PRIMARY KEY (id, culture)",
+    'taxonomy': "id INT NOT NULL PRIMARY KEY",
+    'taxonomy_i18n': "id INT NOT NULL, culture VARCHAR(16) NOT NULL, name VARCHAR(255), PRIMARY KEY (id, culture)",
+    'term': "id INT NOT NULL PRIMARY KEY, taxonomy_id INT",
+    'term_i18n': "id INT NOT NULL, culture VARCHAR(16) NOT NULL, name VARCHAR(1024), PRIMARY KEY (id, culture)",
+    'actor': "id INT NOT NULL PRIMARY KEY, entity_type_id INT",
+    'actor_i18n': "id INT NOT NULL, culture VARCHAR(16) NOT NULL, authorized_form_of_name VARCHAR(1024), "
+                  "dates_of_existence TEXT, history TEXT, places TEXT, legal_status TEXT, functions TEXT, "
+                  "mandates TEXT, internal_structures TEXT, general_context TEXT, PRIMARY KEY (id, culture)",
+    'repository': "id INT NOT NULL PRIMARY KEY",
+    'contact_information': "id INT NOT NULL PRIMARY KEY, actor_id INT, contact_person VARCHAR(1024), "
+                           "street_address TEXT, postal_code VARCHAR(255), country_code VARCHAR(255), "
+                           "email VARCHAR(255), website VARCHAR(1024)",
+    'event': "id INT NOT NULL PRIMARY KEY, object_id INT, actor_id INT, start_date DATE, end_date DATE, type_id INT",
+    'event_i18n': "id INT NOT NULL, culture VARCHAR(16) NOT NULL, date VARCHAR(1024), description TEXT, "
+                  "PRIMARY KEY (id, culture)",
+    'object_term_relation': "id INT NOT NULL PRIMARY KEY, object_id INT, term_id INT",
+    'digital_object': "id INT NOT NULL PRIMARY KEY, object_id INT, usage_id INT, mime_type VARCHAR(255), "
+                      "byte_size BIGINT, name VARCHAR(1024), parent_id INT",
+    'relation': "id INT NOT NULL PRIMARY KEY, subject_id INT, object_id INT, type_id INT",
+    'rights': "id INT NOT NULL PRIMARY KEY, start_date DATE, end_date DATE, basis_id INT, "
+              "copyright_status_id INT, copyright_jurisdiction VARCHAR(1024)",
+    'rights_i18n': "id INT NOT NULL, culture VARCHAR(16) NOT NULL, rights_note TEXT, copyright_note TEXT, "
+                   "license_terms TEXT, statute_jurisdiction TEXT, statute_note TEXT, PRIMARY KEY (id, culture)",
+    'rights_record': "id INT NOT NULL PRIMARY KEY, rights_id INT, object_id INT",
+    'function_object': "id INT NOT NULL PRIMARY KEY, type_id INT",
+    'function_object_i18n': "id INT NOT NULL, culture VARCHAR(16) NOT NULL, authorized_form_of_name VARCHAR(1024), "
+                            "classification VARCHAR(1024), dates VARCHAR(1024), description TEXT, history TEXT, "
+                            "legislation TEXT, PRIMARY KEY (id, culture)",
+    'spectrum_condition_check': "id INT NOT NULL PRIMARY KEY, object_id INT, condition_reference VARCHAR(255), "
+                                "check_date DATE, check_reason VARCHAR(255), checked_by VARCHAR(255), "
+                                "overall_condition VARCHAR(255), condition_note TEXT, completeness_note TEXT, "
+                                "hazard_note TEXT, technical_assessment TEXT, recommended_treatment TEXT, "
+                                "treatment_priority VARCHAR(255), next_check_date DATE, "
+                                "environment_recommendation TEXT, handling_recommendation TEXT, "
+                                "display_recommendation TEXT, storage_recommendation TEXT, "
+                                "packing_recommendation TEXT, photo_count INT, workflow_state VARCHAR(255), "
+                                "condition_rating VARCHAR(255), material_type VARCHAR(255), updated_at DATETIME",
+    'spectrum_valuation': "id INT NOT NULL PRIMARY KEY, object_id INT, valuation_reference VARCHAR(255), "
+                          "valuation_date DATE, valuation_type VARCHAR(255), valuation_amount DECIMAL(15,2), "
+                          "valuation_currency VARCHAR(16), valuer_name VARCHAR(255), "
+                          "valuer_organization VARCHAR(255), valuation_note TEXT, renewal_date DATE, "
+                          "is_current TINYINT, workflow_state VARCHAR(255), currency VARCHAR(16), "
+                          "updated_at DATETIME",
+    'spectrum_loan_out': "id INT NOT NULL PRIMARY KEY, object_id INT, loan_out_number VARCHAR(255), "
+                         "loan_number VARCHAR(255), borrower_name VARCHAR(255), borrower_contact VARCHAR(255), "
+                         "borrower_address TEXT, venue_name VARCHAR(255), venue_address TEXT, loan_out_date DATE, "
+                         "loan_start_date DATE, loan_return_date DATE, loan_end_date DATE, "
+                         "actual_return_date DATE, loan_purpose TEXT, loan_conditions TEXT, "
+                         "insurance_value DECIMAL(15,2), insurance_currency VARCHAR(16), "
+                         "insurance_reference VARCHAR(255), insurance_provider VARCHAR(255), "
+                         "insurance_policy_number VARCHAR(255), loan_agreement_date DATE, "
+                         "loan_agreement_reference VARCHAR(255), exhibition_title VARCHAR(1024), "
+                         "exhibition_dates VARCHAR(255), special_requirements TEXT, special_conditions TEXT, "
+                         "courier_required TINYINT, courier_name VARCHAR(255), loan_status VARCHAR(255), "
+                         "workflow_state VARCHAR(255), loan_note TEXT, loan_out_note TEXT, updated_at DATETIME",
+    'spectrum_location': "id INT NOT NULL PRIMARY KEY, location_name VARCHAR(255)",
+    'spectrum_movement': "id INT NOT NULL PRIMARY KEY, object_id INT, movement_reference VARCHAR(255), "
+                         "movement_date DATE, movement_reason VARCHAR(255), movement_method VARCHAR(255), "
+                         "movement_contact VARCHAR(255), handler_name VARCHAR(255), moved_by VARCHAR(255), "
+                         "condition_before VARCHAR(255), condition_after VARCHAR(255), planned_return_date DATE, "
+                         "actual_return_date DATE, movement_note TEXT, removal_authorization VARCHAR(255), "
+                         "authorization_date DATE, workflow_state VARCHAR(255), location_from INT, "
+                         "from_location_id INT, location_to INT, to_location_id INT, updated_at DATETIME",
+    'grap_heritage_asset': "id INT NOT NULL PRIMARY KEY, object_id INT, recognition_status VARCHAR(255), "
+                           "recognition_status_reason TEXT, recognition_date DATE, measurement_basis VARCHAR(255), "
+                           "acquisition_method VARCHAR(255), acquisition_date DATE, "
+                           "cost_of_acquisition DECIMAL(15,2), fair_value_at_acquisition DECIMAL(15,2), "
+                           "nominal_value DECIMAL(15,2), donor_name VARCHAR(255), donor_restrictions TEXT, "
+                           "initial_carrying_amount DECIMAL(15,2), current_carrying_amount DECIMAL(15,2), "
+                           "last_valuation_date DATE, last_valuation_amount DECIMAL(15,2), "
+                           "valuation_method VARCHAR(255), valuer_name VARCHAR(255), "
+                           "valuer_credentials VARCHAR(255), revaluation_frequency VARCHAR(255), "
+                           "revaluation_surplus DECIMAL(15,2), depreciation_policy VARCHAR(255), "
+                           "useful_life_years INT, residual_value DECIMAL(15,2), depreciation_method VARCHAR(255), "
+                           "annual_depreciation DECIMAL(15,2), accumulated_depreciation DECIMAL(15,2), "
+                           "last_impairment_date DATE, impairment_indicators TINYINT, "
+                           "impairment_indicators_details TEXT, impairment_loss DECIMAL(15,2), "
+                           "asset_class VARCHAR(255), asset_sub_class VARCHAR(255), gl_account_code VARCHAR(255), "
+                           "cost_center VARCHAR(255), fund_source VARCHAR(255), heritage_significance VARCHAR(255), "
+                           "significance_statement TEXT, restrictions_on_use TEXT, restrictions_on_disposal TEXT, "
+                           "conservation_requirements TEXT, conservation_commitments TEXT, "
+                           "insurance_required TINYINT, insurance_value DECIMAL(15,2), "
+                           "insurance_policy_number VARCHAR(255), insurance_provider VARCHAR(255), "
+                           "insurance_expiry_date DATE, risk_level VARCHAR(255), current_location VARCHAR(255), "
+                           "condition_rating VARCHAR(255), updated_at DATETIME",
+    'spectrum_grap_data': "id INT NOT NULL PRIMARY KEY, information_object_id INT, recognition_status VARCHAR(255), "
+                          "recognition_status_reason TEXT, measurement_basis VARCHAR(255), "
+                          "initial_recognition_date DATE, initial_recognition_value DECIMAL(15,2), "
+                          "carrying_amount DECIMAL(15,2), acquisition_method_grap VARCHAR(255), "
+                          "cost_of_acquisition DECIMAL(15,2), fair_value_at_acquisition DECIMAL(15,2), "
+                          "donor_restrictions TEXT, last_revaluation_date DATE, revaluation_amount DECIMAL(15,2), "
+                          "valuer_credentials VARCHAR(255), valuation_method VARCHAR(255), "
+                          "revaluation_frequency VARCHAR(255), depreciation_policy VARCHAR(255), "
+                          "useful_life_years INT, residual_value DECIMAL(15,2), depreciation_method VARCHAR(255), "
+                          "accumulated_depreciation DECIMAL(15,2), last_impairment_assessment_date DATE, "
+                          "impairment_indicators TINYINT, impairment_indicators_details TEXT, "
+                          "impairment_loss_amount DECIMAL(15,2), asset_class VARCHAR(255), "
+                          "gl_account_code VARCHAR(255), cost_center VARCHAR(255), fund_source VARCHAR(255), "
+                          "restrictions_use_disposal TEXT, heritage_significance_rating VARCHAR(255), "
+                          "conservation_commitments TEXT, insurance_coverage_required TINYINT, "
+                          "insurance_coverage_actual DECIMAL(15,2), updated_at DATETIME",
+    # Fonds generated by earlier runs and the dataset options they were built with
+    'ric_benchmark_fonds': "records INT NOT NULL PRIMARY KEY, fonds_id INT, options TEXT, created_at DATETIME",
+}
+
+# Secondary indexes AtoM has on the columns the extractor filters on
+INDEXES = (
+    ('information_object', 'parent_id'), ('information_object', 'lft'), ('information_object', 'rgt'),
+    ('event', 'object_id'), ('event', 'actor_id'), ('object_term_relation', 'object_id'),
+    ('object_term_relation', 'term_id'), ('digital_object', 'object_id'), ('relation', 'subject_id'),
+    ('relation', 'object_id'), ('rights_record', 'object_id'), ('contact_information', 'actor_id'),
+    ('spectrum_condition_check', 'object_id'), ('spectrum_valuation', 'object_id'),
+    ('spectrum_loan_out', 'object_id'), ('spectrum_movement', 'object_id'),
+    ('grap_heritage_asset', 'object_id'), ('spectrum_grap_data', 'information_object_id'),
+)
+
+# Share of descriptions carrying each kind of related row
+DEFAULT_RATES = {
+    'events': 0.6,
+    'access_points': 0.5,
+    'digital_objects': 0.3,
+    'rights': 0.2,
+    'related_materials': 0.1,
+    'condition_checks': 0.15,
+    'valuations': 0.15,
+    'loans_out': 0.05,
+    'movements': 0.1,
+    'grap_assets': 0.1,
+    'grap_data': 0.05,
+}
+
+# AtoM's fixed taxonomy IDs
+TAXONOMIES = {
+    'levels': (34, 'Levels of description'),
+    'actor_types': (32, 'Actor entity types'),
+    'event_types': (40, 'Event types'),
+    'subjects': (35, 'Subjects'),
+    'places': (42, 'Places'),
+    'genres': (78, 'Genre'),
+    'rights_basis': (68, 'Rights basis'),
+    'copyright_status': (69, 'Copyright status'),
+    'relation_types': (54, 'Relation types'),
+    'usage': (47, 'Digital object usage'),
+    'function_types': (57, 'Function types'),
+}
+
+# Rows per executemany() batch
+INSERT_BATCH_SIZE = 5000
+
+# Parameter placeholder by DB-API paramstyle (mysql.connector is format, sqlite3 qmark)
+PLACEHOLDERS = {'format': '%s', 'pyformat': '%s', 'qmark': '?'}
+
+
+class SyntheticDataset:
+    """Writes a reproducible AtoM-shaped dataset through a DB-API connection.
+
+    Shared rows (taxonomies, terms, agents, the repository, functions and
+    locations) are written once; each generate_fonds() call then adds one
+    fonds of the requested number of descriptions under the root. paramstyle
+    is the driver module's (e.g. sqlite3.paramstyle).
+    """
+
+    def __init__(self, connection, seed: int = 42, depth: int = 4, breadth: int = 10,
+                 agents: int = 1000, terms: int = 500, rates: Optional[Dict[str, float]] = None,
+                 cultures: Optional[List[str]] = None, paramstyle: str = 'format'):
+        if paramstyle not in PLACEHOLDERS:
+            raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.placeholder = PLACEHOLDERS[paramstyle]
+        self.seed = seed
+        self.depth = max(1, depth)
+        self.breadth = max(1, breadth)
+        self.agents = max(1, agents)
+        self.terms = max(1, terms)
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.cultures = cultures or ['en']
+        self._pending = {}
+        self._next_id = None
+        self.term_ids = {}
+        self.agent_ids = []
+        self.location_ids = []
+        self.repository_id = None
+
+    @property
+    def options(self) -> Dict:
+        """The options that decide the generated data; fonds are only reused when they match."""
+        return {
+            'seed': self.seed, 'depth': self.depth, 'breadth': self.breadth,
+            'agents': self.agents, 'terms': self.terms, 'rates': self.rates,
+            'cultures': self.cultures,
+        }
+
+    # -------------------- schema --------------------
+
+    def table_exists(self, table: str) -> bool:
+        try:
+            self.cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+            self.cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def create_schema(self, recreate: bool = False):
+        """Create the tables, dropping any existing ones first with recreate."""
+        for table, columns in SCHEMA.items():
+            if recreate:
+                self.cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            if not self.table_exists(table):
+                self.cursor.execute(f"CREATE TABLE {table} ({columns})")
+                for index_table, column in INDEXES:
+                    if index_table == table:
+                        self.cursor.execute(f"CREATE INDEX {table}_{column}_idx ON {table} ({column})")
+        self.connection.commit()
+
+    def generated_fonds(self) -> Dict[int, int]:
+        """Fonds IDs by size from earlier runs with the same options."""
+        self.cursor.execute("SELECT records, fonds_id, options FROM ric_benchmark_fonds")
+        options = json.dumps(self.options, sort_keys=True)
+        return {row[0]: row[1] for row in self.cursor.fetchall() if row[2] == options}
+
+    # -------------------- writing --------------------
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _insert(self, table: str, **values):
+        key = (table, tuple(values))
+        rows = self._pending.setdefault(key, [])
+        rows.append(tuple(values.values()))
+        if len(rows) >= INSERT_BATCH_SIZE:
+            self._flush(key)
+
+    def _flush(self, key=None):
+        for table, columns in ([key] if key else list(self._pending)):
+            rows = self._pending.pop((table, columns), [])
+            if rows:
+                placeholders = ', '.join([self.placeholder] * len(columns))
+                self.cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+    def _object(self, class_name: str, object_id: Optional[int] = None) -> int:
+        object_id = object_id or self._new_id()
+        stamp = datetime(2024, 1, 1) + timedelta(minutes=object_id % 500000)
+        self._insert('object', id=object_id, class_name=class_name, created_at=stamp, updated_at=stamp)
+        return object_id
+
+    def _start(self):
+        self.cursor.execute("SELECT MAX(id) FROM object")
+        self._next_id = max(self.cursor.fetchone()[0] or 0, 1000)
+
+    def _load_shared(self):
+        """Read back the shared rows a previous run wrote."""
+        self.cursor.execute("SELECT t.id, t.taxonomy_id FROM term t")
+        by_taxonomy = {}
+        for term_id, taxonomy_id in self.cursor.fetchall():
+            by_taxonomy.setdefault(taxonomy_id, []).append(term_id)
+        self.term_ids = {key: sorted(by_taxonomy.get(taxonomy_id, []))
+                         for key, (taxonomy_id, _) in TAXONOMIES.items()}
+        self.cursor.execute("SELECT id FROM actor WHERE id NOT IN (SELECT id FROM repository) ORDER BY id")
+        self.agent_ids = [row[0] for row in self.cursor.fetchall()]
+        self.cursor.execute("SELECT id FROM repository ORDER BY id LIMIT 1")
+        row = self.cursor.fetchone()
+        self.repository_id = row[0] if row else None
+        self.cursor.execute("SELECT id FROM spectrum_location ORDER BY id")
+        self.location_ids = [row[0] for row in self.cursor.fetchall()]
+
+    def _term(self, key: str, name: str) -> int:
+        term_id = self._object('QubitTerm')
+        self._insert('term', id=term_id, taxonomy_id=TAXONOMIES[key][0])
+        for culture in self.cultures:
+            label = name if culture == 'en' else f"{name} ({culture})"
+            self._insert('term_i18n', id=term_id, culture=culture, name=label)
+        self.term_ids.setdefault(key, []).append(term_id)
+        return term_id
+
+    def generate_shared(self):
+        """Write the taxonomies, terms, agents, repository, functions and locations once."""
+        self._start()
+        self._load_shared()
+        if self.repository_id is not None:
+            return
+        rng = random.Random(self.seed)
+
+        for key, (taxonomy_id, name) in TAXONOMIES.items():
+            self._object('QubitTaxonomy', taxonomy_id)
+            self._insert('taxonomy', id=taxonomy_id)
+            for culture in self.cultures:
+                self._insert('taxonomy_i18n', id=taxonomy_id, culture=culture, name=name)
+
+        for name in ('Fonds', 'Series', 'File', 'Item'):
+            self._term('levels', name)
+        for name in ('Person', 'Corporate body', 'Family'):
+            self._term('actor_types', name)
+        for name in ('Creation', 'Accumulation', 'Custody'):
+            self._term('event_types', name)
+        for name in ('Copyright', 'License', 'Statute', 'Policy'):
+            self._term('rights_basis', name)
+        self._term('copyright_status', 'Under copyright')
+        self._term('relation_types', 'is related to')
+        self._term('usage', 'Master')
+        self._term('function_types', 'Function')
+        for k in range(self.terms):
+            key = ('subjects', 'places', 'genres')[k % 3]
+            self._term(key, f"{key.capitalize()[:-1]} {k}")
+
+        self.repository_id = self._object('QubitRepository')
+        self._insert('repository', id=self.repository_id)
+        self._insert('actor', id=self.repository_id, entity_type_id=self.term_ids['actor_types'][1])
+        self._insert('actor_i18n', id=self.repository_id, culture='en',
+                     authorized_form_of_name='Benchmark Archive', history='Synthetic repository')
+        self._insert('contact_information', id=self._new_id(), actor_id=self.repository_id,
+                     street_address='1 Archive Street', postal_code='0001', country_code='ZA',
+                     email='archive@example.org', website='https://example.org')
+
+        # A few spellings per name so equivalence candidates have work to do
+        surnames = ('Smith', 'Naidoo', 'Botha', 'Dlamini', 'van der Merwe', 'Department of Education')
+        for k in range(self.agents):
+            agent_id = self._object('QubitActor')
+            name = f"{surnames[k % len(surnames)]} {k // (len(surnames) * 3)}"
+            self._insert('actor', id=agent_id, entity_type_id=rng.choice(self.term_ids['actor_types']))
+            for culture in self.cultures:
+                self._insert('actor_i18n', id=agent_id, culture=culture,
+                             authorized_form_of_name=name if culture == 'en' else f"{name} ({culture})",
+                             dates_of_existence='1900-1980' if k % 3 == 0 else None,
+                             history=f"History of agent {k}",
+                             legal_status='Statutory body' if k % 5 == 0 else None,
+                             functions=f"Functions {k}" if k % 4 == 0 else None,
+                             mandates=f"Mandate {k}" if k % 6 == 0 else None)
+            self.agent_ids.append(agent_id)
+
+        for k in range(max(1, self.agents // 100)):
+            function_id = self._object('QubitFunctionObject')
+            self._insert('function_object', id=function_id, type_id=self.term_ids['function_types'][0])
+            self._insert('function_object_i18n', id=function_id, culture='en',
+                         authorized_form_of_name=f"Function {k}", classification='F', dates='1900-',
+                         description=f"Function {k} description", history='History')
+
+        for k in range(20):
+            location_id = self._new_id()
+            self._insert('spectrum_location', id=location_id, location_name=f"Store {k}")
+            self.location_ids.append(location_id)
+
+        self._flush()
+        self.connection.commit()
+
+    def _tree(self, size: int) -> List[Optional[int]]:
+        """Parent position of each description, breadth first; position 0 is the fonds.
+
+        Levels are filled breadth children per node; once depth is reached the
+        remaining descriptions are spread evenly over the deepest level.
+        """
+        parents = [None]
+        level = [0]
+        depth = 1
+        while len(parents) < size:
+            remaining = size - len(parents)
+            per_node = self.breadth if depth < self.depth else -(-remaining // len(level))
+            next_level = []
+            for parent in level:
+                for _ in range(min(per_node, size - len(parents))):
+                    parents.append(parent)
+                    next_level.append(len(parents) - 1)
+                if len(parents) >= size:
+                    break
+            level = next_level
+            depth += 1
+        return parents
+
+    def generate_fonds(self, size: int) -> int:
+        """Add a fonds of size descriptions with their related rows and return its ID."""
+        self._start()
+        rng = random.Random(self.seed * 1000003 + size)
+        parents = self._tree(size)
+        children = [[] for _ in parents]
+        for position, parent in enumerate(parents):
+            if parent is not None:
+                children[parent].append(position)
+        ids = [self._new_id() for _ in parents]
+
+        self.cursor.execute("SELECT MAX(rgt) FROM information_object")
+        counter = (self.cursor.fetchone()[0] or 1) + 1
+        if counter == 2:
+            self._insert('information_object', id=1, parent_id=None, lft=1, rgt=2)
+            self._flush()
+
+        # Nested-set bounds from an iterative depth-first walk
+        lft, rgt, depth_of = [0] * size, [0] * size, [0] * size
+        stack = [(0, False)]
+        while stack:
+            position, done = stack.pop()
+            if done:
+                rgt[position] = counter
+                counter += 1
+                continue
+            lft[position] = counter
+            counter += 1
+            stack.append((position, True))
+            for child in reversed(children[position]):
+                depth_of[child] = depth_of[position] + 1
+                stack.append((child, False))
+
+        levels = self.term_ids['levels']
+        access_terms = self.term_ids['subjects'] + self.term_ids['places'] + self.term_ids['genres']
+        rate = self.rates
+        for position, record_id in enumerate(ids):
+            parent = parents[position]
+            is_leaf = not children[position]
+            level = levels[0] if parent is None else levels[3] if is_leaf else levels[min(depth_of[position], 2)]
+            path = f"{size}-{position}"
+            self._object('QubitInformationObject', record_id)
+            self._insert('information_object', id=record_id, parent_id=1 if parent is None else ids[parent],
+                         identifier=f"BENCH-{path}", level_of_description_id=level, source_culture='en',
+                         repository_id=self.repository_id, lft=lft[position], rgt=rgt[position])
+            for culture in self.cultures:
+                self._insert('information_object_i18n', id=record_id, culture=culture,
+                             title=f"Description {path}" + ('' if culture == 'en' else f" ({culture})"),
+                             scope_and_content=f"Scope and content of description {path}. " * 3,
+                             extent_and_medium='1 file', archival_history='Transferred 1990',
+                             acquisition='Transfer', finding_aids='Inventory',
+                             physical_characteristics='Good' if position % 2 else None,
+                             rules='DACS' if position % 4 == 0 else None)
+            self._related_rows(rng, record_id, ids, access_terms, rate)
+
+        self._flush()
+        mark = self.placeholder
+        self.cursor.execute(f"UPDATE information_object SET rgt = {mark} WHERE id = 1", (counter,))
+        self.cursor.execute(
+            f"DELETE FROM ric_benchmark_fonds WHERE records = {mark}", (size,))
+        self.cursor.execute(
+            f"INSERT INTO ric_benchmark_fonds (records, fonds_id, options, created_at) "
+            f"VALUES ({mark}, {mark}, {mark}, {mark})",
+            (size, ids[0], json.dumps(self.options, sort_keys=True), datetime.utcnow()))
+        self.connection.commit()
+        return ids[0]
+
+    def _related_rows(self, rng: random.Random, record_id: int, ids: List[int],
+                      access_terms: List[int], rate: Dict[str, float]):
+        day = date(2020, 1, 1) + timedelta(days=record_id % 1500)
+        stamp = datetime(2025, 1, 1) + timedelta(minutes=record_id % 500000)
+
+        if rng.random() < rate['events']:
+            event_id = self._object('QubitEvent')
+            self._insert('event', id=event_id, object_id=record_id, actor_id=rng.choice(self.agent_ids),
+                         start_date=date(1900 + record_id % 80, 1, 1), end_date=date(1950 + record_id % 60, 12, 31),
+                         type_id=rng.choice(self.term_ids['event_types']))
+            self._insert('event_i18n', id=event_id, culture='en', date='1900-2010',
+                         description='Created' if rng.random() < 0.5 else None)
+        if rng.random() < rate['access_points']:
+            for term_id in rng.sample(access_terms, min(len(access_terms), rng.randint(1, 3))):
+                self._insert('object_term_relation', id=self._new_id(), object_id=record_id, term_id=term_id)
+        if rng.random() < rate['digital_objects']:
+            digital_id = self._object('QubitDigitalObject')
+            self._insert('digital_object', id=digital_id, object_id=record_id,
+                         usage_id=self.term_ids['usage'][0], mime_type='image/jpeg',
+                         byte_size=100000 + record_id % 900000, name=f"scan_{record_id}.jpg")
+        if rng.random() < rate['related_materials']:
+            self._insert('relation', id=self._new_id(), subject_id=record_id, object_id=rng.choice(ids),
+                         type_id=self.term_ids['relation_types'][0])
+        if rng.random() < rate['rights']:
+            rights_id = self._object('QubitRights')
+            self._insert('rights', id=rights_id, start_date=day, basis_id=rng.choice(self.term_ids['rights_basis']),
+                         copyright_status_id=self.term_ids['copyright_status'][0], copyright_jurisdiction='ZA')
+            self._insert('rights_i18n', id=rights_id, culture='en', rights_note='Rights note',
+                         license_terms='CC BY 4.0')
+            self._insert('rights_record', id=self._new_id(), rights_id=rights_id, object_id=record_id)
+        if rng.random() < rate['condition_checks']:
+            self._insert('spectrum_condition_check', id=self._new_id(), object_id=record_id,
+                         condition_reference=f"CC-{record_id}", check_date=day, check_reason='Audit',
+                         checked_by='Conservator', overall_condition=rng.choice(('good', 'fair', 'poor')),
+                         condition_note='Stable', recommended_treatment='Surface clean',
+                         storage_recommendation='Acid-free box', photo_count=2, workflow_state='completed',
+                         material_type='paper', updated_at=stamp)
+        if rng.random() < rate['valuations']:
+            self._insert('spectrum_valuation', id=self._new_id(), object_id=record_id,
+                         valuation_reference=f"V-{record_id}", valuation_date=day, valuation_type='insurance',
+                         valuation_amount=round(rng.uniform(100, 100000), 2), valuation_currency='ZAR',
+                         valuer_name='Valuer', valuer_organization='Appraisers Ltd', is_current=1,
+                         workflow_state='approved', updated_at=stamp)
+        if rng.random() < rate['loans_out']:
+            self._insert('spectrum_loan_out', id=self._new_id(), object_id=record_id,
+                         loan_out_number=f"L-{record_id}", borrower_name='Museum', venue_name='Gallery',
+                         loan_out_date=day, loan_return_date=day + timedelta(days=180),
+                         insurance_value=round(rng.uniform(1000, 50000), 2), courier_required=1,
+                         loan_status='active', workflow_state='open', loan_note='Exhibition loan',
+                         updated_at=stamp)
+        if rng.random() < rate['movements']:
+            self._insert('spectrum_movement', id=self._new_id(), object_id=record_id,
+                         movement_reference=f"M-{record_id}", movement_date=day, movement_reason='Storage',
+                         handler_name='Handler', location_from=rng.choice(self.location_ids),
+                         location_to=rng.choice(self.location_ids), workflow_state='completed',
+                         updated_at=stamp)
+        if rng.random() < rate['grap_assets']:
+            cost = round(rng.uniform(100, 100000), 2)
+            self._insert('grap_heritage_asset', id=self._new_id(), object_id=record_id,
+                         recognition_status='recognised', measurement_basis='cost', acquisition_date=day,
+                         cost_of_acquisition=cost, current_carrying_amount=round(cost * 0.9, 2),
+                         accumulated_depreciation=round(cost * 0.1, 2), impairment_indicators=0,
+                         asset_class='heritage', insurance_required=1, insurance_value=round(cost * 1.2, 2),
+                         risk_level='low', useful_life_years=50, heritage_significance='high',
+                         updated_at=stamp)
+        elif rng.random() < rate['grap_data']:
+            value = round(rng.uniform(100, 100000), 2)
+            self._insert('spectrum_grap_data', id=self._new_id(), information_object_id=record_id,
+                         recognition_status='pending', measurement_basis='fair value',
+                         initial_recognition_date=day, initial_recognition_value=value,
+                         carrying_amount=value, asset_class='art', heritage_significance_rating='high',
+                         updated_at=stamp)
+
+
+# ==================== BENCHMARK RUNS ====================
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_extraction(db_config: Dict[str, str], fonds_id: int, options: Dict,
+                    stream_format: Optional[str] = None) -> Dict:
+    """Extract one fonds in this (fresh) process and return its timings.
+
+    With stream_format the fonds is streamed in that format to the null
+    device by stream_fonds, so the write phase is timed instead of building
+    the JSON-LD document in memory.
+    """
+    extractor = RiCExtractor(db_config, 'https://example.org/ric', 'benchmark', **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        extractor.connect()
+    try:
+        rss_before = _peak_rss_kb()
+        started = time.perf_counter()
+        if stream_format:
+            with open_output(os.devnull) as fp:
+                metadata = extractor.stream_fonds(fonds_id, fp, fmt=stream_format)
+            nodes = None
+        else:
+            document = extractor.extract_fonds(fonds_id)
+            metadata = document['_metadata']
+            nodes = len(document['@graph'])
+        seconds = time.perf_counter() - started
+        phases = list(extractor.phase_stats)
+        return {
+            'seconds': round(seconds, 3),
+            'db_seconds': round(sum(entry['db_seconds'] for entry in phases), 3),
+            'queries': sum(entry['queries'] for entry in phases),
+            'rows': sum(entry['rows'] for entry in phases),
+            'nodes': nodes,
+            'records_count': metadata['records_count'],
+            'relations_count': metadata['relations_count'],
+            'peak_rss_kb': _peak_rss_kb(),
+            'rss_growth_kb': _peak_rss_kb() - rss_before,
+            'phases': phases,
+        }
+    finally:
+        extractor.close()
+
+
+def benchmark_size(db_config: Dict[str, str], size: int, fonds_id: int, options: Dict,
+                   repeat: int = 1, stream_format: Optional[str] = None) -> Dict:
+    """Extract the fonds repeat times, each in a new process, and keep the fastest run."""
+    runs = []
+    context = multiprocessing.get_context('spawn')
+    for _ in range(max(1, repeat)):
+        with context.Pool(processes=1) as pool:
+            runs.append(pool.apply(_run_extraction, (db_config, fonds_id, options, stream_format)))
+    best = min(runs, key=lambda run: run['seconds'])
+    best.update({
+        'size': size,
+        'fonds_id': fonds_id,
+        'runs': len(runs),
+        'us_per_record': round(best['seconds'] / max(1, best['records_count']) * 1e6, 1),
+    })
+    return best
+
+
+def find_regressions(results: List[Dict], baseline: Dict, max_regression: float) -> List[str]:
+    """Compare results with a previous report.
+
+    Wall time more than max_regression percent above the baseline counts as
+    a regression, as does any increase in a phase's query count, which does
+    not depend on machine load.
+    """
+    previous = {entry['size']: entry for entry in baseline.get('results', [])}
+    problems = []
+    for entry in results:
+        before = previous.get(entry['size'])
+        if not before:
+            continue
+        limit = before['seconds'] * (1 + max_regression / 100)
+        if entry['seconds'] > limit:
+            problems.append(f"{entry['size']} records: {entry['seconds']}s, baseline {before['seconds']}s "
+                            f"(+{(entry['seconds'] / before['seconds'] - 1) * 100:.0f}%)")
+        before_queries = {phase['phase']: phase['queries'] for phase in before.get('phases', [])}
+        for phase in entry['phases']:
+            was = before_queries.get(phase['phase'])
+            if was is not None and phase['queries'] > was:
+                problems.append(f"{entry['size']} records: phase {phase['phase']} ran "
+                                f"{phase['queries']} queries, baseline {was}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the RiC extractor against a synthetic AtoM dataset')
+    parser.add_argument('--database', type=str, default=os.environ.get('RIC_BENCH_DB_NAME', 'ric_bench'),
+                        help='Scratch database for the synthetic dataset (never a real AtoM database)')
+    parser.add_argument('--sizes', type=str, default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma-separated fonds sizes in descriptions')
+    parser.add_argument('--depth', type=int, default=4, help='Levels in each fonds tree, fonds included')
+    parser.add_argument('--breadth', type=int, default=10,
+                        help='Children per description above the deepest level')
+    parser.add_argument('--agents', type=int, default=1000, help='Agents shared by all fonds')
+    parser.add_argument('--terms', type=int, default=500, help='Subject, place and genre terms')
+    parser.add_argument('--rate', action='append', default=[], metavar='KIND=SHARE',
+                        help='Share of descriptions with related rows of a kind, e.g. valuations=0.5 '
+                             f"(kinds: {', '.join(DEFAULT_RATES)})")
+    parser.add_argument('--cultures', type=str, default='en',
+                        help='Cultures to write i18n rows for; the extractor gets them too when not just en')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the dataset')
+    parser.add_argument('--recreate', action='store_true',
+                        help='Drop and recreate the benchmark tables before generating')
+    parser.add_argument('--generate-only', action='store_true', help='Build the dataset without extracting')
+    parser.add_argument('--repeat', type=int, default=1, help='Extractions per size; the fastest is reported')
+    parser.add_argument('--hierarchy', choices=RiCExtractor.HIERARCHY_STRATEGIES, default='auto')
+    parser.add_argument('--chunk-size', type=int, default=RiCExtractor.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--fetch-batch-size', type=int, default=RiCExtractor.DEFAULT_FETCH_BATCH_SIZE)
+    parser.add_argument('--temp-table-threshold', type=int, default=RiCExtractor.DEFAULT_TEMP_TABLE_THRESHOLD)
+    parser.add_argument('--phase-workers', type=int, default=1)
+    parser.add_argument('--profile', action='store_true',
+                        help='Trace per-phase bytes and peak memory (slows extraction down)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Time stream_fonds writing --format to the null device instead of extract_fonds')
+    parser.add_argument('--format', choices=RiCExtractor.OUTPUT_FORMATS, default='jsonld',
+                        help='Serialisation written with --stream')
+    parser.add_argument('--output', '-o', type=str, help='Write the report as JSON')
+    parser.add_argument('--baseline', type=str, help='Earlier --output report to compare against')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='Percent slowdown against --baseline that fails the run')
+    args = parser.parse_args()
+
+    sizes = sorted({int(size) for size in args.sizes.split(',') if size.strip()})
+    rates = {}
+    for item in args.rate:
+        kind, _, share = item.partition('=')
+        if kind not in DEFAULT_RATES:
+            parser.error(f"Unknown --rate kind: {kind}")
+        rates[kind] = float(share)
+    cultures = [c.strip() for c in args.cultures.split(',') if c.strip()]
+
+    # Buffered and streamed runs time different phases, so only compare like with like
+    write = {'stream': args.stream, 'format': args.format if args.stream else 'jsonld'}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        baseline_write = baseline.get('write', {'stream': False, 'format': 'jsonld'})
+        if baseline_write != write:
+            parser.error(f"--baseline {args.baseline} was run with {baseline_write}, not {write}")
+
+    db_config = {
+        'host': os.environ.get('ATOM_DB_HOST', 'localhost'),
+        'user': os.environ.get('ATOM_DB_USER', 'root'),
+        'password': os.environ.get('ATOM_DB_PASSWORD', 'Merlot@123'),
+        'database': args.database,
+    }
+
+    if mysql is None:
+        sys.exit(MISSING_DRIVER)
+    connection = mysql.connector.connect(**db_config)
+    try:
+        dataset = SyntheticDataset(connection, seed=args.seed, depth=args.depth, breadth=args.breadth,
+                                   agents=args.agents, terms=args.terms, rates=rates, cultures=cultures)
+        dataset.create_schema(recreate=args.recreate)
+        print(f"Preparing dataset in {args.database}")
+        dataset.generate_shared()
+        fonds = dataset.generated_fonds()
+        for size in sizes:
+            if size in fonds:
+                print(f"  {size} records: reusing fonds {fonds[size]}")
+                continue
+            started = time.perf_counter()
+            fonds[size] = dataset.generate_fonds(size)
+            print(f"  {size} records: generated fonds {fonds[size]} ({time.perf_counter() - started:.1f}s)")
+    finally:
+        connection.close()
+
+    if args.generate_only:
+        return
+
+    options = {
+        'chunk_size': args.chunk_size,
+        'temp_table_threshold': args.temp_table_threshold,
+        'hierarchy_strategy': args.hierarchy,
+        'fetch_batch_size': args.fetch_batch_size,
+        'phase_workers': args.phase_workers,
+        'profile': args.profile,
+        'cultures': cultures if cultures != ['en'] else None,
+    }
+
+    results = []
+    mode = f"streaming {write['format']}" if args.stream else 'building JSON-LD'
+    print(f"\nExtracting, {mode} ({args.repeat} run(s) per size)\n")
+    print(f"{'Records':>9} {'Seconds':>9} {'DB s':>8} {'Queries':>8} {'Rows':>10} "
+          f"{'Peak RSS MB':>12} {'us/record':>10}")
+    print("-" * 72)
+    for size in sizes:
+        entry = benchmark_size(db_config, size, fonds[size], options, args.repeat,
+                               args.format if args.stream else None)
+        results.append(entry)
+        print(f"{size:>9} {entry['seconds']:>9.3f} {entry['db_seconds']:>8.3f} {entry['queries']:>8} "
+              f"{entry['rows']:>10} {entry['peak_rss_kb'] / 1024:>12.1f} {entry['us_per_record']:>10}")
+
+    for entry in results:
+        print(f"\nPhases, {entry['size']} records:\n")
+        print(format_profile(entry['phases']))
+
+    report = {
+        'created': datetime.utcnow().isoformat() + 'Z',
+        'dataset': dataset.options,
+        'extractor_options': options,
+        'write': write,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport: {args.output}")
+
+    if baseline is not None:
+        problems = find_regressions(results, baseline, args.max_regression)
+        if problems:
+            print(f"\nRegressions against {args.baseline}:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (max {args.max_regression:g}% slower)")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,25 +14,74 @@ New Entities/Extensions:
 
 Usage:
     python ric_extractor_v5.py --list-fonds
+    python ric_extractor_v5.py --list-fonds --list-standalone --json
     python ric_extractor_v5.py --fonds-id 123 --output output.jsonld --pretty
+    python ric_extractor_v5.py --fonds-id 123 --output output.jsonld --stream
+    python ric_extractor_v5.py --fonds-id 123 --chunk-size 500 --verbose
+    python ric_extractor_v5.py --fonds-id 123 --phase-workers 4 --profile
+    ATOM_DB_REPLICA_HOST=db-replica python ric_extractor_v5.py --all-fonds --max-replica-lag 60 --query-timeout 900
+    python ric_extractor_v5.py --fonds-id 123 --canonical --stream --output fonds_123.jsonld
+    python ric_extractor_v5.py --fonds-id 123 --watermark-file marks.json --update-watermark
+    python ric_extractor_v5.py --all-fonds --include-standalone --workers 8 --output-dir /tmp/ric
+    python ric_extractor_v5.py --fonds-id 123 --profile --metrics-file /var/lib/node_exporter/ric.prom
+    python ric_extractor_v5.py --fonds-id 123 --format nq --output fonds_123.nq.gz
+    python ric_extractor_v5.py --fonds-id 123 --format nt --gzip --output - | tdb2.tdbloader --loc DB -- -
+    python ric_extractor_v5.py --all-fonds --output-dir /tmp/ric --fingerprint-file /var/lib/ric/fingerprints.json
+    python ric_extractor_v5.py --fonds-id 123 --cultures en,af --output fonds_123.jsonld
+    python ric_extractor_v5.py --fonds-id 123 --term-cache /var/cache/ric/terms.json
+    python ric_extractor_v5.py --all-fonds --output-dir /tmp/ric --journal /tmp/ric/export.journal --retries 5
+    python ric_extractor_v5.py --shard-by repository --format nq --workers 4 --output-dir /srv/ric/shards
+    python ric_extractor_v5.py --shard-by size --shards 16 --output-dir /srv/ric/shards
+    python ric_extractor_v5.py --fonds-id 123 --benchmark-json
+    python ric_extractor_v5.py --all-fonds --output-dir /tmp/ric --json-backend orjson
 """
 
+import gzip
+import hashlib
+import io
 import json
 import os
+import re
 import sys
+import time
 import argparse
+import bisect
+import copy
+import difflib
+import heapq
+import math
+import multiprocessing
+import tracemalloc
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from multiprocessing.managers import BaseManager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from collections import defaultdict
 from decimal import Decimal
 
+MISSING_DRIVER = "Error: mysql-connector-python required. Install with:\n  pip install mysql-connector-python"
+
 try:
     import mysql.connector
     from mysql.connector import Error
 except ImportError:
-    print("Error: mysql-connector-python required. Install with:")
-    print("  pip install mysql-connector-python")
-    sys.exit(1)
+    # The serialisation, fingerprint and journal code runs without it; connecting does not
+    mysql = None
+    
+    class Error(Exception):
+        """Stands in for mysql.connector.Error when the driver is not installed."""
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Connection factory shared with the other AHG Python tools (ahgCorePlugin)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                '..', '..', 'ahgCorePlugin', 'lib', 'python'))
+import ahg_db
+from ahg_db import ConnectionFactory, ConnectionPool, replica_config_from_env
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -43,6 +92,1224 @@ class DecimalEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+# JSON encoders for output. stdlib is the default because compact orjson output
+# differs from json.dump (no spaces after separators); 'auto' picks orjson when installed
+JSON_BACKENDS = ('auto', 'orjson', 'stdlib')
+
+
+def _decimal_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def resolve_json_backend(indent: Optional[int] = None, backend: str = 'stdlib') -> str:
+    """Name the encoder json_encoder would use: 'orjson' or 'stdlib'.
+    
+    orjson only indents by 2, so other indents fall back to the stdlib
+    encoder even when orjson is asked for.
+    """
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {backend}")
+    if backend == 'orjson' and orjson is None:
+        raise RuntimeError("orjson is not installed (pip install orjson)")
+    if backend != 'stdlib' and orjson is not None and indent in (None, 2):
+        return 'orjson'
+    return 'stdlib'
+
+
+def json_encoder(indent: Optional[int] = None, backend: str = 'stdlib'):
+    """Return a function encoding an object to JSON text, writing non-ASCII as is and Decimals as floats.
+    
+    Indented output is the same from both encoders; compact orjson output
+    leaves out the spaces after ',' and ':'.
+    """
+    if resolve_json_backend(indent, backend) == 'orjson':
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return lambda obj: orjson.dumps(obj, default=_decimal_default, option=option).decode('utf-8')
+    return DecimalEncoder(indent=indent, ensure_ascii=False).encode
+
+
+def dump_json(obj, fp, indent: Optional[int] = None, backend: str = 'stdlib'):
+    """json.dump() obj to fp with the chosen backend; the stdlib one writes in chunks, as json.dump does."""
+    if resolve_json_backend(indent, backend) == 'stdlib':
+        json.dump(obj, fp, indent=indent, ensure_ascii=False, cls=DecimalEncoder)
+    else:
+        fp.write(json_encoder(indent, backend)(obj))
+
+
+def benchmark_json_backends(document: Dict, repeat: int = 3) -> List[Dict]:
+    """Time encoding document with each installed backend, compact and indented; best of repeat runs."""
+    results = []
+    for backend in ('stdlib', 'orjson'):
+        if backend == 'orjson' and orjson is None:
+            continue
+        for indent in (None, 2):
+            encode = json_encoder(indent, backend)
+            best = None
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                text = encode(document)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            size = len(text.encode('utf-8'))
+            results.append({
+                'backend': backend,
+                'indent': indent,
+                'seconds': round(best, 4),
+                'bytes': size,
+                'mb_per_second': round(size / best / 1e6, 1) if best else None,
+            })
+    return results
+
+
+def _read_state_file(path: str) -> Dict[str, str]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_state_file(path: str, values: Dict[str, Optional[str]]):
+    """Merge values into a JSON state file keyed by fonds ID (None removes the key)."""
+    state = _read_state_file(path)
+    for key, value in values.items():
+        if value is None:
+            state.pop(key, None)
+        else:
+            state[key] = value
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def read_watermarks(path: str) -> Dict[str, str]:
+    """Return all persisted 'changed since' timestamps, keyed by fonds ID string."""
+    return _read_state_file(path)
+
+
+def read_watermark(path: str, fonds_id: int) -> Optional[str]:
+    """Return the persisted 'changed since' timestamp for a fonds, if any."""
+    return read_watermarks(path).get(str(fonds_id))
+
+
+def write_watermark(path: str, fonds_id, value: str):
+    """Persist the watermark for a fonds, or each fonds in a list (atomic replace of the JSON file)."""
+    ids = fonds_id if isinstance(fonds_id, (list, tuple, set)) else [fonds_id]
+    _write_state_file(path, {str(one_id): value for one_id in ids})
+
+
+def read_fingerprints(path: str) -> Dict[str, str]:
+    """Return the graph fingerprints recorded at the last successful load, keyed by fonds ID string."""
+    return _read_state_file(path)
+
+
+def write_fingerprints(path: str, fingerprints: Dict[int, Optional[str]]):
+    """Record graph fingerprints by fonds ID; None forgets the fonds so it is reloaded next time."""
+    _write_state_file(path, {str(fonds_id): value for fonds_id, value in fingerprints.items()})
+
+
+def pending_fingerprints_path(path: str) -> str:
+    """Return the file holding fingerprints of extracted fonds whose load is not yet confirmed."""
+    return f"{path}.pending"
+
+
+def commit_fingerprints(path: str, fonds_ids) -> Dict[str, str]:
+    """Move the pending fingerprints of fonds_ids into the fingerprint file, once they are loaded.
+
+    Extraction only records pending fingerprints, so a fonds extracted but
+    never loaded (failed upload, crash in between) still differs next run.
+    Returns the fingerprints committed.
+    """
+    pending_path = pending_fingerprints_path(path)
+    pending = read_fingerprints(pending_path)
+    committed = {str(fonds_id): pending[str(fonds_id)] for fonds_id in fonds_ids if str(fonds_id) in pending}
+    if committed:
+        write_fingerprints(path, committed)
+        write_fingerprints(pending_path, {fonds_id: None for fonds_id in committed})
+    return committed
+
+
+# Phase profile fields: (key, table heading, column width, number format)
+PROFILE_COLUMNS = [
+    ('phase', 'Phase', 24, ''),
+    ('seconds', 'Seconds', 9, '.3f'),
+    ('db_seconds', 'DB s', 8, '.3f'),
+    ('queries', 'Queries', 8, 'd'),
+    ('rows', 'Rows', 9, 'd'),
+    ('bytes', 'Bytes', 11, 'd'),
+    ('peak_memory_kb', 'Peak KiB', 9, 'd'),
+]
+
+
+def merge_phase_stats(phase_lists: List[List[Dict]]) -> List[Dict]:
+    """Sum per-phase profile entries from several extractions, keeping phase order."""
+    merged = {}
+    for phases in phase_lists:
+        for entry in phases:
+            total = merged.setdefault(entry['phase'], {'phase': entry['phase']})
+            for key, value in entry.items():
+                if key == 'phase':
+                    continue
+                if key == 'peak_memory_kb':
+                    total[key] = max(total.get(key, 0), value)
+                elif isinstance(value, float):
+                    total[key] = round(total.get(key, 0) + value, 4)
+                else:
+                    total[key] = total.get(key, 0) + value
+    return list(merged.values())
+
+
+def format_profile(phases: List[Dict]) -> str:
+    """Render phase profile entries as a fixed-width table."""
+    header = [f"{title:<{width}}" if key == 'phase' else f"{title:>{width}}"
+              for key, title, width, fmt in PROFILE_COLUMNS]
+    lines = [' '.join(header), '-' * len(' '.join(header))]
+    for entry in phases:
+        cells = []
+        for key, title, width, fmt in PROFILE_COLUMNS:
+            value = entry.get(key)
+            if key == 'phase':
+                cells.append(f"{value:<{width}}")
+            elif value is None:
+                cells.append(f"{'-':>{width}}")
+            else:
+                cells.append(f"{value:>{width}{fmt}}")
+        lines.append(' '.join(cells))
+    return '\n'.join(lines)
+
+
+def write_prometheus_textfile(path: str, phases: List[Dict], totals: Dict[str, float]):
+    """Write extraction metrics in the node_exporter textfile collector format.
+    
+    The file is replaced atomically so the collector never reads a partial scrape.
+    """
+    lines = []
+    for name, value in totals.items():
+        lines.append(f"# TYPE ric_extract_{name} gauge")
+        lines.append(f"ric_extract_{name} {value}")
+    for key, _, _, _ in PROFILE_COLUMNS[1:]:
+        if not any(key in entry for entry in phases):
+            continue
+        lines.append(f"# TYPE ric_extract_phase_{key} gauge")
+        for entry in phases:
+            if key in entry:
+                lines.append(f'ric_extract_phase_{key}{{phase="{entry["phase"]}"}} {entry[key]}')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
+
+
+class RelationIndex:
+    """Relations keyed by subject, held as packed integer codes.
+    
+    Every URI is interned to an integer once and each predicate gets a small
+    code; a subject keeps one array of (predicate << 32 | target) codes in the
+    order relations were added. get() and pop() expand a subject back to
+    predicate -> ordered unique targets. Per-predicate counts are kept as
+    relations are added and include repeated relations.
+    """
+    
+    __slots__ = ('_uri_ids', '_uris', '_predicate_codes', '_predicates',
+                 '_subjects', 'counts', '_total')
+    
+    def __init__(self):
+        self._uri_ids = {}
+        self._uris = []
+        self._predicate_codes = {}
+        self._predicates = []
+        self._subjects = {}
+        self.counts = {}
+        self._total = 0
+    
+    def _intern(self, uri: str) -> int:
+        uri_id = self._uri_ids.get(uri)
+        if uri_id is None:
+            uri_id = self._uri_ids[uri] = len(self._uris)
+            self._uris.append(uri)
+        return uri_id
+    
+    def _predicate_code(self, predicate: str) -> int:
+        code = self._predicate_codes.get(predicate)
+        if code is None:
+            code = self._predicate_codes[predicate] = len(self._predicates)
+            self._predicates.append(predicate)
+        return code
+    
+    def add(self, subject: str, predicate: str, target: str):
+        code = self._predicate_code(predicate)
+        subject_id = self._intern(subject)
+        pairs = self._subjects.get(subject_id)
+        if pairs is None:
+            pairs = self._subjects[subject_id] = array('Q')
+        pairs.append(code << 32 | self._intern(target))
+        self.counts[predicate] = self.counts.get(predicate, 0) + 1
+        self._total += 1
+    
+    def merge(self, other: 'RelationIndex'):
+        """Append other's relations as if each had been added after all of this index's own."""
+        codes = [self._predicate_code(predicate) for predicate in other._predicates]
+        for other_subject, other_pairs in other._subjects.items():
+            subject_id = self._intern(other._uris[other_subject])
+            pairs = self._subjects.get(subject_id)
+            if pairs is None:
+                pairs = self._subjects[subject_id] = array('Q')
+            for packed in other_pairs:
+                pairs.append(codes[packed >> 32] << 32 | self._intern(other._uris[packed & 0xFFFFFFFF]))
+        for predicate, count in other.counts.items():
+            self.counts[predicate] = self.counts.get(predicate, 0) + count
+        self._total += other._total
+    
+    def _expand(self, pairs) -> Dict[str, Dict[str, None]]:
+        predicates = {}
+        if pairs:
+            for packed in dict.fromkeys(pairs):
+                targets = predicates.setdefault(self._predicates[packed >> 32], {})
+                targets[self._uris[packed & 0xFFFFFFFF]] = None
+        return predicates
+    
+    def get(self, subject: str) -> Dict[str, Dict[str, None]]:
+        return self._expand(self._subjects.get(self._uri_ids.get(subject)))
+    
+    def pop(self, subject: str) -> Dict[str, Dict[str, None]]:
+        return self._expand(self._subjects.pop(self._uri_ids.get(subject), None))
+    
+    def __len__(self) -> int:
+        return self._total
+
+
+class Row:
+    """Read-only view of a driver tuple row by column name.
+    
+    All rows of one result set share a single column index, which keeps
+    streamed rows far smaller than dictionary-cursor rows.
+    """
+    
+    __slots__ = ('_values', '_columns')
+    
+    def __init__(self, values: tuple, columns: Dict[str, int]):
+        self._values = values
+        self._columns = columns
+    
+    def __getitem__(self, key: str):
+        return self._values[self._columns[key]]
+    
+    def get(self, key: str, default=None):
+        index = self._columns.get(key)
+        return default if index is None else self._values[index]
+
+
+class RecordInfo:
+    """Extraction-only fields of a record, kept out of its JSON-LD node."""
+    
+    __slots__ = ('parent_id', 'repository_id', 'lft', 'rgt', 'rules_text', 'level')
+    
+    def __init__(self, parent_id, repository_id, lft, rgt, rules_text, level):
+        self.parent_id = parent_id
+        self.repository_id = repository_id
+        self.lft = lft
+        self.rgt = rgt
+        self.rules_text = rules_text
+        self.level = level
+
+
+class AgentInfo:
+    """Extraction-only fields of an agent, kept out of its JSON-LD node."""
+    
+    __slots__ = ('name', 'mandates_text', 'functions_text')
+    
+    def __init__(self, name, mandates_text, functions_text):
+        self.name = name
+        self.mandates_text = mandates_text
+        self.functions_text = functions_text
+
+
+class ActivityInfo:
+    """Extraction-only fields of an activity, kept out of its JSON-LD node."""
+    
+    __slots__ = ('event_type', 'record_id', 'agent_id')
+    
+    def __init__(self, event_type, record_id, agent_id):
+        self.event_type = event_type
+        self.record_id = record_id
+        self.agent_id = agent_id
+
+
+def _first_of(row, columns: Tuple[str, ...]):
+    """Value of the first truthy column, else the last column's value (as `a or b`)."""
+    value = None
+    for column in columns:
+        value = row[column]
+        if value:
+            break
+    return value
+
+
+class DateRange:
+    """rico:DateRange built from begin (and end) columns; None when neither is set."""
+    
+    __slots__ = ('begin', 'end', 'expressed', 'columns')
+    
+    def __init__(self, begin, end=None, expressed: bool = False):
+        self.begin = begin if isinstance(begin, tuple) else (begin,)
+        self.end = end if end is None or isinstance(end, tuple) else (end,)
+        self.expressed = expressed
+        self.columns = self.begin + (self.end or ())
+    
+    def __call__(self, row):
+        start = _first_of(row, self.begin)
+        finish = _first_of(row, self.end) if self.end else None
+        if not (start or finish):
+            return None
+        value = {'@type': 'rico:DateRange', 'rico:beginningDate': str(start) if start else None}
+        if self.end:
+            value['rico:endDate'] = str(finish) if finish else None
+        if self.expressed:
+            value['rico:expressedDate'] = str(start)
+        return value
+
+
+class Money:
+    """MonetaryAmount in the ns vocabulary; currency from the first set column, else default."""
+    
+    __slots__ = ('amount', 'currency', 'default', 'ns', 'columns')
+    
+    def __init__(self, amount: str, currency: Tuple[str, ...] = (), default: str = 'ZAR',
+                 ns: str = 'spectrum'):
+        self.amount = amount
+        self.currency = currency
+        self.default = default
+        self.ns = ns
+        self.columns = (amount,) + currency
+    
+    def __call__(self, row):
+        if not row[self.amount]:
+            return None
+        return {
+            '@type': f'{self.ns}:MonetaryAmount',
+            f'{self.ns}:amount': float(row[self.amount]),
+            f'{self.ns}:currency': _first_of(row, self.currency) or self.default,
+        }
+
+
+class Joined:
+    """Set columns formatted by their template, joined by separator (or kept as a list)."""
+    
+    __slots__ = ('parts', 'separator', 'as_list', 'columns')
+    
+    def __init__(self, parts: List[Tuple[str, str]], separator: str = ' | ', as_list: bool = False):
+        self.parts = parts
+        self.separator = separator
+        self.as_list = as_list
+        self.columns = tuple(column for _, column in parts)
+    
+    def __call__(self, row):
+        values = [template.format(row[column]) for template, column in self.parts if row[column]]
+        if not values:
+            return None
+        return values if self.as_list else self.separator.join(values)
+
+
+class Struct:
+    """Nested node of node_type, present when the trigger column is set."""
+    
+    __slots__ = ('node_type', 'trigger', 'fields', 'columns')
+    
+    def __init__(self, node_type: str, trigger: str, fields: Dict[str, str]):
+        self.node_type = node_type
+        self.trigger = trigger
+        self.fields = fields
+        self.columns = tuple(fields.values())
+    
+    def __call__(self, row):
+        if not row[self.trigger]:
+            return None
+        value = {'@type': self.node_type}
+        for predicate, column in self.fields.items():
+            value[predicate] = row[column]
+        return value
+
+
+class Field:
+    """One predicate of a mapped node.
+    
+    source is a column name, a tuple of columns (first truthy wins, as
+    `a or b`), or a builder such as DateRange or Money. keep is 'truthy'
+    (falsy values are left out) or 'set' (only None is left out); coerce,
+    e.g. str for dates, float for amounts, bool for flags, applies to kept
+    values.
+    """
+    
+    __slots__ = ('predicate', 'source', 'coerce', 'keep')
+    
+    def __init__(self, predicate: str, source, coerce=None, keep: str = 'truthy'):
+        self.predicate = predicate
+        self.source = source
+        self.coerce = coerce
+        self.keep = keep
+    
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        if isinstance(self.source, str):
+            return (self.source,)
+        if isinstance(self.source, tuple):
+            return self.source
+        return self.source.columns
+    
+    def value(self, row):
+        source = self.source
+        if isinstance(source, str):
+            value = row[source]
+        elif isinstance(source, tuple):
+            value = _first_of(row, source)
+        else:
+            value = source(row)
+        if value is None or (self.keep == 'truthy' and not value):
+            return None
+        return self.coerce(value) if self.coerce else value
+
+
+class TableMapping:
+    """Declarative mapping of one per-record table onto RiC nodes.
+    
+    Each row whose record_column names an extracted record becomes a node
+    in the extractor cache named by cache, keyed key_prefix + row id, with
+    URI mint_uri(uri_type, uri_prefix + row id). Nodes carry node_type,
+    the constant properties, a record_predicate link to the record and
+    the mapped fields in order; record_relation, if given, also links the
+    record to the node. A fallback mapping skips records that an earlier
+    mapping into the same cache already covered. The SELECT list is
+    derived from the fields; computed maps column aliases to SQL
+    expressions over joins. order_by ('column [DESC]') orders the rows
+    of each chunk; sort_key orders the staged nodes across chunks the
+    same way. Executed by RiCExtractor._extract_mapped.
+    """
+    
+    __slots__ = ('label', 'phase', 'table', 'record_column', 'cache', 'key_prefix',
+                 'uri_type', 'uri_prefix', 'node_type', 'constants', 'record_predicate',
+                 'record_relation', 'fields', 'computed', 'joins', 'order_by', 'order_column',
+                 'descending', 'fallback', 'query')
+    
+    def __init__(self, label: str, phase: str, table: str, cache: str, uri_type: str,
+                 uri_prefix: str, node_type, record_predicate: str, fields: List[Field],
+                 record_column: str = 'object_id', key_prefix: str = '',
+                 constants: Optional[Dict] = None, record_relation: Optional[str] = None,
+                 computed: Optional[Dict[str, str]] = None, joins: str = '',
+                 order_by: Optional[str] = None, fallback: bool = False):
+        self.label = label
+        self.phase = phase
+        self.table = table
+        self.record_column = record_column
+        self.cache = cache
+        self.key_prefix = key_prefix
+        self.uri_type = uri_type
+        self.uri_prefix = uri_prefix
+        self.node_type = node_type
+        self.constants = constants or {}
+        self.record_predicate = record_predicate
+        self.record_relation = record_relation
+        self.fields = fields
+        self.computed = computed or {}
+        self.joins = joins
+        self.order_by = order_by
+        order_column, _, direction = (order_by or '').partition(' ')
+        self.order_column = order_column or None
+        self.descending = direction.strip().upper() == 'DESC'
+        self.fallback = fallback
+        self.query = self._build_query()
+    
+    def _build_query(self) -> str:
+        columns = ['id', self.record_column]
+        for field in self.fields:
+            columns.extend(c for c in field.columns if c not in columns)
+        if self.order_column and self.order_column not in columns:
+            columns.append(self.order_column)
+        select = ', '.join(
+            f"{self.computed[c]} AS {c}" if c in self.computed else f"t.{c}" for c in columns
+        )
+        query = (f"SELECT {select} FROM {self.table} t {self.joins} "
+                 f"WHERE t.{self.record_column} IN ({{ids}})")
+        if self.order_by:
+            query += f" ORDER BY t.{self.order_by}"
+        return query
+    
+    def sort_key(self, row):
+        """The row's order_by value, comparable across rows with NULL lowest as in MySQL."""
+        if not self.order_column:
+            return None
+        value = row[self.order_column]
+        return (False, 0) if value is None else (True, value)
+    
+    def node(self, extractor: 'RiCExtractor', row, record: Dict) -> Dict:
+        node = {
+            '@id': extractor.mint_uri(self.uri_type, f"{self.uri_prefix}{row['id']}"),
+            '@type': list(self.node_type) if isinstance(self.node_type, list) else self.node_type,
+        }
+        node.update(self.constants)
+        node[self.record_predicate] = {'@id': record['@id']}
+        for field in self.fields:
+            value = field.value(row)
+            if value is not None:
+                node[field.predicate] = value
+        return node
+
+
+class TermDictionary:
+    """Term and taxonomy names ('en' culture) by ID, loaded once per run.
+    
+    Extraction queries select term IDs and resolve names here instead of
+    joining term_i18n/taxonomy_i18n per row. Only terms and taxonomies with
+    an 'en' i18n row are present, matching the inner joins they replace.
+    version combines the count and newest object.updated_at of terms and
+    taxonomies, so a copy saved with save() is reused until one is added,
+    edited or deleted.
+    """
+    
+    __slots__ = ('terms', 'taxonomies', 'version')
+    
+    CULTURE = 'en'
+    
+    VERSION_QUERY = """
+        SELECT
+            (SELECT COUNT(*) FROM term) AS term_count,
+            (SELECT MAX(o.updated_at) FROM term t JOIN object o ON o.id = t.id) AS term_updated,
+            (SELECT COUNT(*) FROM taxonomy) AS taxonomy_count,
+            (SELECT MAX(o.updated_at) FROM taxonomy x JOIN object o ON o.id = x.id) AS taxonomy_updated
+    """
+    
+    def __init__(self, terms: Dict[int, Tuple[Optional[str], int]],
+                 taxonomies: Dict[int, Optional[str]], version: str):
+        self.terms = terms
+        self.taxonomies = taxonomies
+        self.version = version
+    
+    def name(self, term_id) -> Optional[str]:
+        entry = self.terms.get(term_id)
+        return entry[0] if entry else None
+    
+    def lookup(self, term_id) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """(term name, taxonomy name), or None when the term or its taxonomy has no 'en' label."""
+        entry = self.terms.get(term_id)
+        if entry is None or entry[1] not in self.taxonomies:
+            return None
+        return entry[0], self.taxonomies[entry[1]]
+    
+    @classmethod
+    def current_version(cls, cursor) -> str:
+        cursor.execute(cls.VERSION_QUERY)
+        row = cursor.fetchone()
+        return '|'.join(str(row[key]) for key in
+                        ('term_count', 'term_updated', 'taxonomy_count', 'taxonomy_updated'))
+    
+    @classmethod
+    def load(cls, cursor, path: Optional[str] = None) -> 'TermDictionary':
+        """Read the dictionary from path when its version is current, else from the database (and save it)."""
+        version = cls.current_version(cursor)
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == version and data.get('culture') == cls.CULTURE:
+                    return cls(
+                        {int(key): tuple(value) for key, value in data['terms'].items()},
+                        {int(key): value for key, value in data['taxonomies'].items()},
+                        version,
+                    )
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        
+        cursor.execute("""
+            SELECT t.id, t.taxonomy_id, ti.name
+            FROM term t
+            JOIN term_i18n ti ON t.id = ti.id AND ti.culture = %s
+        """, (cls.CULTURE,))
+        terms = {row['id']: (row['name'], row['taxonomy_id']) for row in cursor.fetchall()}
+        cursor.execute("""
+            SELECT x.id, xi.name
+            FROM taxonomy x
+            JOIN taxonomy_i18n xi ON x.id = xi.id AND xi.culture = %s
+        """, (cls.CULTURE,))
+        taxonomies = {row['id']: row['name'] for row in cursor.fetchall()}
+        
+        dictionary = cls(terms, taxonomies, version)
+        if path:
+            dictionary.save(path)
+        return dictionary
+    
+    def save(self, path: str):
+        """Write the dictionary as JSON (atomic replace)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.version,
+                'culture': self.CULTURE,
+                'terms': {str(key): list(value) for key, value in self.terms.items()},
+                'taxonomies': {str(key): value for key, value in self.taxonomies.items()},
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class AgentMatcher:
+    """Clusters agent names that probably denote the same entity, without comparing every pair.
+    
+    Names are normalised (case, punctuation, common abbreviations) and each
+    agent is put in a few blocks: its sorted token set, and the Soundex code
+    of each of its longest tokens. Only agents sharing a block are compared,
+    and each only with its WINDOW neighbours in the block's sorted order, so
+    a block of a very common name costs linear, not quadratic, time. Two
+    clusters merge only when every pair of their members scores THRESHOLD
+    or more (complete linkage), so "Smith, J." cannot chain "Smith, Jane"
+    and "Smith, John" together. Every member of a cluster is linked to one
+    representative: a star, not a clique.
+    """
+    
+    ABBREVIATIONS = {
+        'dept': 'department', 'dep': 'department', 'govt': 'government', 'gov': 'government',
+        'univ': 'university', 'co': 'company', 'corp': 'corporation', 'ltd': 'limited',
+        'inc': 'incorporated', 'assoc': 'association', 'natl': 'national', 'intl': 'international',
+        'mun': 'municipality', 'prov': 'provincial',
+    }
+    STOPWORDS = {'of', 'the', 'and', 'for', 'a', 'an'}
+    SOUNDEX_CODES = {
+        letter: digit
+        for digit, letters in (('1', 'bfpv'), ('2', 'cgjkqsxz'), ('3', 'dt'), ('4', 'l'), ('5', 'mn'), ('6', 'r'))
+        for letter in letters
+    }
+    # Tokens per name given a phonetic block, neighbours compared per block, and match score
+    PHONETIC_TOKENS = 2
+    WINDOW = 10
+    THRESHOLD = 0.88
+    
+    def __init__(self):
+        self._uris = []
+        self._tokens = []
+        self._blocks = defaultdict(list)
+        self.comparisons = 0
+    
+    @classmethod
+    def tokens(cls, name: str) -> List[str]:
+        text = ''.join(c if c.isalnum() else ' ' for c in name.lower().replace('&', ' and '))
+        tokens = [cls.ABBREVIATIONS.get(token, token) for token in text.split()]
+        return [token for token in tokens if token not in cls.STOPWORDS]
+    
+    @classmethod
+    def soundex(cls, token: str) -> str:
+        codes = cls.SOUNDEX_CODES
+        digits = []
+        last = codes.get(token[0])
+        for letter in token[1:]:
+            code = codes.get(letter)
+            if code and code != last:
+                digits.append(code)
+            if letter not in 'hw':
+                last = code
+        return (token[0].upper() + ''.join(digits) + '000')[:4]
+    
+    def add(self, uri: str, name: str):
+        tokens = self.tokens(name)
+        if not tokens:
+            return
+        index = len(self._uris)
+        self._uris.append(uri)
+        self._tokens.append(tokens)
+        self._blocks['t:' + ' '.join(sorted(set(tokens)))].append(index)
+        words = sorted((token for token in set(tokens) if len(token) > 2 and token.isalpha()),
+                       key=lambda token: (-len(token), token))
+        for token in words[:self.PHONETIC_TOKENS]:
+            self._blocks['p:' + self.soundex(token)].append(index)
+    
+    @staticmethod
+    def _token_score(a: str, b: str) -> float:
+        if a == b:
+            return 1.0
+        if a.isdigit() or b.isdigit():
+            return 0.0
+        if len(a) == 1 or len(b) == 1:
+            # An initial stands in for a name with the same first letter
+            return 0.9 if a[0] == b[0] else 0.0
+        matcher = difflib.SequenceMatcher(None, a, b)
+        if matcher.real_quick_ratio() < 0.75 or matcher.quick_ratio() < 0.75:
+            return 0.0
+        ratio = matcher.ratio()
+        return ratio if ratio >= 0.75 else 0.0
+    
+    def score(self, first: int, second: int) -> float:
+        """Similarity in [0, 1]: tokens are paired greedily by their best match."""
+        a, b = self._tokens[first], self._tokens[second]
+        if set(a) == set(b):
+            return 1.0
+        if len(a) > len(b):
+            a, b = b, a
+        unmatched = list(b)
+        total = 0.0
+        for token in a:
+            best, best_score = None, 0.0
+            for i, other in enumerate(unmatched):
+                token_score = self._token_score(token, other)
+                if token_score > best_score:
+                    best, best_score = i, token_score
+                    if token_score == 1.0:
+                        break
+            if best is not None:
+                total += best_score
+                del unmatched[best]
+        return 2 * total / (len(self._tokens[first]) + len(self._tokens[second]))
+    
+    def links(self) -> List[Tuple[str, str]]:
+        """Return (member URI, representative URI) for every clustered agent but the representatives.
+        
+        The representative is the member with the fullest name (most tokens,
+        then longest), the earliest added on ties.
+        """
+        cluster_of = list(range(len(self._uris)))
+        clusters = {i: [i] for i in range(len(self._uris))}
+        compared = set()
+        for members in self._blocks.values():
+            if len(members) < 2:
+                continue
+            members = sorted(members, key=lambda i: (' '.join(self._tokens[i]), i))
+            for position, first in enumerate(members):
+                for second in members[position + 1:position + 1 + self.WINDOW]:
+                    pair = (first, second) if first < second else (second, first)
+                    if pair in compared or cluster_of[first] == cluster_of[second]:
+                        continue
+                    compared.add(pair)
+                    self.comparisons += 1
+                    if self.score(first, second) < self.THRESHOLD:
+                        continue
+                    keep, merge = clusters[cluster_of[first]], clusters[cluster_of[second]]
+                    if not self._all_match(keep, merge, pair):
+                        continue
+                    if len(keep) < len(merge):
+                        keep, merge = merge, keep
+                    del clusters[cluster_of[merge[0]]]
+                    for i in merge:
+                        cluster_of[i] = cluster_of[keep[0]]
+                    keep.extend(merge)
+        
+        links = []
+        for members in clusters.values():
+            if len(members) < 2:
+                continue
+            representative = max(members, key=lambda i: (len(self._tokens[i]),
+                                                          len(' '.join(self._tokens[i])), -i))
+            links.extend((self._uris[i], self._uris[representative])
+                         for i in sorted(members) if i != representative)
+        links.sort(key=lambda link: link[0])
+        return links
+    
+    def _all_match(self, cluster: List[int], other: List[int], scored: Tuple[int, int]) -> bool:
+        """Whether every cross pair of two clusters (but the already scored one) reaches THRESHOLD."""
+        for first in cluster:
+            for second in other:
+                pair = (first, second) if first < second else (second, first)
+                if pair == scored:
+                    continue
+                self.comparisons += 1
+                if self.score(first, second) < self.THRESHOLD:
+                    return False
+        return True
+
+
+class EntityRegistry:
+    """Run-scoped register of shared entities already written to a fonds graph.
+    
+    Agents, terms, mandates, functions and repositories recur across fonds. In a multi-fonds
+    run the first fonds to claim one writes its node; later fonds only
+    reference it by URI. Worker processes share one instance through
+    EntityRegistryManager.
+    """
+    
+    KINDS = ('agents', 'places', 'subjects', 'genres', 'mandates', 'functions', 'repositories')
+    
+    def __init__(self):
+        self._written = set()
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+    
+    def claim(self, kind: str, uris: List[str]) -> List[str]:
+        """Register uris and return the ones an earlier fonds has already written."""
+        seen = [uri for uri in uris if uri in self._written]
+        self._written.update(uris)
+        self._hits[kind] += len(seen)
+        self._misses[kind] += len(uris) - len(seen)
+        return seen
+    
+    def stats(self) -> Dict:
+        return {
+            kind: {'written': self._misses[kind], 'hits': self._hits[kind]}
+            for kind in self.KINDS if kind in self._misses or kind in self._hits
+        }
+
+
+class EntityRegistryManager(BaseManager):
+    pass
+
+
+EntityRegistryManager.register('EntityRegistry', EntityRegistry)
+
+
+class ExportJournal:
+    """Append-only JSON-lines record of the fonds a multi-fonds export has finished.
+    
+    Every fonds that completes with status ok is appended (and fsynced) as
+    its summary entry. A fonds counts as done while its output file still
+    exists with the recorded size, so a restarted export skips it and
+    resumes at the first incomplete fonds. A line cut short by a crash is
+    ignored; the last entry for a fonds wins.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry['fonds_id']] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+    
+    def completed(self, fonds_id: int, output: str) -> Optional[Dict]:
+        """The journal entry of fonds_id if it finished into output and the file is intact."""
+        entry = self.entries.get(fonds_id)
+        if (entry and entry.get('output') == output and os.path.exists(output)
+                and os.path.getsize(output) == entry.get('bytes')):
+            return entry
+        return None
+    
+    def record(self, entry: Dict):
+        if entry.get('status') != 'ok':
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries[entry['fonds_id']] = entry
+
+
+class JsonLdStreamWriter:
+    """Write a JSON-LD document incrementally, one @graph node at a time.
+    
+    Output is byte-identical to dump_json() of the equivalent
+    {'@context', '@graph', '_metadata'} dict with the same indent and backend.
+    """
+    
+    def __init__(self, fp, indent: Optional[int] = None, backend: str = 'stdlib'):
+        self.fp = fp
+        self.indent = indent
+        self.node_count = 0
+        self._encoder = json_encoder(indent, backend)
+        compact = indent is None and resolve_json_backend(indent, backend) == 'orjson'
+        self._comma = ',' if compact else ', '
+        self._colon = ':' if compact else ': '
+    
+    def _pad(self, level: int) -> str:
+        return ' ' * (self.indent * level)
+    
+    def _encode(self, obj, level: int) -> str:
+        text = self._encoder(obj)
+        if self.indent is not None and level:
+            text = text.replace('\n', '\n' + self._pad(level))
+        return text
+    
+    def begin(self, context: Dict):
+        if self.indent is None:
+            self.fp.write('{"@context"' + self._colon + self._encode(context, 0)
+                          + self._comma + '"@graph"' + self._colon + '[')
+        else:
+            self.fp.write('{\n' + self._pad(1) + '"@context": ' + self._encode(context, 1)
+                          + ',\n' + self._pad(1) + '"@graph": [')
+    
+    def write_node(self, node: Dict):
+        if self.indent is None:
+            self.fp.write((self._comma if self.node_count else '') + self._encode(node, 0))
+        else:
+            self.fp.write((',' if self.node_count else '') + '\n' + self._pad(2) + self._encode(node, 2))
+        self.node_count += 1
+    
+    def end(self, metadata: Dict):
+        if self.indent is None:
+            self.fp.write(']' + self._comma + '"_metadata"' + self._colon + self._encode(metadata, 0) + '}')
+        else:
+            closing = ('\n' + self._pad(1) + ']') if self.node_count else ']'
+            self.fp.write(closing + ',\n' + self._pad(1) + '"_metadata": '
+                          + self._encode(metadata, 1) + '\n}')
+
+
+class GraphFingerprint:
+    """Order-independent SHA-256 digest of the nodes of a graph.
+    
+    Each node is hashed in a canonical encoding (sorted keys, sorted
+    multi-valued properties) and the digests are summed modulo 2**256, so the
+    result does not depend on the order MySQL returned rows in. _metadata,
+    with its extraction timestamp, is not part of the graph and never hashed.
+    """
+    
+    __slots__ = ('_total', 'nodes')
+    
+    MODULUS = 1 << 256
+    
+    def __init__(self):
+        self._total = 0
+        self.nodes = 0
+    
+    @classmethod
+    def _canonical(cls, value) -> str:
+        if isinstance(value, dict):
+            return '{' + ','.join(json.dumps(key) + ':' + cls._canonical(value[key])
+                                  for key in sorted(value)) + '}'
+        if isinstance(value, list):
+            return '[' + ','.join(sorted(cls._canonical(item) for item in value)) + ']'
+        return json.dumps(value, ensure_ascii=False, cls=DecimalEncoder)
+    
+    def add(self, node: Dict):
+        digest = hashlib.sha256(self._canonical(node).encode('utf-8')).digest()
+        self._total = (self._total + int.from_bytes(digest, 'big')) % self.MODULUS
+        self.nodes += 1
+    
+    def hexdigest(self) -> str:
+        return f"{self._total:064x}"
+
+
+def canonical_node(value):
+    """value with dict keys sorted (JSON-LD keywords first) and list items in GraphFingerprint order.
+    
+    Multi-valued RDF properties have no order, so sorting their items
+    changes nothing in the graph but makes the serialisation repeatable.
+    """
+    if isinstance(value, dict):
+        return {key: canonical_node(value[key])
+                for key in sorted(value, key=lambda key: (not key.startswith('@'), key))}
+    if isinstance(value, list):
+        return sorted((canonical_node(item) for item in value), key=GraphFingerprint._canonical)
+    return value
+
+
+class RdfStreamWriter:
+    """Write extracted graph nodes as N-Triples, N-Quads or Turtle, one node at a time.
+    
+    Follows the JSON-LD to RDF rules for the node shapes the extractor builds:
+    compact IRIs are expanded with the context, nested objects without @id
+    become blank nodes, lists give one triple per item, null is dropped,
+    {"@value", "@language"} objects become language-tagged strings, and
+    numbers and booleans become xsd-typed literals. N-Quads put every triple
+    in graph; blank node labels start with bnode_prefix so files can be bulk
+    loaded together.
+    """
+    
+    FORMATS = ('nt', 'nq', 'ttl')
+    RDF_TYPE = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+    XSD = 'http://www.w3.org/2001/XMLSchema#'
+    
+    # Characters that may not appear raw in an IRIREF
+    IRI_UNSAFE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+    STRING_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'}
+    STRING_UNSAFE = re.compile(r'[\\"\n\r]')
+    TURTLE_LOCAL = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*$')
+    
+    def __init__(self, fp, fmt: str, context: Dict[str, str], graph: Optional[str] = None,
+                 bnode_prefix: str = 'b'):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown RDF format: {fmt}")
+        self.fp = fp
+        self.fmt = fmt
+        self.context = context
+        self.graph = f" {self._iri(graph)}" if fmt == 'nq' and graph else ''
+        self.bnode_prefix = bnode_prefix
+        self.node_count = 0
+        self.triple_count = 0
+        self._bnode_count = 0
+    
+    def begin(self):
+        if self.fmt == 'ttl':
+            for prefix, namespace in self.context.items():
+                self.fp.write(f"@prefix {prefix}: <{namespace}> .\n")
+            self.fp.write('\n')
+    
+    def write_node(self, node: Dict):
+        if self.fmt == 'ttl':
+            pending = []
+            self.fp.write(self._turtle_block(node, pending))
+            while pending:
+                self.fp.write(self._turtle_block(pending.pop(0), pending))
+        else:
+            subject = self._iri(node['@id']) if '@id' in node else self._bnode()
+            lines = [f"{s} {p} {o}{self.graph} .\n" for s, p, o in self._triples(subject, node)]
+            self.triple_count += len(lines)
+            self.fp.write(''.join(lines))
+        self.node_count += 1
+    
+    def end(self):
+        pass
+    
+    # -- terms --
+    
+    def _expand(self, term: str) -> Optional[str]:
+        prefix, sep, local = term.partition(':')
+        if sep and prefix in self.context:
+            return self.context[prefix] + local
+        if term.startswith(('http://', 'https://', 'urn:')):
+            return term
+        return None
+    
+    def _iri(self, value: str) -> str:
+        value = self._expand(value) or value
+        return '<' + self.IRI_UNSAFE.sub(lambda m: '%%%02X' % ord(m.group()), value) + '>'
+    
+    def _bnode(self) -> str:
+        self._bnode_count += 1
+        return f"_:{self.bnode_prefix}{self._bnode_count}"
+    
+    def _literal(self, value, language: Optional[str] = None) -> str:
+        if isinstance(value, bool):
+            return f'"{"true" if value else "false"}"^^<{self.XSD}boolean>'
+        if isinstance(value, int):
+            return f'"{value}"^^<{self.XSD}integer>'
+        if isinstance(value, (float, Decimal)):
+            # Decimals are written as floats in JSON-LD too, which loads them as xsd:double
+            mantissa, exponent = f"{float(value):.15E}".split('E')
+            mantissa = mantissa.rstrip('0')
+            if mantissa.endswith('.'):
+                mantissa += '0'
+            return f'"{mantissa}E{int(exponent)}"^^<{self.XSD}double>'
+        text = self.STRING_UNSAFE.sub(lambda m: self.STRING_ESCAPES[m.group()], str(value))
+        return f'"{text}"@{language}' if language else f'"{text}"'
+    
+    @staticmethod
+    def _items(value) -> List:
+        if isinstance(value, list):
+            return [item for item in value if item is not None]
+        return [] if value is None else [value]
+    
+    # -- N-Triples / N-Quads --
+    
+    def _triples(self, subject: str, node: Dict):
+        for key, value in node.items():
+            if key == '@id':
+                continue
+            if key == '@type':
+                for type_name in self._items(value):
+                    yield subject, self.RDF_TYPE, self._iri(type_name)
+                continue
+            predicate = self._expand(key)
+            if predicate is None:
+                continue
+            predicate = self._iri(predicate)
+            for item in self._items(value):
+                if isinstance(item, dict) and '@value' in item:
+                    obj = self._literal(item['@value'], item.get('@language'))
+                elif isinstance(item, dict):
+                    if '@id' in item:
+                        obj = self._iri(item['@id'])
+                    else:
+                        obj = self._bnode()
+                    yield from self._triples(obj, item)
+                else:
+                    obj = self._literal(item)
+                yield subject, predicate, obj
+    
+    # -- Turtle --
+    
+    def _turtle_iri(self, value: str) -> str:
+        value = self._expand(value) or value
+        for prefix, namespace in self.context.items():
+            if value.startswith(namespace) and self.TURTLE_LOCAL.match(value[len(namespace):]):
+                return f"{prefix}:{value[len(namespace):]}"
+        return self._iri(value)
+    
+    def _turtle_block(self, node: Dict, pending: List[Dict]) -> str:
+        subject = self._turtle_iri(node['@id']) if '@id' in node else None
+        body = self._turtle_properties(node, pending, 1)
+        if subject is None:
+            return f"[\n    {body}\n] .\n\n" if body else "[] .\n\n"
+        if not body:
+            return ''
+        return f"{subject}\n    {body} .\n\n"
+    
+    def _turtle_properties(self, node: Dict, pending: List[Dict], level: int) -> str:
+        pad = '    ' * level
+        entries = []
+        for key, value in node.items():
+            if key == '@id':
+                continue
+            if key == '@type':
+                objects = [self._turtle_iri(t) for t in self._items(value)]
+                predicate = 'a'
+            else:
+                if self._expand(key) is None:
+                    continue
+                predicate = self._turtle_iri(key)
+                objects = []
+                for item in self._items(value):
+                    if isinstance(item, dict) and '@value' in item:
+                        objects.append(self._literal(item['@value'], item.get('@language')))
+                    elif isinstance(item, dict) and '@id' in item:
+                        objects.append(self._turtle_iri(item['@id']))
+                        if len(item) > 1:
+                            pending.append(item)
+                    elif isinstance(item, dict):
+                        inner = self._turtle_properties(item, pending, level + 1)
+                        objects.append(f"[\n{pad}    {inner}\n{pad}]" if inner else '[]')
+                    else:
+                        objects.append(self._literal(item))
+            if objects:
+                self.triple_count += len(objects)
+                entries.append(f"{predicate} {', '.join(objects)}")
+        return f" ;\n{pad}".join(entries)
+
+
+def open_output(path: str, compress: bool = False):
+    """Open a UTF-8 text output stream. '-' writes to standard output; compress gzips it.
+    
+    The gzip header carries no timestamp, so the same text always compresses
+    to the same bytes.
+    """
+    if path == '-':
+        raw = sys.__stdout__.buffer
+        if compress:
+            raw = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    if compress:
+        return io.TextIOWrapper(gzip.GzipFile(path, 'wb', compresslevel=6, mtime=0), encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file's bytes, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# _metadata entries that differ between runs over the same data; canonical
+# extracts leave them out of the document and put them in a sidecar file
+VOLATILE_METADATA = ('extracted', 'profile')
+
+
+def write_metadata_sidecar(output: str, metadata: Dict, json_backend: str,
+                           indent: Optional[int] = None) -> str:
+    """Write <output>.meta.json with the volatile metadata and the output's size and SHA-256; return its content."""
+    sidecar = {
+        'output': os.path.basename(output),
+        'bytes': os.path.getsize(output),
+        'sha256': file_sha256(output),
+        'json_backend': resolve_json_backend(indent, json_backend),
+    }
+    sidecar.update((key, metadata[key]) for key in VOLATILE_METADATA if key in metadata)
+    with open(output + '.meta.json', 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, indent=2)
+    return sidecar
+
+
 class RiCExtractor:
     """Extracts AtoM data and transforms to RiC-O JSON-LD with Spectrum/GRAP extensions."""
     
@@ -73,17 +1340,109 @@ class RiCExtractor:
         'reproduction': 'Activity',
     }
     
-    def __init__(self, db_config: Dict[str, str], base_uri: str, instance_id: str):
+    JSONLD_CONTEXT = {
+        'rico': 'https://www.ica.org/standards/RiC/ontology#',
+        'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+        'rdfs': 'http://www.w3.org/2000/01/rdf-schema#',
+        'xsd': 'http://www.w3.org/2001/XMLSchema#',
+        'owl': 'http://www.w3.org/2002/07/owl#',
+        'spectrum': 'https://collectionstrust.org.uk/spectrum#',
+        'grap': 'https://www.asb.co.za/grap#',
+    }
+    
+    # Record IDs per IN (...) statement, and the record count above which the
+    # IDs are loaded into a session temp table and joined instead
+    DEFAULT_CHUNK_SIZE = 1000
+    DEFAULT_TEMP_TABLE_THRESHOLD = 50000
+    # Rows pulled per round trip from the unbuffered cursor; 0 buffers whole result sets
+    DEFAULT_FETCH_BATCH_SIZE = 1000
+    
+    # Reconnect-and-retry policy: attempts after the first, and the first
+    # backoff delay in seconds (doubled on every further attempt)
+    DEFAULT_RETRIES = 3
+    DEFAULT_RETRY_DELAY = 2.0
+    ID_TEMP_TABLE = 'ric_extract_ids'
+    # MySQL DECIMAL and NEWDECIMAL column type codes, converted to float as rows are fetched
+    DECIMAL_TYPE_CODES = (0, 246)
+    
+    # How the fonds hierarchy is walked: AtoM's nested-set (lft/rgt) range,
+    # a recursive CTE over parent_id, or nested-set whenever the bounds are usable
+    HIERARCHY_STRATEGIES = ('auto', 'nested-set', 'recursive')
+    
+    OUTPUT_FORMATS = ('jsonld',) + RdfStreamWriter.FORMATS
+    
+    def __init__(self, db_config: Dict[str, str], base_uri: str, instance_id: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 temp_table_threshold: int = DEFAULT_TEMP_TABLE_THRESHOLD,
+                 hierarchy_strategy: str = 'auto',
+                 fetch_batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+                 retries: int = DEFAULT_RETRIES,
+                 retry_delay: float = DEFAULT_RETRY_DELAY,
+                 phase_workers: int = 1,
+                 replica_config: Optional[Dict[str, str]] = None,
+                 max_replica_lag: float = ConnectionFactory.DEFAULT_MAX_REPLICA_LAG,
+                 query_timeout: Optional[float] = None,
+                 canonical: bool = False,
+                 verbose: bool = False,
+                 profile: bool = False,
+                 fingerprint: bool = False,
+                 cultures: Optional[List[str]] = None,
+                 json_backend: str = 'stdlib',
+                 taxonomy_cache: Optional[Dict] = None,
+                 terms: Optional[TermDictionary] = None,
+                 term_cache: Optional[str] = None,
+                 registry: Optional[EntityRegistry] = None):
+        if hierarchy_strategy not in self.HIERARCHY_STRATEGIES:
+            raise ValueError(f"Unknown hierarchy strategy: {hierarchy_strategy}")
         self.db_config = db_config
         self.base_uri = base_uri.rstrip('/')
         self.instance_id = instance_id
         self.connection = None
         self.cursor = None
+        self.chunk_size = max(1, chunk_size)
+        self.temp_table_threshold = temp_table_threshold
+        self.hierarchy_strategy = hierarchy_strategy
+        self.fetch_batch_size = max(0, fetch_batch_size)
+        self.retries = max(0, retries)
+        self.retry_delay = retry_delay
+        # Set when a query fails with a transient error, even if a phase swallowed it
+        self.connection_error = None
+        # Reads go to replica_config while it keeps within max_replica_lag seconds
+        self.db = ConnectionFactory(db_config, replica=replica_config, max_replica_lag=max_replica_lag,
+                                    query_timeout=query_timeout, retries=self.retries,
+                                    retry_delay=self.retry_delay)
+        # Independent phases run this many at a time, each on its own pooled connection
+        self.phase_workers = max(1, phase_workers)
+        self._phase_pool = ConnectionPool(self._open_phase_session, self.phase_workers,
+                                          self._close_phase_session, self._phase_session_alive)
+        # Repeatable output: nodes by @id, sorted keys and values, no volatile _metadata
+        self.canonical = canonical
+        self.verbose = verbose
+        self.profile = profile
+        self.fingerprint = fingerprint
+        # AtoM cultures for language-tagged literals; None keeps plain single-culture strings
+        self.cultures = list(cultures) if cultures else None
+        resolve_json_backend(backend=json_backend)
+        self.json_backend = json_backend
+        self.registry = registry
+        self.chunk_stats = []
+        self.phase_stats = []
+        self._id_table_loaded = False
+        self._record_bounds = None
         
-        # Entity caches
+        # Incremental extraction state
+        self._delta_since = None
+        self._delta_bounds = None
+        self._context_records = {}
+        self.changed_record_ids = set()
+        
+        # Entity caches: JSON-LD nodes, plus slotted extraction-only fields
         self.records = {}
         self.agents = {}
         self.activities = {}
+        self.record_info = {}
+        self.agent_info = {}
+        self.activity_info = {}
         self.places = {}
         self.subjects = {}
         self.genres = {}
@@ -91,7 +1450,7 @@ class RiCExtractor:
         self.rules = {}
         self.mandates = {}
         self.functions = {}
-        self.relations = []
+        self.relations = RelationIndex()
         self.repository = None
         
         # Phase 5: Spectrum/GRAP entities
@@ -102,35 +1461,69 @@ class RiCExtractor:
         self.grap_assets = {}
         
         self.record_order = {}
-        self._taxonomy_cache = {}
+        self._taxonomy_cache = dict(taxonomy_cache or {})
+        # Term names by ID, loaded by the first extraction unless handed in; term_cache persists it between runs
+        self.terms = terms
+        self.term_cache = term_cache
+        
+        # Shared entities written by another fonds in this run
+        self._shared_refs = set()
+        # Run-scoped row caches for tables that do not depend on the fonds
+        self._function_rows = None
+        self._agent_rows = {}
+        self._repository_rows = {}
         
     def connect(self):
+        if mysql is None:
+            raise RuntimeError(MISSING_DRIVER)
+        self.connection = self._open_connection()
+        self.cursor = self.connection.cursor(dictionary=True)
+        replica = ' (read replica)' if self.db.is_replica(self.connection) else ''
+        print(f"Connected to database: {self.db_config['database']}{replica}")
+    
+    def _open_connection(self):
+        """Open a read connection through the factory (see ahg_db); raises Error once its retries are spent."""
+        return self.db.connect()
+    
+    def disconnect(self):
+        """Close the (possibly dead) connection and forget its session state; temp tables are gone."""
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
-            self.cursor = self.connection.cursor(dictionary=True)
-            print(f"Connected to database: {self.db_config['database']}")
-            self._cache_taxonomy_ids()
-        except Error as e:
-            print(f"Database connection error: {e}")
-            sys.exit(1)
+            self.close()
+        except Error:
+            pass
+        self.connection = None
+        self.cursor = None
+        self._id_table_loaded = False
+        self.connection_error = None
+    
+    @staticmethod
+    def is_transient_error(error: Exception) -> bool:
+        return ahg_db.is_transient_error(error)
+    
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number attempt (1-based)."""
+        return self.db.backoff(attempt)
+    
+    def load_terms(self) -> TermDictionary:
+        """Load the term dictionary (and taxonomy IDs) on first use; listings never need it."""
+        if self.terms is None:
+            self.terms = TermDictionary.load(self.cursor, self.term_cache)
+        if not self._taxonomy_cache:
+            self._cache_taxonomy_ids()
+        return self.terms
     
     def _cache_taxonomy_ids(self):
-        query = """
-            SELECT t.id, ti.name
-            FROM taxonomy t
-            JOIN taxonomy_i18n ti ON t.id = ti.id AND ti.culture = 'en'
-        """
-        self.cursor.execute(query)
-        for row in self.cursor.fetchall():
-            name = (row['name'] or '').lower()
+        for taxonomy_id, name in sorted(self.terms.taxonomies.items()):
+            name = (name or '').lower()
             if 'subject' in name:
-                self._taxonomy_cache['subject'] = row['id']
+                self._taxonomy_cache['subject'] = taxonomy_id
             elif 'place' in name:
-                self._taxonomy_cache['place'] = row['id']
+                self._taxonomy_cache['place'] = taxonomy_id
             elif 'genre' in name:
-                self._taxonomy_cache['genre'] = row['id']
+                self._taxonomy_cache['genre'] = taxonomy_id
                 
     def close(self):
+        self._phase_pool.close()
         if self.cursor:
             self.cursor.close()
         if self.connection:
@@ -139,12 +1532,194 @@ class RiCExtractor:
     def mint_uri(self, entity_type: str, entity_id) -> str:
         return f"{self.base_uri}/{self.instance_id}/{entity_type.lower()}/{entity_id}"
     
+    def graph_uri(self, fonds_id: int) -> str:
+        """Named graph holding one fonds in N-Quads output."""
+        return self.mint_uri('graph', fonds_id)
+    
+    # ==================== BATCHED RECORD QUERIES ====================
+    
+    def _fetch_for_records(self, phase: str, query: str, params: tuple = ()):
+        """Run a per-record query over the extracted record IDs in bounded batches.
+        
+        The query marks the record ID list with an IN ({ids}) clause. Small
+        extractions get one IN list of at most chunk_size placeholders per
+        statement. Above temp_table_threshold records the IN list becomes a
+        lft/rgt range subquery when the records came from the nested set, or
+        a join against a temporary table of the IDs otherwise. Callers skip
+        rows whose record is not in self.records. Leading params are passed
+        before the IDs. Yields rows; per-chunk timings are kept in chunk_stats.
+        """
+        for number, total, id_count, ids, id_params in self._record_chunks():
+            yield from self._timed_fetch(
+                phase, number, total, id_count,
+                query.format(ids=ids), tuple(params) + id_params
+            )
+    
+    def _record_chunks(self):
+        """Yield (number, total, id_count, ids clause, ID params) batches of the record IDs.
+        
+        The batching of _fetch_for_records, for callers that run several
+        statements against each batch.
+        """
+        record_ids = list(self.records.keys())
+        if not record_ids:
+            return
+        
+        if not (self.temp_table_threshold and len(record_ids) > self.temp_table_threshold):
+            chunks = [record_ids[i:i + self.chunk_size]
+                      for i in range(0, len(record_ids), self.chunk_size)]
+            for number, chunk in enumerate(chunks, 1):
+                yield number, len(chunks), len(chunk), ','.join(['%s'] * len(chunk)), tuple(chunk)
+        elif self._record_bounds:
+            yield (1, 1, len(record_ids),
+                   "SELECT id FROM information_object WHERE lft >= %s AND rgt <= %s",
+                   self._record_bounds)
+        else:
+            self._load_id_table(record_ids)
+            yield 1, 1, len(record_ids), f"SELECT id FROM {self.ID_TEMP_TABLE}", ()
+    
+    def _fetch_by_ids(self, phase: str, query: str, ids: List, params: tuple = ()):
+        """Run an IN ({ids}) query over an arbitrary ID list, chunk_size IDs per statement."""
+        ids = list(ids)
+        chunks = [ids[i:i + self.chunk_size] for i in range(0, len(ids), self.chunk_size)]
+        for number, chunk in enumerate(chunks, 1):
+            yield from self._timed_fetch(
+                phase, number, len(chunks), len(chunk),
+                query.format(ids=','.join(['%s'] * len(chunk))),
+                tuple(params) + tuple(chunk)
+            )
+    
+    def _timed_fetch(self, phase: str, number: int, total: int, id_count: int,
+                     sql: str, params: tuple):
+        """Run one statement and yield its rows, recording the time spent in the database.
+        
+        With a fetch_batch_size the rows come from an unbuffered cursor,
+        fetch_batch_size tuples per round trip, as Row views; only one batch
+        is held client-side. The connection cannot run another statement
+        until the rows are consumed, and an abandoned iteration discards the
+        rest. With fetch_batch_size 0 the whole result is buffered as dicts.
+        """
+        stats = {'rows': 0, 'seconds': 0.0, 'bytes': 0}
+        try:
+            if self.fetch_batch_size:
+                yield from self._stream_rows(sql, params, stats)
+            else:
+                started = time.perf_counter()
+                self.cursor.execute(sql, params)
+                rows = self.cursor.fetchall()
+                stats['seconds'] += time.perf_counter() - started
+                stats['rows'] = len(rows)
+                decimals = [self.cursor.description[i][0]
+                            for i in self._decimal_columns(self.cursor.description)]
+                for row in rows:
+                    for name in decimals:
+                        if row[name] is not None:
+                            row[name] = float(row[name])
+                if self.profile:
+                    stats['bytes'] = sum(self._payload_bytes(row.values()) for row in rows)
+                yield from rows
+        except Error as e:
+            if self.is_transient_error(e):
+                self.connection_error = e
+            raise
+        finally:
+            chunk = {
+                'phase': phase,
+                'chunk': number,
+                'ids': id_count,
+                'rows': stats['rows'],
+                'seconds': round(stats['seconds'], 4),
+            }
+            if self.profile:
+                chunk['bytes'] = stats['bytes']
+            self.chunk_stats.append(chunk)
+            if self.verbose:
+                print(f"  [{phase}] chunk {number}/{total}: "
+                      f"{id_count} ids, {stats['rows']} rows, {stats['seconds']:.3f}s")
+    
+    def _stream_rows(self, sql: str, params: tuple, stats: Dict):
+        cursor = self.connection.cursor(buffered=False)
+        exhausted = False
+        try:
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            columns = {column[0]: i for i, column in enumerate(cursor.description or ())}
+            decimals = self._decimal_columns(cursor.description)
+            stats['seconds'] += time.perf_counter() - started
+            while True:
+                started = time.perf_counter()
+                batch = cursor.fetchmany(self.fetch_batch_size)
+                stats['seconds'] += time.perf_counter() - started
+                if not batch:
+                    exhausted = True
+                    break
+                stats['rows'] += len(batch)
+                if self.profile:
+                    stats['bytes'] += sum(self._payload_bytes(values) for values in batch)
+                for values in batch:
+                    if decimals:
+                        values = list(values)
+                        for i in decimals:
+                            if values[i] is not None:
+                                values[i] = float(values[i])
+                    yield Row(values, columns)
+        finally:
+            if not exhausted:
+                try:
+                    while cursor.fetchmany(self.fetch_batch_size):
+                        pass
+                except Error:
+                    pass
+            cursor.close()
+    
+    @classmethod
+    def _decimal_columns(cls, description) -> List[int]:
+        """Positions of the DECIMAL columns in a cursor description.
+        
+        Their values are fetched as floats, so the JSON encoders never
+        meet a Decimal and need no conversion hook.
+        """
+        return [i for i, column in enumerate(description or ()) if column[1] in cls.DECIMAL_TYPE_CODES]
+    
+    @staticmethod
+    def _payload_bytes(values) -> int:
+        """Approximate transfer size of a row: the length of its text and binary values."""
+        return sum(len(value) for value in values if isinstance(value, (str, bytes, bytearray)))
+    
+    def _load_id_table(self, record_ids: List[int]):
+        """Load the current record IDs into the session temp table (once per extraction)."""
+        if self._id_table_loaded:
+            return
+        self.cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {self.ID_TEMP_TABLE}")
+        self.cursor.execute(
+            f"CREATE TEMPORARY TABLE {self.ID_TEMP_TABLE} (id INT NOT NULL PRIMARY KEY) ENGINE=MEMORY"
+        )
+        for i in range(0, len(record_ids), self.chunk_size):
+            chunk = record_ids[i:i + self.chunk_size]
+            self.cursor.executemany(
+                f"INSERT INTO {self.ID_TEMP_TABLE} (id) VALUES (%s)",
+                [(record_id,) for record_id in chunk]
+            )
+        self._id_table_loaded = True
+    
+    def _drop_id_table(self):
+        if self._id_table_loaded:
+            self.cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {self.ID_TEMP_TABLE}")
+            self._id_table_loaded = False
+        for session in self._phase_pool.idle:
+            if session['id_table_loaded']:
+                session['cursor'].execute(f"DROP TEMPORARY TABLE IF EXISTS {self.ID_TEMP_TABLE}")
+                session['id_table_loaded'] = False
+    
+    # Descendants from the nested-set bounds rather than a COUNT(*) per row;
+    # rows without usable bounds report 0, as the correlated count did
+    DESCENDANT_COUNT = "CASE WHEN io.rgt > io.lft THEN (io.rgt - io.lft - 1) DIV 2 ELSE 0 END"
+    
     def list_fonds(self) -> List[Dict]:
-        query = """
+        query = f"""
             SELECT 
                 io.id, io.identifier, ioi.title,
-                (SELECT COUNT(*) FROM information_object d 
-                 WHERE d.lft > io.lft AND d.rgt < io.rgt) as descendant_count
+                {self.DESCENDANT_COUNT} as descendant_count
             FROM information_object io
             JOIN information_object_i18n ioi ON io.id = ioi.id AND ioi.culture = 'en'
             JOIN term_i18n ti ON io.level_of_description_id = ti.id AND ti.culture = 'en'
@@ -156,12 +1731,11 @@ class RiCExtractor:
 
     def list_standalone(self) -> List[Dict]:
         """List top-level records that are not fonds (standalone records)"""
-        query = """
+        query = f"""
             SELECT
                 io.id, io.identifier, ioi.title,
                 COALESCE(ti.name, 'No level') as level,
-                (SELECT COUNT(*) FROM information_object d
-                 WHERE d.lft > io.lft AND d.rgt < io.rgt) as descendant_count
+                {self.DESCENDANT_COUNT} as descendant_count
             FROM information_object io
             LEFT JOIN information_object_i18n ioi ON io.id = ioi.id AND ioi.culture = 'en'
             LEFT JOIN term_i18n ti ON io.level_of_description_id = ti.id AND ti.culture = 'en'
@@ -172,15 +1746,168 @@ class RiCExtractor:
         self.cursor.execute(query)
         return self.cursor.fetchall()
     
-    def extract_fonds(self, fonds_id: int) -> Dict:
-        self.cursor.execute("SELECT id FROM information_object WHERE id = %s", (fonds_id,))
-        if not self.cursor.fetchone():
+    def list_top_level(self) -> List[Dict]:
+        """List every top-level description, fonds or standalone, with its repository, in tree order"""
+        query = f"""
+            SELECT
+                io.id, io.repository_id,
+                {self.DESCENDANT_COUNT} as descendant_count
+            FROM information_object io
+            WHERE io.parent_id = 1 AND io.id > 1
+            ORDER BY io.lft, io.id
+        """
+        self.cursor.execute(query)
+        return self.cursor.fetchall()
+    
+    def list_changed_fonds(self, fonds_ids: List[int], watermarks: Dict[str, str]) -> List[int]:
+        """Return the fonds in fonds_ids that need reloading, in input order.
+        
+        A fonds needs reloading when it has no watermark, has no usable
+        lft/rgt bounds, or any description in it changed after its
+        watermark (same change sources as incremental extraction). Fonds
+        sharing a watermark are checked together with one set of change
+        queries over their combined range. IDs that no longer exist are left
+        out, and deleted descriptions leave no trace so are not detected.
+        """
+        rows = list(self._fetch_by_ids(
+            'fonds_bounds',
+            "SELECT id, lft, rgt FROM information_object WHERE id IN ({ids})",
+            fonds_ids,
+        ))
+        changed = set()
+
+        by_since = defaultdict(list)
+        for row in rows:
+            since = watermarks.get(str(row['id']))
+            if since is None or row['lft'] is None or row['rgt'] is None:
+                changed.add(row['id'])
+            else:
+                by_since[since].append((row['lft'], row['rgt'], row['id']))
+        
+        for since, group in by_since.items():
+            lft = min(bounds[0] for bounds in group)
+            rgt = max(bounds[1] for bounds in group)
+            record_ids = self._find_changed_record_ids(lft, rgt, since)
+            if not record_ids:
+                continue
+            positions = sorted(row['lft'] for row in self._fetch_structure('id', record_ids, lft, rgt))
+            for fonds_lft, fonds_rgt, fonds_id in group:
+                first = bisect.bisect_left(positions, fonds_lft)
+                if first < len(positions) and positions[first] <= fonds_rgt:
+                    changed.add(fonds_id)
+        
+        return [fonds_id for fonds_id in fonds_ids if fonds_id in changed]
+    
+    def extract_fonds(self, fonds_id: int, since: Optional[str] = None,
+                      fingerprint: Optional[GraphFingerprint] = None) -> Dict:
+        """Extract a fonds to JSON-LD.
+        
+        With since, only descriptions changed after that timestamp (plus their
+        parent and adjacent siblings) are extracted; see _extract_changed_records.
+        fingerprint, when given, takes in the graph as _iter_graph_nodes describes.
+        """
+        self._run_extraction(fonds_id, since=since)
+        return self._run_phase('build', self._build_jsonld, fingerprint)
+    
+    def stream_shard(self, fonds_ids: List[int], fp, fmt: str = 'jsonld',
+                     indent: Optional[int] = None, metadata: Optional[Dict] = None) -> Dict:
+        """Extract several fonds one after another into a single document on fp and return the shard totals.
+        
+        JSON-LD shards are one document whose _metadata (extended with metadata)
+        comes after the graph; RDF shards are the fonds' triples back to back,
+        each fonds in its own named graph for nq. With a registry set, shared
+        entities are written by the first fonds in the shard that needs them.
+        The totals always carry the GraphFingerprint of every node written.
+        """
+        fingerprint = GraphFingerprint()
+        totals = {'fonds_count': 0, 'records_count': 0, 'relations_count': 0}
+        phase_lists = []
+        writer = None
+        if fmt == 'jsonld':
+            writer = JsonLdStreamWriter(fp, indent=indent, backend=self.json_backend)
+            writer.begin(self.JSONLD_CONTEXT)
+        else:
+            totals['triples_count'] = 0
+        for fonds_id in fonds_ids:
+            self._run_extraction(fonds_id)
+            totals['fonds_count'] += 1
+            totals['records_count'] += len(self.records)
+            totals['relations_count'] += len(self.relations)
+            if fmt != 'jsonld':
+                first = writer is None
+                writer = RdfStreamWriter(fp, fmt, self.JSONLD_CONTEXT,
+                                         graph=self.graph_uri(fonds_id) if fmt == 'nq' else None,
+                                         bnode_prefix=f"f{fonds_id}b")
+                if first:
+                    writer.begin()
+            self._run_phase('write', self._write_nodes, writer, fingerprint)
+            if fmt != 'jsonld':
+                totals['triples_count'] += writer.triple_count
+            phase_lists.append(list(self.phase_stats))
+        if fmt == 'jsonld':
+            shard_metadata = {
+                'extracted': datetime.utcnow().isoformat() + 'Z',
+                'source': f'AtoM instance: {self.instance_id}',
+                'extractor_version': '5.0',
+            }
+            shard_metadata.update(metadata or {})
+            shard_metadata['fonds'] = list(fonds_ids)
+            shard_metadata.update(totals)
+            if self.cultures:
+                shard_metadata['cultures'] = list(self.cultures)
+            writer.end(self._document_metadata(shard_metadata))
+        elif writer is not None:
+            writer.end()
+        totals['fingerprint'] = fingerprint.hexdigest()
+        if self.profile:
+            totals['phases'] = merge_phase_stats(phase_lists)
+        return totals
+    
+    def _write_nodes(self, writer, fingerprint: GraphFingerprint):
+        for node in self._iter_graph_nodes(release=True, fingerprint=fingerprint):
+            writer.write_node(node)
+    
+    def stream_fonds(self, fonds_id: int, fp, indent: Optional[int] = None,
+                     since: Optional[str] = None, subjects: Optional[List[str]] = None,
+                     fmt: str = 'jsonld') -> Dict:
+        """Extract a fonds and stream it to fp as JSON-LD or an RDF_FORMATS format. Returns the metadata."""
+        self._run_extraction(fonds_id, since=since)
+        if fmt == 'jsonld':
+            return self._run_phase('write', self.write_jsonld, fp, indent, subjects)
+        graph = self.graph_uri(fonds_id) if fmt == 'nq' else None
+        return self._run_phase('write', self.write_rdf, fp, fmt, graph, subjects, f"f{fonds_id}b")
+    
+    def database_now(self) -> str:
+        """Current database server time, used as the next incremental watermark.
+        
+        On a read replica the time is moved back by the replica's lag (plus a
+        second), so changes the replica has not applied yet are picked up by
+        the next incremental run.
+        """
+        if not self.db.is_replica(self.connection):
+            self.cursor.execute("SELECT NOW() AS now")
+            return str(self.cursor.fetchone()['now'])
+        lag = self.db.replica_lag(self.connection)
+        if lag is None:
+            raise RuntimeError("Read replica stopped replicating; cannot take a watermark from it")
+        self.cursor.execute("SELECT NOW() - INTERVAL %s SECOND AS now", (math.ceil(lag) + 1,))
+        return str(self.cursor.fetchone()['now'])
+    
+    def _run_extraction(self, fonds_id: int, since: Optional[str] = None):
+        self.cursor.execute("SELECT id, lft, rgt, repository_id FROM information_object WHERE id = %s",
+                            (fonds_id,))
+        fonds = self.cursor.fetchone()
+        if not fonds:
             raise ValueError(f"Fonds with ID {fonds_id} not found")
+        self.load_terms()
         
         # Clear all caches
         self.records = {}
         self.agents = {}
         self.activities = {}
+        self.record_info = {}
+        self.agent_info = {}
+        self.activity_info = {}
         self.places = {}
         self.subjects = {}
         self.genres = {}
@@ -188,7 +1915,7 @@ class RiCExtractor:
         self.rules = {}
         self.mandates = {}
         self.functions = {}
-        self.relations = []
+        self.relations = RelationIndex()
         self.record_order = {}
         self.repository = None
         self.condition_checks = {}
@@ -196,30 +1923,251 @@ class RiCExtractor:
         self.loans_out = {}
         self.movements = {}
         self.grap_assets = {}
+        self.chunk_stats = []
+        self.phase_stats = []
+        self._record_bounds = None
+        self._delta_since = since
+        self._delta_bounds = None
+        self._context_records = {}
+        self.changed_record_ids = set()
+        self._shared_refs = set()
+        self.connection_error = None
+        
+        if self.profile and not tracemalloc.is_tracing():
+            tracemalloc.start()
         
         # Core extraction (Phases 1-4)
-        self._extract_records_by_parent(fonds_id)
-        self._extract_agents_by_records()
-        self._extract_activities_by_records()
-        self._extract_access_points()
-        self._extract_digital_objects()
-        self._extract_related_materials()
-        self._extract_rights_and_rules()
-        self._extract_functions()
-        self._extract_mandates_from_agents()
-        self._extract_repository(fonds_id)
-        self._build_creator_shortcuts()
-        self._build_temporal_relations()
-        self._build_equivalence_candidates()
-        
-        # Phase 5: Spectrum/GRAP extraction
-        self._extract_condition_checks()
-        self._extract_valuations()
-        self._extract_loans_out()
-        self._extract_movements()
-        self._extract_grap_assets()
-        
-        return self._build_jsonld()
+        if since is None:
+            self._run_phase('records', self._extract_records, fonds)
+        else:
+            self._run_phase('records', self._extract_changed_records, fonds, since)
+            if not self.records:
+                return
+        # (phase, method, args, phases it needs); every phase needs the records
+        phases = [
+            ('agents', '_extract_agents_by_records', (), ()),
+            ('activities', '_extract_activities_by_records', (), ('agents',)),
+            ('access_points', '_extract_access_points', (), ()),
+            ('digital_objects', '_extract_digital_objects', (), ()),
+            ('related_materials', '_extract_related_materials', (), ()),
+            ('rights_and_rules', '_extract_rights_and_rules', (), ()),
+            ('functions', '_extract_functions', (), ('agents',)),
+            ('mandates', '_extract_mandates_from_agents', (), ('agents',)),
+            ('repository', '_extract_repository', (fonds,), ()),
+            ('creator_shortcuts', '_build_creator_shortcuts', (), ('agents', 'activities')),
+            ('temporal_relations', '_build_temporal_relations', (), ()),
+        ]
+        if self._delta_since is None:
+            # Needs every agent in the fonds; left to full extractions
+            phases.append(('equivalence_candidates', '_build_equivalence_candidates', (), ('agents',)))
+        
+        # Phase 5: Spectrum/GRAP extraction: one chunk-major pass, or one phase
+        # per cache so the tables are fetched concurrently
+        if self.phase_workers == 1:
+            phases.append(('spectrum_grap', '_extract_mapped', (self.SPECTRUM_MAPPINGS,), ()))
+        else:
+            by_cache = {}
+            for mapping in self.SPECTRUM_MAPPINGS:
+                by_cache.setdefault(mapping.cache, []).append(mapping)
+            for cache, mappings in by_cache.items():
+                phases.append((cache, '_extract_mapped', (mappings,), ()))
+        
+        if self.cultures:
+            # Adds literals to the nodes of every other phase
+            phases.append(('translations', '_extract_translations', (), tuple(p[0] for p in phases)))
+        
+        self._run_phases(phases)
+        
+        if self.connection_error is not None:
+            # A phase warned and carried on, so the graph would be incomplete; fail
+            # before claiming shared entities so a retry still writes them
+            raise self.connection_error
+        self._drop_id_table()
+        self._claim_shared_entities()
+    
+    def _run_phase(self, phase: str, method, *args):
+        """Run one extraction phase and append its timings and fetch totals to phase_stats.
+        
+        Rows, queries and database time come from the chunk_stats entries the
+        phase added. With profile on, the approximate bytes fetched and the
+        traced peak memory above the phase's starting point are included too.
+        """
+        first_chunk = len(self.chunk_stats)
+        if self.profile:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            chunks = self.chunk_stats[first_chunk:]
+            entry = {
+                'phase': phase,
+                'seconds': round(time.perf_counter() - started, 4),
+                'db_seconds': round(sum(chunk['seconds'] for chunk in chunks), 4),
+                'queries': len(chunks),
+                'rows': sum(chunk['rows'] for chunk in chunks),
+            }
+            if self.profile:
+                entry['bytes'] = sum(chunk.get('bytes', 0) for chunk in chunks)
+                entry['peak_memory_kb'] = max(0, tracemalloc.get_traced_memory()[1] - baseline) // 1024
+            self.phase_stats.append(entry)
+    
+    # Per-phase state of a phase view, never copied back to the extractor
+    PHASE_VIEW_ATTRIBUTES = frozenset({
+        'connection', 'cursor', '_id_table_loaded', 'connection_error',
+        'relations', 'chunk_stats', 'phase_stats',
+    })
+    
+    def _run_phases(self, phases: List[Tuple[str, str, tuple, Tuple[str, ...]]]):
+        """Run (phase, method name, args, dependencies) steps after the records are in.
+        
+        With phase_workers 1 the phases run in list order on this connection.
+        Otherwise each phase starts once the phases it needs are merged, up to
+        phase_workers at a time, in a thread on a shallow copy of the
+        extractor (see _phase_view) with its own pooled connection. Results
+        are merged strictly in list order, so the graph, relation order and
+        stats match a serial run, and wall time tends towards the slowest
+        chain of phases rather than the sum. Phases write disjoint caches;
+        peak memory under --profile covers whatever overlapped a phase. The
+        first failing phase's error is raised once the running ones finish.
+        """
+        if self.phase_workers == 1:
+            for phase, method, args, _ in phases:
+                self._run_phase(phase, getattr(self, method), *args)
+            return
+        
+        waiting = list(range(len(phases)))
+        running = {}
+        finished = {}
+        merged = set()
+        next_merge = 0
+        errors = {}
+        with ThreadPoolExecutor(max_workers=self.phase_workers,
+                                thread_name_prefix='ric-phase') as executor:
+            while next_merge < len(phases):
+                if not errors:
+                    for index in list(waiting):
+                        if len(running) == self.phase_workers:
+                            break
+                        phase, method, args, needs = phases[index]
+                        if merged.issuperset(needs):
+                            waiting.remove(index)
+                            session = self._phase_pool.acquire()
+                            view, snapshot = self._phase_view(session)
+                            future = executor.submit(view._run_phase, phase, getattr(view, method), *args)
+                            running[future] = (index, view, snapshot, session)
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, view, snapshot, session = running.pop(future)
+                    session['id_table_loaded'] = view._id_table_loaded
+                    self._phase_pool.release(session)
+                    if future.exception() is not None:
+                        errors[index] = future.exception()
+                    else:
+                        finished[index] = (view, snapshot)
+                while next_merge in finished:
+                    self._merge_phase_view(*finished.pop(next_merge))
+                    merged.add(phases[next_merge][0])
+                    next_merge += 1
+        if errors:
+            raise errors[min(errors)]
+    
+    def _open_phase_session(self) -> Dict:
+        """A pooled phase connection with its cursor and whether it holds the ID temp table."""
+        connection = self._open_connection()
+        return {'connection': connection, 'cursor': connection.cursor(dictionary=True),
+                'id_table_loaded': False}
+    
+    def _phase_session_alive(self, session: Dict) -> bool:
+        return self.db.is_alive(session['connection'])
+    
+    @staticmethod
+    def _close_phase_session(session: Dict):
+        """Close a pooled phase connection; one that is already dead is just dropped."""
+        try:
+            session['cursor'].close()
+            session['connection'].close()
+        except Error:
+            pass
+    
+    def _phase_view(self, session: Dict):
+        """A shallow copy of the extractor for one concurrent phase, and its attributes before the phase.
+        
+        The view shares every entity cache with the extractor but has its
+        own connection, temp-table flag, relation index and stats.
+        """
+        view = copy.copy(self)
+        snapshot = dict(view.__dict__)
+        view.connection = session['connection']
+        view.cursor = session['cursor']
+        view._id_table_loaded = session['id_table_loaded']
+        view.connection_error = None
+        view.relations = RelationIndex()
+        view.chunk_stats = []
+        view.phase_stats = []
+        return view, snapshot
+    
+    def _merge_phase_view(self, view: 'RiCExtractor', snapshot: Dict):
+        """Fold a finished phase view back in: rebound attributes, relations, stats and transient errors."""
+        for name, value in view.__dict__.items():
+            if name not in self.PHASE_VIEW_ATTRIBUTES and value is not snapshot.get(name):
+                setattr(self, name, value)
+        self.relations.merge(view.relations)
+        self.chunk_stats.extend(view.chunk_stats)
+        self.phase_stats.extend(view.phase_stats)
+        if view.connection_error is not None:
+            self.connection_error = view.connection_error
+    
+    def _claim_shared_entities(self):
+        """Mark shared entities another fonds in this run has already written."""
+        if self.registry is None:
+            return
+        for kind in EntityRegistry.KINDS:
+            if kind == 'repositories':
+                entities = [self.repository] if self.repository else []
+            else:
+                entities = getattr(self, kind).values()
+            uris = [entity['@id'] for entity in entities]
+            if uris:
+                self._shared_refs.update(self.registry.claim(kind, uris))
+    
+    def _extract_records(self, fonds: Dict):
+        """Extract the fonds and all its descendants using the configured strategy."""
+        lft, rgt = fonds['lft'], fonds['rgt']
+        has_bounds = lft is not None and rgt is not None and rgt > lft
+        
+        if self.hierarchy_strategy == 'nested-set' and not has_bounds:
+            raise ValueError(f"Fonds {fonds['id']} has no usable lft/rgt bounds; "
+                             f"rebuild the nested set or use --hierarchy recursive")
+        
+        if has_bounds and self.hierarchy_strategy != 'recursive':
+            self._record_bounds = (lft, rgt)
+            self._extract_records_by_range(lft, rgt)
+        else:
+            self._extract_records_by_parent(fonds['id'])
+    
+    def _extract_records_by_range(self, lft: int, rgt: int):
+        """Single range scan over the nested-set columns (descendants sit inside the fonds' lft/rgt)."""
+        query = """
+            SELECT 
+                io.id, io.parent_id, io.identifier, io.repository_id, io.lft, io.rgt,
+                ioi.title, ioi.scope_and_content, ioi.arrangement,
+                ioi.extent_and_medium, ioi.archival_history, ioi.acquisition,
+                ioi.appraisal, ioi.accruals, ioi.physical_characteristics,
+                ioi.finding_aids, ioi.location_of_originals, ioi.location_of_copies,
+                ioi.related_units_of_description, ioi.rules,
+                io.level_of_description_id, io.source_culture
+            FROM information_object io
+            JOIN information_object_i18n ioi ON io.id = ioi.id 
+                AND ioi.culture = COALESCE(io.source_culture, 'en')
+            WHERE io.lft >= %s AND io.rgt <= %s
+            ORDER BY io.lft
+        """
+        for row in self._timed_fetch('records', 1, 1, 1, query, (lft, rgt)):
+            self._add_record(row)
     
     def _extract_records_by_parent(self, fonds_id: int):
         query = """
@@ -240,75 +2188,296 @@ class RiCExtractor:
                 ioi.appraisal, ioi.accruals, ioi.physical_characteristics,
                 ioi.finding_aids, ioi.location_of_originals, ioi.location_of_copies,
                 ioi.related_units_of_description, ioi.rules,
-                ti.name as level_of_description, h.source_culture
+                h.level_of_description_id, h.source_culture
             FROM hierarchy h
             JOIN information_object_i18n ioi ON h.id = ioi.id 
                 AND ioi.culture = COALESCE(h.source_culture, 'en')
-            LEFT JOIN term_i18n ti ON h.level_of_description_id = ti.id AND ti.culture = 'en'
         """
-        self.cursor.execute(query, (fonds_id,))
+        for row in self._timed_fetch('records', 1, 1, 1, query, (fonds_id,)):
+            self._add_record(row)
+    
+    def _level(self, row) -> str:
+        """Lower-cased level of description of a record or structure row ('item' when unset)."""
+        return (self.terms.name(row['level_of_description_id']) or 'item').lower()
+    
+    def _add_record(self, row: Dict):
+        level = self._level(row)
+        ric_type = self.LEVEL_TO_RIC.get(level, 'RecordSet')
         
-        for row in self.cursor.fetchall():
-            level = (row['level_of_description'] or 'item').lower()
-            ric_type = self.LEVEL_TO_RIC.get(level, 'RecordSet')
-            
-            record = {
-                '@id': self.mint_uri(ric_type, row['id']),
-                '@type': f'rico:{ric_type}',
-                'rico:identifier': row['identifier'],
-                'rico:title': row['title'],
-                'rico:scopeAndContent': row['scope_and_content'],
-                'rico:arrangement': row['arrangement'],
-                'rico:extentAndMedium': row['extent_and_medium'],
-                'rico:history': row['archival_history'],
-                'rico:conditionsOfAccess': row['physical_characteristics'],
-                'rico:findingAids': row['finding_aids'],
-                '_parent_id': row['parent_id'],
-                '_repository_id': row['repository_id'],
-                '_db_id': row['id'],
-                '_lft': row['lft'],
-                '_rgt': row['rgt'],
-                '_rules_text': row['rules'],
-                '_level': level,
-            }
-            
-            if row['location_of_originals']:
-                record['rico:locationOfOriginals'] = row['location_of_originals']
-            if row['location_of_copies']:
-                record['rico:locationOfCopies'] = row['location_of_copies']
-                
-            self.records[row['id']] = record
+        record = {
+            '@id': self.mint_uri(ric_type, row['id']),
+            '@type': f'rico:{ric_type}',
+            'rico:identifier': row['identifier'],
+            'rico:title': row['title'],
+            'rico:scopeAndContent': row['scope_and_content'],
+            'rico:arrangement': row['arrangement'],
+            'rico:extentAndMedium': row['extent_and_medium'],
+            'rico:history': row['archival_history'],
+            'rico:conditionsOfAccess': row['physical_characteristics'],
+            'rico:findingAids': row['finding_aids'],
+        }
+        
+        if row['location_of_originals']:
+            record['rico:locationOfOriginals'] = row['location_of_originals']
+        if row['location_of_copies']:
+            record['rico:locationOfCopies'] = row['location_of_copies']
             
-            parent_id = row['parent_id']
-            if parent_id not in self.record_order:
-                self.record_order[parent_id] = []
-            self.record_order[parent_id].append((row['lft'], row['id']))
+        self.records[row['id']] = self._compact(record)
+        self.record_info[row['id']] = RecordInfo(
+            row['parent_id'], row['repository_id'], row['lft'], row['rgt'], row['rules'], level,
+        )
+        
+        parent_id = row['parent_id']
+        if parent_id not in self.record_order:
+            self.record_order[parent_id] = []
+        self.record_order[parent_id].append((row['lft'], row['id']))
     
-    def _extract_agents_by_records(self):
-        if not self.records:
-            return
-            
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
+    # ==================== INCREMENTAL (DELTA) EXTRACTION ====================
+    
+    # Each query returns the IDs of descriptions inside the fonds' lft/rgt range
+    # whose own row, or a row linked to them, was modified after the watermark.
+    CHANGE_SOURCES = [
+        ('descriptions', """
+            SELECT io.id FROM information_object io
+            JOIN object o ON o.id = io.id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+        ('events', """
+            SELECT io.id FROM event e
+            JOIN object o ON o.id = e.id
+            JOIN information_object io ON io.id = e.object_id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+        ('agents', """
+            SELECT io.id FROM event e
+            JOIN object o ON o.id = e.actor_id
+            JOIN information_object io ON io.id = e.object_id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+        ('access_points', """
+            SELECT io.id FROM object_term_relation otr
+            JOIN object o ON o.id = otr.id
+            JOIN information_object io ON io.id = otr.object_id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+        ('terms', """
+            SELECT io.id FROM object_term_relation otr
+            JOIN object o ON o.id = otr.term_id
+            JOIN information_object io ON io.id = otr.object_id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+        ('digital_objects', """
+            SELECT io.id FROM digital_object d
+            JOIN object o ON o.id = d.id
+            JOIN information_object io ON io.id = d.object_id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+        ('relations', """
+            SELECT io.id FROM relation r
+            JOIN object o ON o.id = r.id
+            JOIN information_object io ON io.id = r.subject_id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+        ('rights', """
+            SELECT io.id FROM rights_record rr
+            JOIN object o ON o.id = rr.rights_id
+            JOIN information_object io ON io.id = rr.object_id
+            WHERE io.lft >= %s AND io.rgt <= %s AND o.updated_at > %s
+        """),
+    ]
+    
+    # Spectrum/GRAP tables are not QubitObjects; they carry their own timestamps
+    SPECTRUM_CHANGE_TABLES = [
+        ('spectrum_condition_check', 'object_id'),
+        ('spectrum_valuation', 'object_id'),
+        ('spectrum_loan_out', 'object_id'),
+        ('spectrum_movement', 'object_id'),
+        ('grap_heritage_asset', 'object_id'),
+        ('spectrum_grap_data', 'information_object_id'),
+    ]
+    
+    def _change_column(self, table: str) -> Optional[str]:
+        """SQL expression for a table's last-modified time, from whichever of updated_at/created_at exist."""
+        self.cursor.execute("""
+            SELECT COLUMN_NAME AS name FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+              AND COLUMN_NAME IN ('updated_at', 'created_at')
+        """, (table,))
+        columns = {row['name'] for row in self.cursor.fetchall()}
+        if {'updated_at', 'created_at'} <= columns:
+            return 'COALESCE(t.updated_at, t.created_at)'
+        if columns:
+            return f"t.{columns.pop()}"
+        return None
+    
+    def _find_changed_record_ids(self, lft: int, rgt: int, since: str) -> set:
+        changed = set()
+
+        params = (lft, rgt, since)
+        
+        for label, query in self.CHANGE_SOURCES:
+            try:
+                rows = self._timed_fetch(f'changes:{label}', 1, 1, 0, query, params)
+                changed.update(row['id'] for row in rows)
+            except Exception as e:
+                print(f"Warning: Could not check {label} for changes: {e}")
         
+        for table, key in self.SPECTRUM_CHANGE_TABLES:
+            try:
+                column = self._change_column(table)
+                if not column:
+                    continue
+                query = f"""
+                    SELECT io.id FROM {table} t
+                    JOIN information_object io ON io.id = t.{key}
+                    WHERE io.lft >= %s AND io.rgt <= %s AND {column} > %s
+                """
+                rows = self._timed_fetch(f'changes:{table}', 1, 1, 0, query, params)
+                changed.update(row['id'] for row in rows)
+            except Exception as e:
+                print(f"Warning: Could not check {table} for changes: {e}")
+        
+        return changed
+    
+    def _fetch_structure(self, column: str, ids, lft: int, rgt: int) -> List[Dict]:
+        """Position rows (no text) for descriptions in the fonds matched on id or parent_id."""
         query = f"""
+            SELECT io.id, io.parent_id, io.lft, io.level_of_description_id
+            FROM information_object io
+            WHERE io.lft >= %s AND io.rgt <= %s AND io.{column} IN ({{ids}})
+        """
+        return list(self._fetch_by_ids(f'structure:{column}', query, sorted(ids), (lft, rgt)))
+    
+    def _extract_changed_records(self, fonds: Dict, since: str):
+        """Extract only descriptions touched since the watermark.
+        
+        A change to a description, its events, agents, access points, digital
+        objects, related-material links, rights or Spectrum/GRAP rows marks it
+        as changed. Its parent
+        and adjacent siblings are re-extracted too so rico:includes and
+        rico:precedes/follows stay correct; the surrounding hierarchy is
+        loaded as position-only context so relations to unchanged neighbours
+        can be minted without extracting them. Deletions are not detected and
+        still need a full extraction.
+        """
+        lft, rgt = fonds['lft'], fonds['rgt']
+        if lft is None or rgt is None or rgt <= lft:
+            print(f"Warning: fonds {fonds['id']} has no usable lft/rgt bounds; extracting in full")
+            self._delta_since = None
+            self._extract_records(fonds)
+            return
+        
+        self._delta_bounds = (lft, rgt)
+        changed = self._find_changed_record_ids(lft, rgt, since)
+        self.changed_record_ids = changed
+        if not changed:
+            return
+        
+        changed_rows = self._fetch_structure('id', changed, lft, rgt)
+        parent_ids = {row['parent_id'] for row in changed_rows}
+        parent_rows = self._fetch_structure('id', parent_ids, lft, rgt)
+        sibling_rows = self._fetch_structure('parent_id', parent_ids, lft, rgt)
+        
+        siblings = defaultdict(list)
+        for row in sibling_rows:
+            siblings[row['parent_id']].append((row['lft'], row['id']))
+        
+        extract_ids = set(changed) | {row['id'] for row in parent_rows}
+        for group in siblings.values():
+            group.sort()
+            for i, (_, record_id) in enumerate(group):
+                if record_id in changed:
+                    if i > 0:
+                        extract_ids.add(group[i - 1][1])
+                    if i + 1 < len(group):
+                        extract_ids.add(group[i + 1][1])
+        
+        query = """
+            SELECT 
+                io.id, io.parent_id, io.identifier, io.repository_id, io.lft, io.rgt,
+                ioi.title, ioi.scope_and_content, ioi.arrangement,
+                ioi.extent_and_medium, ioi.archival_history, ioi.acquisition,
+                ioi.appraisal, ioi.accruals, ioi.physical_characteristics,
+                ioi.finding_aids, ioi.location_of_originals, ioi.location_of_copies,
+                ioi.related_units_of_description, ioi.rules,
+                io.level_of_description_id, io.source_culture
+            FROM information_object io
+            JOIN information_object_i18n ioi ON io.id = ioi.id 
+                AND ioi.culture = COALESCE(io.source_culture, 'en')
+            WHERE io.id IN ({ids})
+        """
+        rows = list(self._fetch_by_ids('records', query, sorted(extract_ids)))
+        for row in sorted(rows, key=lambda r: r['lft']):
+            self._add_record(row)
+        
+        # Context: children of every extracted description, and the parents' siblings
+        grandparent_ids = {row['parent_id'] for row in parent_rows}
+        context_rows = sibling_rows + self._fetch_structure(
+            'parent_id', (extract_ids | grandparent_ids) - parent_ids, lft, rgt)
+        for row in context_rows:
+            if row['id'] in self.records or row['id'] in self._context_records:
+                continue
+            level = self._level(row)
+            ric_type = self.LEVEL_TO_RIC.get(level, 'RecordSet')
+            self._context_records[row['id']] = (row['parent_id'], self.mint_uri(ric_type, row['id']))
+            self.record_order.setdefault(row['parent_id'], []).append((row['lft'], row['id']))
+    
+    def _record_uri(self, record_id) -> Optional[str]:
+        record = self.records.get(record_id)
+        if record:
+            return record['@id']
+        context = self._context_records.get(record_id)
+        return context[1] if context else None
+    
+    def build_replace_update(self, subjects: List[str], batch_size: int = 500) -> str:
+        """SPARQL Update removing the current triples of subjects about to be reloaded.
+        
+        Blank-node values (names, date ranges, extents) are removed with their
+        subject. rico:isEquivalentTo is kept for deltas, which do not rebuild it.
+        """
+        keep = "\n  FILTER (?p != rico:isEquivalentTo)" if self._delta_since is not None else ""
+        operations = []
+        for i in range(0, len(subjects), batch_size):
+            values = ' '.join(f'<{subject}>' for subject in subjects[i:i + batch_size])
+            operations.append(
+                "DELETE { ?s ?p ?o . ?o ?p2 ?o2 . ?o2 ?p3 ?o3 }\n"
+                "WHERE {\n"
+                f"  VALUES ?s {{ {values} }}\n"
+                f"  ?s ?p ?o .{keep}\n"
+                "  OPTIONAL { ?o ?p2 ?o2 . FILTER (isBlank(?o))\n"
+                "    OPTIONAL { ?o2 ?p3 ?o3 . FILTER (isBlank(?o2)) } }\n"
+                "}"
+            )
+        prologue = f"PREFIX rico: <{self.JSONLD_CONTEXT['rico']}>\n"
+        return prologue + ' ;\n'.join(operations) + '\n'
+    
+    AGENT_SELECT = """
             SELECT DISTINCT
                 a.id, a.entity_type_id,
                 ai.authorized_form_of_name, ai.dates_of_existence,
                 ai.history, ai.places, ai.legal_status,
                 ai.functions, ai.mandates, ai.internal_structures,
-                ai.general_context, ti.name as entity_type
+                ai.general_context
             FROM actor a
-            JOIN actor_i18n ai ON a.id = ai.id AND ai.culture = 'en'
-            LEFT JOIN term_i18n ti ON a.entity_type_id = ti.id AND ti.culture = 'en'
+            JOIN actor_i18n ai ON a.id = ai.id AND ai.culture = COALESCE(a.source_culture, 'en')
+    """
+    
+    def _extract_agents_by_records(self):
+        if not self.records:
+            return
+        
+        if self.registry is None:
+            query = self.AGENT_SELECT + """
             WHERE a.id IN (
-                SELECT DISTINCT actor_id FROM event WHERE object_id IN ({placeholders})
+                SELECT DISTINCT actor_id FROM event WHERE object_id IN ({ids})
             )
         """
-        self.cursor.execute(query, record_ids)
+            rows = self._fetch_for_records('agents', query)
+        else:
+            rows = self._fetch_agents_cached()
         
-        for row in self.cursor.fetchall():
-            entity_type = (row['entity_type'] or 'person').lower()
+        for row in rows:
+            entity_type = (self.terms.name(row['entity_type_id']) or 'person').lower()
             ric_type = self.ACTOR_TYPE_TO_RIC.get(entity_type, 'Agent')
             
             agent = {
@@ -319,10 +2488,6 @@ class RiCExtractor:
                     'rico:textualValue': row['authorized_form_of_name'],
                 },
                 'rico:history': row['history'],
-                '_db_id': row['id'],
-                '_name': row['authorized_form_of_name'],
-                '_mandates_text': row['mandates'],
-                '_functions_text': row['functions'],
             }
             
             if row['dates_of_existence']:
@@ -330,28 +2495,42 @@ class RiCExtractor:
             if row['legal_status']:
                 agent['rico:hasOrHadLegalStatus'] = row['legal_status']
                 
-            self.agents[row['id']] = agent
+            self.agents[row['id']] = self._compact(agent)
+            self.agent_info[row['id']] = AgentInfo(
+                row['authorized_form_of_name'], row['mandates'], row['functions'],
+            )
+        
+        # Keep agent order independent of how the record IDs were batched
+        self.agents = dict(sorted(self.agents.items()))
+    
+    def _fetch_agents_cached(self) -> List[Dict]:
+        """Agent rows for the extracted records, querying only actors not yet seen this run."""
+        actor_ids = {
+            row['actor_id'] for row in self._fetch_for_records('agent_ids', """
+                SELECT DISTINCT actor_id FROM event
+                WHERE object_id IN ({ids}) AND actor_id IS NOT NULL
+            """)
+        }
+        missing = sorted(actor_id for actor_id in actor_ids if actor_id not in self._agent_rows)
+        if missing:
+            for row in self._fetch_by_ids('agents', self.AGENT_SELECT + " WHERE a.id IN ({ids})", missing):
+                self._agent_rows[row['id']] = row
+        return [self._agent_rows[actor_id] for actor_id in sorted(actor_ids) if actor_id in self._agent_rows]
     
     def _extract_activities_by_records(self):
         if not self.records:
             return
             
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
+        query = """
             SELECT 
                 e.id, e.object_id, e.actor_id, e.start_date, e.end_date,
-                ei.date as date_display, ei.description, ti.name as event_type
+                ei.date as date_display, ei.description, e.type_id
             FROM event e
             LEFT JOIN event_i18n ei ON e.id = ei.id AND ei.culture = 'en'
-            LEFT JOIN term_i18n ti ON e.type_id = ti.id AND ti.culture = 'en'
-            WHERE e.object_id IN ({placeholders})
+            WHERE e.object_id IN ({ids})
         """
-        self.cursor.execute(query, record_ids)
-        
-        for row in self.cursor.fetchall():
-            event_type = (row['event_type'] or 'creation').lower()
+        for row in self._fetch_for_records('activities', query):
+            event_type = (self.terms.name(row['type_id']) or 'creation').lower()
             ric_activity_type = self.EVENT_TYPE_TO_RIC.get(event_type, 'Activity')
             
             record = self.records.get(row['object_id'])
@@ -363,9 +2542,6 @@ class RiCExtractor:
                     '@type': f'rico:{ric_activity_type}',
                     'rico:hasActivityType': event_type.title(),
                     'rico:resultsOrResultedIn': {'@id': record['@id']},
-                    '_event_type': event_type,
-                    '_record_id': row['object_id'],
-                    '_agent_id': row['actor_id'],
                 }
                 
                 if agent:
@@ -385,37 +2561,28 @@ class RiCExtractor:
                     activity['rico:descriptiveNote'] = row['description']
                     
                 self.activities[row['id']] = activity
+                self.activity_info[row['id']] = ActivityInfo(event_type, row['object_id'], row['actor_id'])
     
     def _extract_access_points(self):
         if not self.records:
             return
             
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
-            SELECT 
-                otr.object_id, otr.term_id, t.taxonomy_id,
-                ti.name as term_name, taxi.name as taxonomy_name
+        query = """
+            SELECT otr.object_id, otr.term_id
             FROM object_term_relation otr
-            JOIN term t ON otr.term_id = t.id
-            JOIN term_i18n ti ON t.id = ti.id AND ti.culture = 'en'
-            JOIN taxonomy tax ON t.taxonomy_id = tax.id
-            JOIN taxonomy_i18n taxi ON tax.id = taxi.id AND taxi.culture = 'en'
-            WHERE otr.object_id IN ({placeholders})
+            WHERE otr.object_id IN ({ids})
         """
-        self.cursor.execute(query, record_ids)
-        
         first_subject = {}
         
-        for row in self.cursor.fetchall():
+        for row in self._fetch_for_records('access_points', query):
             record = self.records.get(row['object_id'])
-            if not record:
+            term = self.terms.lookup(row['term_id'])
+            if not record or term is None:
                 continue
                 
-            taxonomy_name = (row['taxonomy_name'] or '').lower()
+            term_name, taxonomy_name = term
+            taxonomy_name = (taxonomy_name or '').lower()
             term_id = row['term_id']
-            term_name = row['term_name']
             
             if 'subject' in taxonomy_name:
                 if term_id not in self.subjects:
@@ -426,20 +2593,11 @@ class RiCExtractor:
                             '@type': 'rico:Name',
                             'rico:textualValue': term_name,
                         },
-                        '_name': term_name,
                     }
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': self.subjects[term_id]['@id'],
-                    'predicate': 'rico:hasOrHadSubject',
-                })
+                self.relations.add(record['@id'], 'rico:hasOrHadSubject', self.subjects[term_id]['@id'])
                 if row['object_id'] not in first_subject:
                     first_subject[row['object_id']] = term_id
-                    self.relations.append({
-                        'from': record['@id'],
-                        'to': self.subjects[term_id]['@id'],
-                        'predicate': 'rico:hasOrHadMainSubject',
-                    })
+                    self.relations.add(record['@id'], 'rico:hasOrHadMainSubject', self.subjects[term_id]['@id'])
                 
             elif 'place' in taxonomy_name:
                 if term_id not in self.places:
@@ -450,13 +2608,8 @@ class RiCExtractor:
                             '@type': 'rico:PlaceName',
                             'rico:textualValue': term_name,
                         },
-                        '_name': term_name,
                     }
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': self.places[term_id]['@id'],
-                    'predicate': 'rico:hasOrHadPlaceOfOrigin',
-                })
+                self.relations.add(record['@id'], 'rico:hasOrHadPlaceOfOrigin', self.places[term_id]['@id'])
                 
             elif 'genre' in taxonomy_name or 'type' in taxonomy_name:
                 if term_id not in self.genres:
@@ -468,31 +2621,20 @@ class RiCExtractor:
                             'rico:textualValue': term_name,
                         },
                     }
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': self.genres[term_id]['@id'],
-                    'predicate': 'rico:hasOrHadContentOfType',
-                })
+                self.relations.add(record['@id'], 'rico:hasOrHadContentOfType', self.genres[term_id]['@id'])
     
     def _extract_digital_objects(self):
         if not self.records:
             return
             
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
+        query = """
             SELECT 
                 do.id, do.object_id, do.usage_id,
-                do.mime_type, do.byte_size, do.name,
-                ti.name as usage_type
+                do.mime_type, do.byte_size, do.name
             FROM digital_object do
-            LEFT JOIN term_i18n ti ON do.usage_id = ti.id AND ti.culture = 'en'
-            WHERE do.object_id IN ({placeholders})
+            WHERE do.object_id IN ({ids})
         """
-        self.cursor.execute(query, record_ids)
-        
-        for row in self.cursor.fetchall():
+        for row in self._fetch_for_records('digital_objects', query):
             record = self.records.get(row['object_id'])
             if not record:
                 continue
@@ -520,69 +2662,75 @@ class RiCExtractor:
                 }
                 
             self.instantiations[row['id']] = instantiation
-            self.relations.append({
-                'from': record['@id'],
-                'to': instantiation['@id'],
-                'predicate': 'rico:hasInstantiation',
-            })
+            self.relations.add(record['@id'], 'rico:hasInstantiation', instantiation['@id'])
     
     def _extract_related_materials(self):
         if not self.records:
             return
             
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
-            SELECT r.id, r.subject_id, r.object_id, r.type_id, ti.name as relation_type
+        query = """
+            SELECT r.id, r.subject_id, r.object_id, r.type_id
             FROM relation r
-            LEFT JOIN term_i18n ti ON r.type_id = ti.id AND ti.culture = 'en'
-            WHERE r.subject_id IN ({placeholders}) OR r.object_id IN ({placeholders})
+            WHERE r.subject_id IN ({ids})
         """
-        self.cursor.execute(query, record_ids + record_ids)
-        
-        for row in self.cursor.fetchall():
+        unextracted = []
+        for row in self._fetch_for_records('related_materials', query):
             subject_record = self.records.get(row['subject_id'])
             object_record = self.records.get(row['object_id'])
             
             if subject_record and object_record:
-                self.relations.append({
-                    'from': subject_record['@id'],
-                    'to': object_record['@id'],
-                    'predicate': 'rico:isAssociatedWith',
-                    'note': row['relation_type'],
-                })
+                self.relations.add(subject_record['@id'], 'rico:isAssociatedWith', object_record['@id'])
+            elif subject_record and self._delta_bounds:
+                unextracted.append(row)
+        
+        # Incremental extractions: the related description may be an unchanged one in the same fonds
+        if unextracted:
+            targets = {
+                row['id']: row for row in
+                self._fetch_structure('id', {r['object_id'] for r in unextracted}, *self._delta_bounds)
+            }
+            for row in unextracted:
+                target = targets.get(row['object_id'])
+                if target:
+                    level = self._level(target)
+                    target_uri = self.mint_uri(self.LEVEL_TO_RIC.get(level, 'RecordSet'), target['id'])
+                    self.relations.add(self.records[row['subject_id']]['@id'], 'rico:isAssociatedWith', target_uri)
+    
+    @staticmethod
+    def _rights_note(row) -> Optional[str]:
+        """Combined rights_i18n notes of a rights row, or None when all are empty."""
+        notes = []
+        if row['rights_note']: notes.append(row['rights_note'])
+        if row['copyright_note']: notes.append(row['copyright_note'])
+        if row['license_terms']: notes.append(f"License: {row['license_terms']}")
+        if row['statute_note']: notes.append(f"Statute: {row['statute_note']}")
+        return '; '.join(notes) or None
     
     def _extract_rights_and_rules(self):
         if not self.records:
             return
             
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
+        query = """
             SELECT 
                 r.id, r.start_date, r.end_date, r.basis_id,
                 r.copyright_status_id, r.copyright_jurisdiction,
                 ri.rights_note, ri.copyright_note, ri.license_terms,
                 ri.statute_jurisdiction, ri.statute_note,
-                rr.object_id, tb.name as basis_name, ts.name as status_name
+                rr.object_id
             FROM rights r
-            JOIN rights_i18n ri ON r.id = ri.id AND ri.culture = 'en'
+            JOIN rights_i18n ri ON r.id = ri.id AND ri.culture = COALESCE(r.source_culture, 'en')
             JOIN rights_record rr ON r.id = rr.rights_id
-            LEFT JOIN term_i18n tb ON r.basis_id = tb.id AND tb.culture = 'en'
-            LEFT JOIN term_i18n ts ON r.copyright_status_id = ts.id AND ts.culture = 'en'
-            WHERE rr.object_id IN ({placeholders})
+            WHERE rr.object_id IN ({ids})
         """
         try:
-            self.cursor.execute(query, record_ids)
-            
-            for row in self.cursor.fetchall():
+            for row in self._fetch_for_records('rights_and_rules', query):
                 record = self.records.get(row['object_id'])
                 if not record:
                     continue
                 
-                basis = (row['basis_name'] or 'other').lower()
+                basis_name = self.terms.name(row['basis_id'])
+                status_name = self.terms.name(row['copyright_status_id'])
+                basis = (basis_name or 'other').lower()
                 rule_type = 'Rule'
                 if 'copyright' in basis:
                     rule_type = 'CopyrightRule'
@@ -594,16 +2742,12 @@ class RiCExtractor:
                 rule = {
                     '@id': self.mint_uri('rule', row['id']),
                     '@type': f'rico:{rule_type}',
-                    'rico:ruleType': row['basis_name'] or 'Unspecified',
+                    'rico:ruleType': basis_name or 'Unspecified',
                 }
                 
-                notes = []
-                if row['rights_note']: notes.append(row['rights_note'])
-                if row['copyright_note']: notes.append(row['copyright_note'])
-                if row['license_terms']: notes.append(f"License: {row['license_terms']}")
-                if row['statute_note']: notes.append(f"Statute: {row['statute_note']}")
-                if notes:
-                    rule['rico:descriptiveNote'] = '; '.join(notes)
+                note = self._rights_note(row)
+                if note:
+                    rule['rico:descriptiveNote'] = note
                 
                 jurisdiction = row['copyright_jurisdiction'] or row['statute_jurisdiction']
                 if jurisdiction:
@@ -616,20 +2760,16 @@ class RiCExtractor:
                         'rico:endDate': str(row['end_date']) if row['end_date'] else None,
                     }
                 
-                if row['status_name']:
-                    rule['rico:hasStatus'] = row['status_name']
+                if status_name:
+                    rule['rico:hasStatus'] = status_name
                 
                 self.rules[row['id']] = rule
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': rule['@id'],
-                    'predicate': 'rico:isOrWasRegulatedBy',
-                })
+                self.relations.add(record['@id'], 'rico:isOrWasRegulatedBy', rule['@id'])
         except Exception as e:
             print(f"Warning: Could not extract rights: {e}")
         
         for record_id, record in self.records.items():
-            rules_text = record.get('_rules_text')
+            rules_text = self.record_info[record_id].rules_text
             if rules_text:
                 rule_id = f"text_{record_id}"
                 rule = {
@@ -639,11 +2779,7 @@ class RiCExtractor:
                     'rico:descriptiveNote': rules_text,
                 }
                 self.rules[rule_id] = rule
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': rule['@id'],
-                    'predicate': 'rico:isDescribedBy',
-                })
+                self.relations.add(record['@id'], 'rico:isDescribedBy', rule['@id'])
     
     def _extract_functions(self):
         agent_ids = list(self.agents.keys())
@@ -654,16 +2790,17 @@ class RiCExtractor:
             SELECT 
                 fo.id, fo.type_id,
                 foi.authorized_form_of_name, foi.classification,
-                foi.dates, foi.description, foi.history, foi.legislation,
-                ti.name as function_type
+                foi.dates, foi.description, foi.history, foi.legislation
             FROM function_object fo
-            JOIN function_object_i18n foi ON fo.id = foi.id AND foi.culture = 'en'
-            LEFT JOIN term_i18n ti ON fo.type_id = ti.id AND ti.culture = 'en'
+            JOIN function_object_i18n foi ON fo.id = foi.id
+                AND foi.culture = COALESCE(fo.source_culture, 'en')
         """
         try:
-            self.cursor.execute(query)
+            # Not scoped to the fonds, so read the table once per run
+            if self._function_rows is None:
+                self._function_rows = list(self._timed_fetch('functions', 1, 1, 0, query, ()))
             
-            for row in self.cursor.fetchall():
+            for row in self._function_rows:
                 function = {
                     '@id': self.mint_uri('function', row['id']),
                     '@type': 'rico:Function',
@@ -683,998 +2820,1256 @@ class RiCExtractor:
                 if row['dates']:
                     function['rico:expressedDate'] = row['dates']
                     
-                self.functions[row['id']] = function
-        except Exception as e:
-            print(f"Warning: Could not extract functions: {e}")
-        
-        for agent_id, agent in self.agents.items():
-            functions_text = agent.get('_functions_text')
-            if functions_text:
-                func_id = f"agent_{agent_id}"
-                function = {
-                    '@id': self.mint_uri('function', func_id),
-                    '@type': 'rico:Function',
-                    'rico:descriptiveNote': functions_text,
-                }
-                self.functions[func_id] = function
-                self.relations.append({
-                    'from': agent['@id'],
-                    'to': function['@id'],
-                    'predicate': 'rico:hasOrHadFunction',
-                })
-    
-    def _extract_mandates_from_agents(self):
-        for agent_id, agent in self.agents.items():
-            mandates_text = agent.get('_mandates_text')
-            if mandates_text:
-                mandate = {
-                    '@id': self.mint_uri('mandate', agent_id),
-                    '@type': 'rico:Mandate',
-                    'rico:descriptiveNote': mandates_text,
-                }
-                self.mandates[agent_id] = mandate
-                self.relations.append({
-                    'from': agent['@id'],
-                    'to': mandate['@id'],
-                    'predicate': 'rico:isOrWasRegulatedBy',
-                })
-    
-    def _extract_repository(self, fonds_id: int):
-        query = """
-            SELECT 
-                r.id, ai.authorized_form_of_name, ai.history,
-                ci.contact_person, ci.street_address, ci.postal_code,
-                ci.country_code, ci.email, ci.website
-            FROM repository r
-            JOIN actor_i18n ai ON r.id = ai.id AND ai.culture = 'en'
-            LEFT JOIN contact_information ci ON r.id = ci.actor_id
-            JOIN information_object io ON io.repository_id = r.id
-            WHERE io.id = %s LIMIT 1
-        """
-        self.cursor.execute(query, (fonds_id,))
-        row = self.cursor.fetchone()
-        
-        if row:
-            self.repository = {
-                '@id': self.mint_uri('corporatebody', row['id']),
-                '@type': 'rico:CorporateBody',
-                'rico:hasAgentName': {
-                    '@type': 'rico:AgentName',
-                    'rico:textualValue': row['authorized_form_of_name'],
-                },
-                'rico:history': row['history'],
-                '_is_repository': True,
-                '_db_id': row['id'],
-            }
-            
-            address_parts = [p for p in [row['street_address'], row['postal_code'], row['country_code']] if p]
-            if address_parts:
-                self.repository['rico:hasOrHadLocation'] = {
-                    '@type': 'rico:Place',
-                    'rico:hasPlaceName': {
-                        '@type': 'rico:PlaceName',
-                        'rico:textualValue': ', '.join(address_parts),
-                    },
-                }
-                
-            contacts = []
-            if row['email']: contacts.append(f"Email: {row['email']}")
-            if row['website']: contacts.append(f"Website: {row['website']}")
-            if contacts:
-                self.repository['rico:descriptiveNote'] = '; '.join(contacts)
-    
-    def _build_creator_shortcuts(self):
-        for activity_id, activity in self.activities.items():
-            event_type = activity.get('_event_type', '')
-            record_id = activity.get('_record_id')
-            agent_id = activity.get('_agent_id')
-            
-            if not record_id or not agent_id:
-                continue
-                
-            record = self.records.get(record_id)
-            agent = self.agents.get(agent_id)
-            
-            if not record or not agent:
-                continue
-            
-            if event_type in ['creation', 'contribution', 'written']:
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': agent['@id'],
-                    'predicate': 'rico:hasCreator',
-                })
-            elif event_type in ['accumulation', 'collection']:
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': agent['@id'],
-                    'predicate': 'rico:hasAccumulator',
-                })
-    
-    def _build_temporal_relations(self):
-        for parent_id, children in self.record_order.items():
-            sorted_children = sorted(children, key=lambda x: x[0])
-            
-            for i in range(len(sorted_children) - 1):
-                current_id = sorted_children[i][1]
-                next_id = sorted_children[i + 1][1]
-                
-                current_record = self.records.get(current_id)
-                next_record = self.records.get(next_id)
-                
-                if current_record and next_record:
-                    self.relations.append({
-                        'from': current_record['@id'],
-                        'to': next_record['@id'],
-                        'predicate': 'rico:precedes',
-                    })
-                    self.relations.append({
-                        'from': next_record['@id'],
-                        'to': current_record['@id'],
-                        'predicate': 'rico:follows',
-                    })
-        
-        for record_id, record in self.records.items():
-            parent_id = record.get('_parent_id')
-            if parent_id and parent_id in self.records:
-                parent = self.records[parent_id]
-                self.relations.append({
-                    'from': parent['@id'],
-                    'to': record['@id'],
-                    'predicate': 'rico:includes',
-                })
-    
-    def _build_equivalence_candidates(self):
-        name_groups = defaultdict(list)
-        for agent_id, agent in self.agents.items():
-            name = agent.get('_name', '')
-            if name:
-                normalized = ''.join(c.lower() for c in name if c.isalnum() or c.isspace()).strip()
-                name_groups[normalized].append(agent)
-        
-        for normalized_name, agents in name_groups.items():
-            if len(agents) > 1:
-                for i in range(len(agents)):
-                    for j in range(i + 1, len(agents)):
-                        self.relations.append({
-                            'from': agents[i]['@id'],
-                            'to': agents[j]['@id'],
-                            'predicate': 'rico:isEquivalentTo',
-                            'note': 'name-match',
-                        })
-    
-    # ==================== PHASE 5: SPECTRUM/GRAP EXTRACTION ====================
-    
-    def _extract_condition_checks(self):
-        """Extract condition assessments from spectrum_condition_check."""
-        if not self.records:
-            return
-            
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
-            SELECT 
-                id, object_id, condition_reference, check_date, check_reason,
-                checked_by, overall_condition, condition_note, completeness_note,
-                hazard_note, technical_assessment, recommended_treatment,
-                treatment_priority, next_check_date, environment_recommendation,
-                handling_recommendation, display_recommendation, storage_recommendation,
-                packing_recommendation, photo_count, workflow_state, condition_rating,
-                material_type
-            FROM spectrum_condition_check
-            WHERE object_id IN ({placeholders})
-            ORDER BY check_date DESC
-        """
-        try:
-            self.cursor.execute(query, record_ids)
-            
-            for row in self.cursor.fetchall():
-                record = self.records.get(row['object_id'])
-                if not record:
-                    continue
-                
-                check_id = f"condition_{row['id']}"
-                activity = {
-                    '@id': self.mint_uri('activity', check_id),
-                    '@type': 'rico:Activity',
-                    'rico:hasActivityType': 'ConditionCheck',
-                    'rico:resultsOrResultedIn': {'@id': record['@id']},
-                    # Spectrum extensions
-                    'spectrum:conditionReference': row['condition_reference'],
-                    'spectrum:checkedBy': row['checked_by'],
-                    'spectrum:workflowState': row['workflow_state'],
-                }
-                
-                # Date
-                if row['check_date']:
-                    activity['rico:isOrWasAssociatedWithDate'] = {
-                        '@type': 'rico:DateRange',
-                        'rico:beginningDate': str(row['check_date']),
-                        'rico:expressedDate': str(row['check_date']),
-                    }
-                
-                # Condition rating
-                rating = row['overall_condition'] or row['condition_rating']
-                if rating:
-                    activity['spectrum:overallCondition'] = rating
-                
-                # Reason
-                if row['check_reason']:
-                    activity['spectrum:checkReason'] = row['check_reason']
-                
-                # Notes - combine into descriptive note
-                notes = []
-                if row['condition_note']: notes.append(f"Condition: {row['condition_note']}")
-                if row['completeness_note']: notes.append(f"Completeness: {row['completeness_note']}")
-                if row['hazard_note']: notes.append(f"Hazards: {row['hazard_note']}")
-                if row['technical_assessment']: notes.append(f"Technical: {row['technical_assessment']}")
-                if notes:
-                    activity['rico:descriptiveNote'] = ' | '.join(notes)
-                
-                # Recommendations
-                recommendations = []
-                if row['recommended_treatment']: recommendations.append(f"Treatment: {row['recommended_treatment']}")
-                if row['environment_recommendation']: recommendations.append(f"Environment: {row['environment_recommendation']}")
-                if row['handling_recommendation']: recommendations.append(f"Handling: {row['handling_recommendation']}")
-                if row['display_recommendation']: recommendations.append(f"Display: {row['display_recommendation']}")
-                if row['storage_recommendation']: recommendations.append(f"Storage: {row['storage_recommendation']}")
-                if row['packing_recommendation']: recommendations.append(f"Packing: {row['packing_recommendation']}")
-                if recommendations:
-                    activity['spectrum:recommendations'] = recommendations
-                
-                # Priority
-                if row['treatment_priority']:
-                    activity['spectrum:treatmentPriority'] = row['treatment_priority']
-                
-                # Next check due
-                if row['next_check_date']:
-                    activity['spectrum:nextCheckDate'] = str(row['next_check_date'])
-                
-                # Material type
-                if row['material_type']:
-                    activity['spectrum:materialType'] = row['material_type']
-                
-                # Photo count
-                if row['photo_count']:
-                    activity['spectrum:photoCount'] = row['photo_count']
-                
-                self.condition_checks[row['id']] = activity
-                
-        except Exception as e:
-            print(f"Warning: Could not extract condition checks: {e}")
-    
-    def _extract_valuations(self):
-        """Extract valuations from spectrum_valuation."""
-        if not self.records:
-            return
-            
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
-            SELECT 
-                id, object_id, valuation_reference, valuation_date,
-                valuation_type, valuation_amount, valuation_currency,
-                valuer_name, valuer_organization, valuation_note,
-                renewal_date, is_current, workflow_state, currency
-            FROM spectrum_valuation
-            WHERE object_id IN ({placeholders})
-            ORDER BY valuation_date DESC
-        """
-        try:
-            self.cursor.execute(query, record_ids)
-            
-            for row in self.cursor.fetchall():
-                record = self.records.get(row['object_id'])
-                if not record:
-                    continue
-                
-                val_id = f"valuation_{row['id']}"
-                activity = {
-                    '@id': self.mint_uri('activity', val_id),
-                    '@type': 'rico:Activity',
-                    'rico:hasActivityType': 'Valuation',
-                    'rico:resultsOrResultedIn': {'@id': record['@id']},
-                    # Spectrum extensions
-                    'spectrum:valuationReference': row['valuation_reference'],
-                    'spectrum:workflowState': row['workflow_state'],
-                }
-                
-                # Date
-                if row['valuation_date']:
-                    activity['rico:isOrWasAssociatedWithDate'] = {
-                        '@type': 'rico:DateRange',
-                        'rico:beginningDate': str(row['valuation_date']),
-                    }
-                
-                # Valuation type
-                if row['valuation_type']:
-                    activity['spectrum:valuationType'] = row['valuation_type']
-                
-                # Amount and currency
-                currency = row['valuation_currency'] or row['currency'] or 'ZAR'
-                if row['valuation_amount']:
-                    activity['spectrum:valuationAmount'] = {
-                        '@type': 'spectrum:MonetaryAmount',
-                        'spectrum:amount': float(row['valuation_amount']),
-                        'spectrum:currency': currency,
-                    }
-                
-                # Valuer
-                valuer_parts = []
-                if row['valuer_name']: valuer_parts.append(row['valuer_name'])
-                if row['valuer_organization']: valuer_parts.append(f"({row['valuer_organization']})")
-                if valuer_parts:
-                    activity['spectrum:valuer'] = ' '.join(valuer_parts)
-                
-                # Notes
-                if row['valuation_note']:
-                    activity['rico:descriptiveNote'] = row['valuation_note']
-                
-                # Renewal date
-                if row['renewal_date']:
-                    activity['spectrum:renewalDate'] = str(row['renewal_date'])
-                
-                # Current status
-                if row['is_current']:
-                    activity['spectrum:isCurrent'] = bool(row['is_current'])
-                
-                self.valuations[row['id']] = activity
-                
-        except Exception as e:
-            print(f"Warning: Could not extract valuations: {e}")
-    
-    def _extract_loans_out(self):
-        """Extract outgoing loans from spectrum_loan_out."""
-        if not self.records:
-            return
-            
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
-            SELECT 
-                id, object_id, loan_out_number, loan_number,
-                borrower_name, borrower_contact, borrower_address,
-                venue_name, venue_address,
-                loan_out_date, loan_start_date, loan_return_date, loan_end_date,
-                actual_return_date, loan_purpose, loan_conditions,
-                insurance_value, insurance_currency, insurance_reference,
-                insurance_provider, insurance_policy_number,
-                loan_agreement_date, loan_agreement_reference,
-                exhibition_title, exhibition_dates,
-                special_requirements, special_conditions,
-                courier_required, courier_name,
-                loan_status, workflow_state, loan_note, loan_out_note
-            FROM spectrum_loan_out
-            WHERE object_id IN ({placeholders})
-            ORDER BY loan_out_date DESC
-        """
-        try:
-            self.cursor.execute(query, record_ids)
-            
-            for row in self.cursor.fetchall():
-                record = self.records.get(row['object_id'])
-                if not record:
-                    continue
-                
-                loan_id = f"loan_out_{row['id']}"
-                loan_number = row['loan_out_number'] or row['loan_number']
-                
-                activity = {
-                    '@id': self.mint_uri('activity', loan_id),
-                    '@type': 'rico:Activity',
-                    'rico:hasActivityType': 'LoanOut',
-                    'rico:resultsOrResultedIn': {'@id': record['@id']},
-                    # Spectrum extensions
-                    'spectrum:loanNumber': loan_number,
-                    'spectrum:loanStatus': row['loan_status'],
-                    'spectrum:workflowState': row['workflow_state'],
-                }
-                
-                # Dates
-                start_date = row['loan_out_date'] or row['loan_start_date']
-                end_date = row['loan_return_date'] or row['loan_end_date']
-                if start_date or end_date:
-                    activity['rico:isOrWasAssociatedWithDate'] = {
-                        '@type': 'rico:DateRange',
-                        'rico:beginningDate': str(start_date) if start_date else None,
-                        'rico:endDate': str(end_date) if end_date else None,
-                    }
-                
-                if row['actual_return_date']:
-                    activity['spectrum:actualReturnDate'] = str(row['actual_return_date'])
-                
-                # Borrower
-                if row['borrower_name']:
-                    activity['spectrum:borrower'] = {
-                        '@type': 'spectrum:Borrower',
-                        'spectrum:name': row['borrower_name'],
-                        'spectrum:contact': row['borrower_contact'],
-                        'spectrum:address': row['borrower_address'],
-                    }
-                
-                # Venue
-                if row['venue_name']:
-                    activity['spectrum:venue'] = {
-                        '@type': 'spectrum:Venue',
-                        'spectrum:name': row['venue_name'],
-                        'spectrum:address': row['venue_address'],
-                    }
-                
-                # Purpose
-                if row['loan_purpose']:
-                    activity['spectrum:loanPurpose'] = row['loan_purpose']
-                
-                # Exhibition
-                if row['exhibition_title']:
-                    activity['spectrum:exhibitionTitle'] = row['exhibition_title']
-                if row['exhibition_dates']:
-                    activity['spectrum:exhibitionDates'] = row['exhibition_dates']
-                
-                # Insurance
-                if row['insurance_value']:
-                    activity['spectrum:insuranceValue'] = {
-                        '@type': 'spectrum:MonetaryAmount',
-                        'spectrum:amount': float(row['insurance_value']),
-                        'spectrum:currency': row['insurance_currency'] or 'ZAR',
-                    }
-                if row['insurance_provider']:
-                    activity['spectrum:insuranceProvider'] = row['insurance_provider']
-                if row['insurance_policy_number']:
-                    activity['spectrum:insurancePolicyNumber'] = row['insurance_policy_number']
-                
-                # Agreement
-                if row['loan_agreement_reference']:
-                    activity['spectrum:agreementReference'] = row['loan_agreement_reference']
-                if row['loan_agreement_date']:
-                    activity['spectrum:agreementDate'] = str(row['loan_agreement_date'])
-                
-                # Conditions and requirements
-                conditions = []
-                if row['loan_conditions']: conditions.append(row['loan_conditions'])
-                if row['special_conditions']: conditions.append(row['special_conditions'])
-                if row['special_requirements']: conditions.append(row['special_requirements'])
-                if conditions:
-                    activity['spectrum:loanConditions'] = ' | '.join(conditions)
-                
-                # Courier
-                if row['courier_required']:
-                    activity['spectrum:courierRequired'] = bool(row['courier_required'])
-                if row['courier_name']:
-                    activity['spectrum:courierName'] = row['courier_name']
-                
-                # Notes
-                notes = row['loan_note'] or row['loan_out_note']
-                if notes:
-                    activity['rico:descriptiveNote'] = notes
-                
-                self.loans_out[row['id']] = activity
-                
-        except Exception as e:
-            print(f"Warning: Could not extract loans out: {e}")
-    
-    def _extract_movements(self):
-        """Extract location movements from spectrum_movement."""
-        if not self.records:
-            return
-            
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        query = f"""
-            SELECT 
-                m.id, m.object_id, m.movement_reference, m.movement_date,
-                m.movement_reason, m.movement_method, m.movement_contact,
-                m.handler_name, m.moved_by, m.condition_before, m.condition_after,
-                m.planned_return_date, m.actual_return_date,
-                m.movement_note, m.removal_authorization, m.authorization_date,
-                m.workflow_state,
-                lf.location_name as from_location,
-                lt.location_name as to_location
-            FROM spectrum_movement m
-            LEFT JOIN spectrum_location lf ON m.location_from = lf.id OR m.from_location_id = lf.id
-            LEFT JOIN spectrum_location lt ON m.location_to = lt.id OR m.to_location_id = lt.id
-            WHERE m.object_id IN ({placeholders})
-            ORDER BY m.movement_date DESC
-        """
-        try:
-            self.cursor.execute(query, record_ids)
-            
-            for row in self.cursor.fetchall():
-                record = self.records.get(row['object_id'])
-                if not record:
-                    continue
-                
-                move_id = f"movement_{row['id']}"
-                activity = {
-                    '@id': self.mint_uri('activity', move_id),
-                    '@type': 'rico:Activity',
-                    'rico:hasActivityType': 'LocationMovement',
-                    'rico:resultsOrResultedIn': {'@id': record['@id']},
-                    # Spectrum extensions
-                    'spectrum:movementReference': row['movement_reference'],
-                    'spectrum:workflowState': row['workflow_state'],
-                }
-                
-                # Date
-                if row['movement_date']:
-                    activity['rico:isOrWasAssociatedWithDate'] = {
-                        '@type': 'rico:DateRange',
-                        'rico:beginningDate': str(row['movement_date']),
-                    }
-                
-                # Reason and method
-                if row['movement_reason']:
-                    activity['spectrum:movementReason'] = row['movement_reason']
-                if row['movement_method']:
-                    activity['spectrum:movementMethod'] = row['movement_method']
-                
-                # Locations
-                if row['from_location']:
-                    activity['spectrum:fromLocation'] = row['from_location']
-                if row['to_location']:
-                    activity['spectrum:toLocation'] = row['to_location']
-                
-                # Handler
-                handler = row['handler_name'] or row['moved_by']
-                if handler:
-                    activity['spectrum:movedBy'] = handler
-                if row['movement_contact']:
-                    activity['spectrum:movementContact'] = row['movement_contact']
-                
-                # Condition before/after
-                if row['condition_before']:
-                    activity['spectrum:conditionBefore'] = row['condition_before']
-                if row['condition_after']:
-                    activity['spectrum:conditionAfter'] = row['condition_after']
-                
-                # Return dates
-                if row['planned_return_date']:
-                    activity['spectrum:plannedReturnDate'] = str(row['planned_return_date'])
-                if row['actual_return_date']:
-                    activity['spectrum:actualReturnDate'] = str(row['actual_return_date'])
-                
-                # Authorization
-                if row['removal_authorization']:
-                    activity['spectrum:removalAuthorization'] = row['removal_authorization']
-                if row['authorization_date']:
-                    activity['spectrum:authorizationDate'] = str(row['authorization_date'])
-                
-                # Notes
-                if row['movement_note']:
-                    activity['rico:descriptiveNote'] = row['movement_note']
-                
-                self.movements[row['id']] = activity
-                
-        except Exception as e:
-            print(f"Warning: Could not extract movements: {e}")
-    
-    def _extract_grap_assets(self):
-        """Extract GRAP heritage asset data."""
-        if not self.records:
-            return
-            
-        record_ids = list(self.records.keys())
-        placeholders = ','.join(['%s'] * len(record_ids))
-        
-        # Try grap_heritage_asset first (linked to information_object)
-        query = f"""
-            SELECT 
-                g.id, g.object_id,
-                g.recognition_status, g.recognition_status_reason,
-                g.recognition_date, g.measurement_basis,
-                g.acquisition_method, g.acquisition_date,
-                g.cost_of_acquisition, g.fair_value_at_acquisition,
-                g.nominal_value, g.donor_name, g.donor_restrictions,
-                g.initial_carrying_amount, g.current_carrying_amount,
-                g.last_valuation_date, g.last_valuation_amount,
-                g.valuation_method, g.valuer_name, g.valuer_credentials,
-                g.revaluation_frequency, g.revaluation_surplus,
-                g.depreciation_policy, g.useful_life_years,
-                g.residual_value, g.depreciation_method,
-                g.annual_depreciation, g.accumulated_depreciation,
-                g.last_impairment_date, g.impairment_indicators,
-                g.impairment_indicators_details, g.impairment_loss,
-                g.asset_class, g.asset_sub_class,
-                g.gl_account_code, g.cost_center, g.fund_source,
-                g.heritage_significance, g.significance_statement,
-                g.restrictions_on_use, g.restrictions_on_disposal,
-                g.conservation_requirements, g.conservation_commitments,
-                g.insurance_required, g.insurance_value,
-                g.insurance_policy_number, g.insurance_provider,
-                g.insurance_expiry_date, g.risk_level,
-                g.current_location, g.condition_rating
-            FROM grap_heritage_asset g
-            WHERE g.object_id IN ({placeholders})
-        """
-        try:
-            self.cursor.execute(query, record_ids)
-            
-            for row in self.cursor.fetchall():
-                record = self.records.get(row['object_id'])
-                if not record:
-                    continue
-                
-                grap_id = f"grap_{row['id']}"
-                
-                # GRAP data extends the record with financial/heritage properties
-                grap_asset = {
-                    '@id': self.mint_uri('grap-asset', grap_id),
-                    '@type': ['grap:HeritageAsset'],
-                    'grap:relatedRecord': {'@id': record['@id']},
-                    
-                    # Recognition
-                    'grap:recognitionStatus': row['recognition_status'],
-                    'grap:recognitionStatusReason': row['recognition_status_reason'],
-                    'grap:measurementBasis': row['measurement_basis'],
-                    
-                    # Classification
-                    'grap:assetClass': row['asset_class'],
-                    'grap:assetSubClass': row['asset_sub_class'],
-                    'grap:heritageSignificance': row['heritage_significance'],
-                }
-                
-                # Recognition date
-                if row['recognition_date']:
-                    grap_asset['grap:recognitionDate'] = str(row['recognition_date'])
-                
-                # Acquisition
-                if row['acquisition_date']:
-                    grap_asset['grap:acquisitionDate'] = str(row['acquisition_date'])
-                if row['acquisition_method']:
-                    grap_asset['grap:acquisitionMethod'] = row['acquisition_method']
-                if row['cost_of_acquisition']:
-                    grap_asset['grap:costOfAcquisition'] = {
-                        '@type': 'grap:MonetaryAmount',
-                        'grap:amount': float(row['cost_of_acquisition']),
-                        'grap:currency': 'ZAR',
-                    }
-                if row['fair_value_at_acquisition']:
-                    grap_asset['grap:fairValueAtAcquisition'] = {
-                        '@type': 'grap:MonetaryAmount',
-                        'grap:amount': float(row['fair_value_at_acquisition']),
-                        'grap:currency': 'ZAR',
-                    }
-                
-                # Donor
-                if row['donor_name']:
-                    grap_asset['grap:donorName'] = row['donor_name']
-                if row['donor_restrictions']:
-                    grap_asset['grap:donorRestrictions'] = row['donor_restrictions']
-                
-                # Carrying amounts
-                if row['initial_carrying_amount']:
-                    grap_asset['grap:initialCarryingAmount'] = float(row['initial_carrying_amount'])
-                if row['current_carrying_amount']:
-                    grap_asset['grap:currentCarryingAmount'] = float(row['current_carrying_amount'])
-                if row['nominal_value']:
-                    grap_asset['grap:nominalValue'] = float(row['nominal_value'])
-                
-                # Valuation
-                if row['last_valuation_date']:
-                    grap_asset['grap:lastValuationDate'] = str(row['last_valuation_date'])
-                if row['last_valuation_amount']:
-                    grap_asset['grap:lastValuationAmount'] = float(row['last_valuation_amount'])
-                if row['valuation_method']:
-                    grap_asset['grap:valuationMethod'] = row['valuation_method']
-                if row['valuer_name']:
-                    grap_asset['grap:valuerName'] = row['valuer_name']
-                if row['valuer_credentials']:
-                    grap_asset['grap:valuerCredentials'] = row['valuer_credentials']
-                if row['revaluation_frequency']:
-                    grap_asset['grap:revaluationFrequency'] = row['revaluation_frequency']
-                if row['revaluation_surplus']:
-                    grap_asset['grap:revaluationSurplus'] = float(row['revaluation_surplus'])
-                
-                # Depreciation
-                if row['depreciation_policy']:
-                    grap_asset['grap:depreciationPolicy'] = row['depreciation_policy']
-                if row['depreciation_method']:
-                    grap_asset['grap:depreciationMethod'] = row['depreciation_method']
-                if row['useful_life_years']:
-                    grap_asset['grap:usefulLifeYears'] = row['useful_life_years']
-                if row['residual_value']:
-                    grap_asset['grap:residualValue'] = float(row['residual_value'])
-                if row['annual_depreciation']:
-                    grap_asset['grap:annualDepreciation'] = float(row['annual_depreciation'])
-                if row['accumulated_depreciation']:
-                    grap_asset['grap:accumulatedDepreciation'] = float(row['accumulated_depreciation'])
-                
-                # Impairment
-                if row['last_impairment_date']:
-                    grap_asset['grap:lastImpairmentDate'] = str(row['last_impairment_date'])
-                if row['impairment_indicators']:
-                    grap_asset['grap:impairmentIndicators'] = bool(row['impairment_indicators'])
-                if row['impairment_indicators_details']:
-                    grap_asset['grap:impairmentIndicatorsDetails'] = row['impairment_indicators_details']
-                if row['impairment_loss']:
-                    grap_asset['grap:impairmentLoss'] = float(row['impairment_loss'])
-                
-                # Accounting codes
-                if row['gl_account_code']:
-                    grap_asset['grap:glAccountCode'] = row['gl_account_code']
-                if row['cost_center']:
-                    grap_asset['grap:costCenter'] = row['cost_center']
-                if row['fund_source']:
-                    grap_asset['grap:fundSource'] = row['fund_source']
-                
-                # Significance
-                if row['significance_statement']:
-                    grap_asset['grap:significanceStatement'] = row['significance_statement']
-                
-                # Restrictions
-                if row['restrictions_on_use']:
-                    grap_asset['grap:restrictionsOnUse'] = row['restrictions_on_use']
-                if row['restrictions_on_disposal']:
-                    grap_asset['grap:restrictionsOnDisposal'] = row['restrictions_on_disposal']
-                
-                # Conservation
-                if row['conservation_requirements']:
-                    grap_asset['grap:conservationRequirements'] = row['conservation_requirements']
-                if row['conservation_commitments']:
-                    grap_asset['grap:conservationCommitments'] = row['conservation_commitments']
-                
-                # Insurance
-                if row['insurance_required'] is not None:
-                    grap_asset['grap:insuranceRequired'] = bool(row['insurance_required'])
-                if row['insurance_value']:
-                    grap_asset['grap:insuranceValue'] = {
-                        '@type': 'grap:MonetaryAmount',
-                        'grap:amount': float(row['insurance_value']),
-                        'grap:currency': 'ZAR',
-                    }
-                if row['insurance_policy_number']:
-                    grap_asset['grap:insurancePolicyNumber'] = row['insurance_policy_number']
-                if row['insurance_provider']:
-                    grap_asset['grap:insuranceProvider'] = row['insurance_provider']
-                if row['insurance_expiry_date']:
-                    grap_asset['grap:insuranceExpiryDate'] = str(row['insurance_expiry_date'])
-                
-                # Risk and condition
-                if row['risk_level']:
-                    grap_asset['grap:riskLevel'] = row['risk_level']
-                if row['current_location']:
-                    grap_asset['grap:currentLocation'] = row['current_location']
-                if row['condition_rating']:
-                    grap_asset['grap:conditionRating'] = row['condition_rating']
-                
-                # Clean up None values
-                grap_asset = {k: v for k, v in grap_asset.items() if v is not None}
-                
-                self.grap_assets[row['id']] = grap_asset
-                
-                # Add relation from record to GRAP asset
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': grap_asset['@id'],
-                    'predicate': 'grap:hasHeritageAssetData',
-                })
-                
+                self.functions[row['id']] = function
         except Exception as e:
-            print(f"Warning: Could not extract GRAP heritage assets: {e}")
+            print(f"Warning: Could not extract functions: {e}")
         
-        # Also try spectrum_grap_data (alternative table)
-        query2 = f"""
-            SELECT 
-                g.id, g.information_object_id,
-                g.recognition_status, g.recognition_status_reason,
-                g.measurement_basis, g.initial_recognition_date,
-                g.initial_recognition_value, g.carrying_amount,
-                g.acquisition_method_grap, g.cost_of_acquisition,
-                g.fair_value_at_acquisition, g.donor_restrictions,
-                g.last_revaluation_date, g.revaluation_amount,
-                g.valuer_credentials, g.valuation_method,
-                g.revaluation_frequency, g.depreciation_policy,
-                g.useful_life_years, g.residual_value,
-                g.depreciation_method, g.accumulated_depreciation,
-                g.last_impairment_assessment_date, g.impairment_indicators,
-                g.impairment_indicators_details, g.impairment_loss_amount,
-                g.asset_class, g.gl_account_code, g.cost_center,
-                g.fund_source, g.restrictions_use_disposal,
-                g.heritage_significance_rating, g.conservation_commitments,
-                g.insurance_coverage_required, g.insurance_coverage_actual
-            FROM spectrum_grap_data g
-            WHERE g.information_object_id IN ({placeholders})
-        """
-        try:
-            self.cursor.execute(query2, record_ids)
+        for agent_id, agent in self.agents.items():
+            functions_text = self.agent_info[agent_id].functions_text
+            if functions_text:
+                func_id = f"agent_{agent_id}"
+                function = {
+                    '@id': self.mint_uri('function', func_id),
+                    '@type': 'rico:Function',
+                    'rico:descriptiveNote': functions_text,
+                }
+                self.functions[func_id] = function
+                self.relations.add(agent['@id'], 'rico:hasOrHadFunction', function['@id'])
+    
+    def _extract_mandates_from_agents(self):
+        for agent_id, agent in self.agents.items():
+            mandates_text = self.agent_info[agent_id].mandates_text
+            if mandates_text:
+                mandate = {
+                    '@id': self.mint_uri('mandate', agent_id),
+                    '@type': 'rico:Mandate',
+                    'rico:descriptiveNote': mandates_text,
+                }
+                self.mandates[agent_id] = mandate
+                self.relations.add(agent['@id'], 'rico:isOrWasRegulatedBy', mandate['@id'])
+    
+    def _extract_repository(self, fonds: Dict):
+        """Build the fonds' repository node, querying each repository once per run."""
+        repository_id = fonds['repository_id']
+        if repository_id is None:
+            return
+        if repository_id not in self._repository_rows:
+            query = """
+                SELECT 
+                    r.id, ai.authorized_form_of_name, ai.history,
+                    ci.contact_person, ci.street_address, ci.postal_code,
+                    ci.country_code, ci.email, ci.website
+                FROM repository r
+                JOIN actor_i18n ai ON r.id = ai.id AND ai.culture = COALESCE(r.source_culture, 'en')
+                LEFT JOIN contact_information ci ON r.id = ci.actor_id
+                WHERE r.id = %s LIMIT 1
+            """
+            rows = list(self._timed_fetch('repository', 1, 1, 1, query, (repository_id,)))
+            self._repository_rows[repository_id] = rows[0] if rows else None
+        row = self._repository_rows[repository_id]
+        
+        if row:
+            repository = {
+                '@id': self.mint_uri('corporatebody', row['id']),
+                '@type': 'rico:CorporateBody',
+                'rico:hasAgentName': {
+                    '@type': 'rico:AgentName',
+                    'rico:textualValue': row['authorized_form_of_name'],
+                },
+                'rico:history': row['history'],
+            }
             
-            for row in self.cursor.fetchall():
-                record = self.records.get(row['information_object_id'])
-                if not record:
-                    continue
-                
-                # Skip if we already have GRAP data for this record
-                existing = [g for g in self.grap_assets.values() 
-                           if g.get('grap:relatedRecord', {}).get('@id') == record['@id']]
-                if existing:
-                    continue
-                
-                grap_id = f"grap_spectrum_{row['id']}"
-                
-                grap_asset = {
-                    '@id': self.mint_uri('grap-asset', grap_id),
-                    '@type': ['grap:HeritageAsset'],
-                    'grap:relatedRecord': {'@id': record['@id']},
-                    'grap:recognitionStatus': row['recognition_status'],
-                    'grap:measurementBasis': row['measurement_basis'],
-                    'grap:assetClass': row['asset_class'],
+            address_parts = [p for p in [row['street_address'], row['postal_code'], row['country_code']] if p]
+            if address_parts:
+                repository['rico:hasOrHadLocation'] = {
+                    '@type': 'rico:Place',
+                    'rico:hasPlaceName': {
+                        '@type': 'rico:PlaceName',
+                        'rico:textualValue': ', '.join(address_parts),
+                    },
                 }
                 
-                if row['initial_recognition_date']:
-                    grap_asset['grap:recognitionDate'] = str(row['initial_recognition_date'])
-                if row['initial_recognition_value']:
-                    grap_asset['grap:initialRecognitionValue'] = float(row['initial_recognition_value'])
-                if row['carrying_amount']:
-                    grap_asset['grap:currentCarryingAmount'] = float(row['carrying_amount'])
-                if row['heritage_significance_rating']:
-                    grap_asset['grap:heritageSignificance'] = row['heritage_significance_rating']
-                
-                # Clean up
-                grap_asset = {k: v for k, v in grap_asset.items() if v is not None}
-                
-                self.grap_assets[f"spectrum_{row['id']}"] = grap_asset
-                
-                self.relations.append({
-                    'from': record['@id'],
-                    'to': grap_asset['@id'],
-                    'predicate': 'grap:hasHeritageAssetData',
-                })
+            contacts = []
+            if row['email']: contacts.append(f"Email: {row['email']}")
+            if row['website']: contacts.append(f"Website: {row['website']}")
+            if contacts:
+                repository['rico:descriptiveNote'] = '; '.join(contacts)
+            self.repository = self._compact(repository)
+    
+    def _build_creator_shortcuts(self):
+        for activity_id, info in self.activity_info.items():
+            event_type = info.event_type
+            record_id = info.record_id
+            agent_id = info.agent_id
+            
+            if not record_id or not agent_id:
+                continue
                 
-        except Exception as e:
-            print(f"Warning: Could not extract spectrum_grap_data: {e}")
-    
-    def _build_jsonld(self) -> Dict:
-        graph = []
-        
-        # Build relation index
-        relation_map = defaultdict(list)
-        for rel in self.relations:
-            relation_map[rel['from']].append(rel)
-        
-        all_predicates = [
-            'rico:hasOrHadSubject', 'rico:hasOrHadMainSubject',
-            'rico:hasOrHadPlaceOfOrigin', 'rico:hasOrHadContentOfType',
-            'rico:hasInstantiation', 'rico:isAssociatedWith',
-            'rico:isOrWasRegulatedBy', 'rico:isDescribedBy',
-            'rico:hasCreator', 'rico:hasAccumulator',
-            'rico:precedes', 'rico:follows', 'rico:includes',
-            'rico:hasOrHadFunction', 'rico:isEquivalentTo',
-            'grap:hasHeritageAssetData',
-        ]
-        
-        # Add records
-        for record_id, record in self.records.items():
-            record_clean = {k: v for k, v in record.items() if v is not None and not k.startswith('_')}
+            record = self.records.get(record_id)
+            agent = self.agents.get(agent_id)
             
-            if self.repository:
-                record_clean['rico:isOrWasHeldBy'] = {'@id': self.repository['@id']}
+            if not record or not agent:
+                continue
             
-            record_relations = relation_map.get(record_clean.get('@id'), [])
-            for pred in all_predicates:
-                targets = [r['to'] for r in record_relations if r['predicate'] == pred]
-                if targets:
-                    targets = list(dict.fromkeys(targets))
-                    if len(targets) == 1:
-                        record_clean[pred] = {'@id': targets[0]}
-                    else:
-                        record_clean[pred] = [{'@id': t} for t in targets]
+            if event_type in ['creation', 'contribution', 'written']:
+                self.relations.add(record['@id'], 'rico:hasCreator', agent['@id'])
+            elif event_type in ['accumulation', 'collection']:
+                self.relations.add(record['@id'], 'rico:hasAccumulator', agent['@id'])
+    
+    def _build_temporal_relations(self):
+        for parent_id, children in self.record_order.items():
+            sorted_children = sorted(children, key=lambda x: x[0])
+            
+            for i in range(len(sorted_children) - 1):
+                current_id = sorted_children[i][1]
+                next_id = sorted_children[i + 1][1]
                 
-            graph.append(record_clean)
-        
-        # Add agents
-        for agent in self.agents.values():
-            agent_clean = {k: v for k, v in agent.items() if v is not None and not k.startswith('_')}
-            agent_relations = relation_map.get(agent_clean.get('@id'), [])
-            for pred in all_predicates:
-                targets = [r['to'] for r in agent_relations if r['predicate'] == pred]
-                if targets:
-                    targets = list(dict.fromkeys(targets))
-                    if len(targets) == 1:
-                        agent_clean[pred] = {'@id': targets[0]}
-                    else:
-                        agent_clean[pred] = [{'@id': t} for t in targets]
-            graph.append(agent_clean)
-        
-        # Add core activities
-        for activity in self.activities.values():
-            act_clean = {k: v for k, v in activity.items() if not k.startswith('_')}
-            graph.append(act_clean)
-        
-        # Add other entities
-        for place in self.places.values():
-            graph.append({k: v for k, v in place.items() if not k.startswith('_')})
-        
-        for subject in self.subjects.values():
-            graph.append({k: v for k, v in subject.items() if not k.startswith('_')})
-        
-        for genre in self.genres.values():
-            graph.append({k: v for k, v in genre.items() if not k.startswith('_')})
-        
-        for instantiation in self.instantiations.values():
-            graph.append(instantiation)
-        
-        for rule in self.rules.values():
-            graph.append({k: v for k, v in rule.items() if v is not None})
+                current_uri = self._record_uri(current_id)
+                next_uri = self._record_uri(next_id)
+                
+                if current_uri and next_uri:
+                    if current_id in self.records:
+                        self.relations.add(current_uri, 'rico:precedes', next_uri)
+                    if next_id in self.records:
+                        self.relations.add(next_uri, 'rico:follows', current_uri)
         
-        for mandate in self.mandates.values():
-            graph.append(mandate)
+        for record_id, record in self.records.items():
+            parent_id = self.record_info[record_id].parent_id
+            if parent_id and parent_id in self.records:
+                parent = self.records[parent_id]
+                self.relations.add(parent['@id'], 'rico:includes', record['@id'])
         
-        for function in self.functions.values():
-            graph.append({k: v for k, v in function.items() if v is not None})
+        # Incremental extractions: children that were only loaded as context
+        for record_id, (parent_id, uri) in self._context_records.items():
+            if parent_id in self.records:
+                self.relations.add(self.records[parent_id]['@id'], 'rico:includes', uri)
+    
+    def _build_equivalence_candidates(self):
+        """Link agents with near-identical names to their cluster's representative (see AgentMatcher)."""
+        matcher = AgentMatcher()
+        for agent_id, agent in self.agents.items():
+            name = self.agent_info[agent_id].name
+            if name:
+                matcher.add(agent['@id'], name)
+        for member, representative in matcher.links():
+            self.relations.add(member, 'rico:isEquivalentTo', representative)
+    
+    # ==================== PHASE 5: SPECTRUM/GRAP EXTRACTION ====================
+    
+    # Per-record Spectrum procedure and GRAP tables, run by _extract_mapped
+    # chunk by chunk in this order. Field order is the node's key order.
+    SPECTRUM_MAPPINGS = [
+        TableMapping(
+            'condition checks', 'condition_checks', 'spectrum_condition_check',
+            'condition_checks', 'activity', 'condition_', 'rico:Activity',
+            'rico:resultsOrResultedIn',
+            constants={'rico:hasActivityType': 'ConditionCheck'},
+            order_by='check_date DESC',
+            fields=[
+                Field('spectrum:conditionReference', 'condition_reference', keep='set'),
+                Field('spectrum:checkedBy', 'checked_by', keep='set'),
+                Field('spectrum:workflowState', 'workflow_state', keep='set'),
+                Field('rico:isOrWasAssociatedWithDate', DateRange('check_date', expressed=True)),
+                Field('spectrum:overallCondition', ('overall_condition', 'condition_rating')),
+                Field('spectrum:checkReason', 'check_reason'),
+                Field('rico:descriptiveNote', Joined([
+                    ('Condition: {}', 'condition_note'),
+                    ('Completeness: {}', 'completeness_note'),
+                    ('Hazards: {}', 'hazard_note'),
+                    ('Technical: {}', 'technical_assessment'),
+                ])),
+                Field('spectrum:recommendations', Joined([
+                    ('Treatment: {}', 'recommended_treatment'),
+                    ('Environment: {}', 'environment_recommendation'),
+                    ('Handling: {}', 'handling_recommendation'),
+                    ('Display: {}', 'display_recommendation'),
+                    ('Storage: {}', 'storage_recommendation'),
+                    ('Packing: {}', 'packing_recommendation'),
+                ], as_list=True)),
+                Field('spectrum:treatmentPriority', 'treatment_priority'),
+                Field('spectrum:nextCheckDate', 'next_check_date', str),
+                Field('spectrum:materialType', 'material_type'),
+                Field('spectrum:photoCount', 'photo_count'),
+            ],
+        ),
+        TableMapping(
+            'valuations', 'valuations', 'spectrum_valuation',
+            'valuations', 'activity', 'valuation_', 'rico:Activity',
+            'rico:resultsOrResultedIn',
+            constants={'rico:hasActivityType': 'Valuation'},
+            order_by='valuation_date DESC',
+            fields=[
+                Field('spectrum:valuationReference', 'valuation_reference', keep='set'),
+                Field('spectrum:workflowState', 'workflow_state', keep='set'),
+                Field('rico:isOrWasAssociatedWithDate', DateRange('valuation_date')),
+                Field('spectrum:valuationType', 'valuation_type'),
+                Field('spectrum:valuationAmount',
+                      Money('valuation_amount', ('valuation_currency', 'currency'))),
+                Field('spectrum:valuer', Joined([
+                    ('{}', 'valuer_name'),
+                    ('({})', 'valuer_organization'),
+                ], separator=' ')),
+                Field('rico:descriptiveNote', 'valuation_note'),
+                Field('spectrum:renewalDate', 'renewal_date', str),
+                Field('spectrum:isCurrent', 'is_current', bool),
+            ],
+        ),
+        TableMapping(
+            'loans out', 'loans_out', 'spectrum_loan_out',
+            'loans_out', 'activity', 'loan_out_', 'rico:Activity',
+            'rico:resultsOrResultedIn',
+            constants={'rico:hasActivityType': 'LoanOut'},
+            order_by='loan_out_date DESC',
+            fields=[
+                Field('spectrum:loanNumber', ('loan_out_number', 'loan_number'), keep='set'),
+                Field('spectrum:loanStatus', 'loan_status', keep='set'),
+                Field('spectrum:workflowState', 'workflow_state', keep='set'),
+                Field('rico:isOrWasAssociatedWithDate', DateRange(
+                    ('loan_out_date', 'loan_start_date'), ('loan_return_date', 'loan_end_date'))),
+                Field('spectrum:actualReturnDate', 'actual_return_date', str),
+                Field('spectrum:borrower', Struct('spectrum:Borrower', 'borrower_name', {
+                    'spectrum:name': 'borrower_name',
+                    'spectrum:contact': 'borrower_contact',
+                    'spectrum:address': 'borrower_address',
+                })),
+                Field('spectrum:venue', Struct('spectrum:Venue', 'venue_name', {
+                    'spectrum:name': 'venue_name',
+                    'spectrum:address': 'venue_address',
+                })),
+                Field('spectrum:loanPurpose', 'loan_purpose'),
+                Field('spectrum:exhibitionTitle', 'exhibition_title'),
+                Field('spectrum:exhibitionDates', 'exhibition_dates'),
+                Field('spectrum:insuranceValue', Money('insurance_value', ('insurance_currency',))),
+                Field('spectrum:insuranceProvider', 'insurance_provider'),
+                Field('spectrum:insurancePolicyNumber', 'insurance_policy_number'),
+                Field('spectrum:agreementReference', 'loan_agreement_reference'),
+                Field('spectrum:agreementDate', 'loan_agreement_date', str),
+                Field('spectrum:loanConditions', Joined([
+                    ('{}', 'loan_conditions'),
+                    ('{}', 'special_conditions'),
+                    ('{}', 'special_requirements'),
+                ])),
+                Field('spectrum:courierRequired', 'courier_required', bool),
+                Field('spectrum:courierName', 'courier_name'),
+                Field('rico:descriptiveNote', ('loan_note', 'loan_out_note')),
+            ],
+        ),
+        TableMapping(
+            'movements', 'movements', 'spectrum_movement',
+            'movements', 'activity', 'movement_', 'rico:Activity',
+            'rico:resultsOrResultedIn',
+            constants={'rico:hasActivityType': 'LocationMovement'},
+            computed={'from_location': 'lf.location_name', 'to_location': 'lt.location_name'},
+            joins="""
+                LEFT JOIN spectrum_location lf ON t.location_from = lf.id OR t.from_location_id = lf.id
+                LEFT JOIN spectrum_location lt ON t.location_to = lt.id OR t.to_location_id = lt.id
+            """,
+            order_by='movement_date DESC',
+            fields=[
+                Field('spectrum:movementReference', 'movement_reference', keep='set'),
+                Field('spectrum:workflowState', 'workflow_state', keep='set'),
+                Field('rico:isOrWasAssociatedWithDate', DateRange('movement_date')),
+                Field('spectrum:movementReason', 'movement_reason'),
+                Field('spectrum:movementMethod', 'movement_method'),
+                Field('spectrum:fromLocation', 'from_location'),
+                Field('spectrum:toLocation', 'to_location'),
+                Field('spectrum:movedBy', ('handler_name', 'moved_by')),
+                Field('spectrum:movementContact', 'movement_contact'),
+                Field('spectrum:conditionBefore', 'condition_before'),
+                Field('spectrum:conditionAfter', 'condition_after'),
+                Field('spectrum:plannedReturnDate', 'planned_return_date', str),
+                Field('spectrum:actualReturnDate', 'actual_return_date', str),
+                Field('spectrum:removalAuthorization', 'removal_authorization'),
+                Field('spectrum:authorizationDate', 'authorization_date', str),
+                Field('rico:descriptiveNote', 'movement_note'),
+            ],
+        ),
+        TableMapping(
+            'GRAP heritage assets', 'grap_assets', 'grap_heritage_asset',
+            'grap_assets', 'grap-asset', 'grap_', ['grap:HeritageAsset'],
+            'grap:relatedRecord', record_relation='grap:hasHeritageAssetData',
+            fields=[
+                Field('grap:recognitionStatus', 'recognition_status', keep='set'),
+                Field('grap:recognitionStatusReason', 'recognition_status_reason', keep='set'),
+                Field('grap:measurementBasis', 'measurement_basis', keep='set'),
+                Field('grap:assetClass', 'asset_class', keep='set'),
+                Field('grap:assetSubClass', 'asset_sub_class', keep='set'),
+                Field('grap:heritageSignificance', 'heritage_significance', keep='set'),
+                Field('grap:recognitionDate', 'recognition_date', str),
+                Field('grap:acquisitionDate', 'acquisition_date', str),
+                Field('grap:acquisitionMethod', 'acquisition_method'),
+                Field('grap:costOfAcquisition', Money('cost_of_acquisition', ns='grap')),
+                Field('grap:fairValueAtAcquisition', Money('fair_value_at_acquisition', ns='grap')),
+                Field('grap:donorName', 'donor_name'),
+                Field('grap:donorRestrictions', 'donor_restrictions'),
+                Field('grap:initialCarryingAmount', 'initial_carrying_amount', float),
+                Field('grap:currentCarryingAmount', 'current_carrying_amount', float),
+                Field('grap:nominalValue', 'nominal_value', float),
+                Field('grap:lastValuationDate', 'last_valuation_date', str),
+                Field('grap:lastValuationAmount', 'last_valuation_amount', float),
+                Field('grap:valuationMethod', 'valuation_method'),
+                Field('grap:valuerName', 'valuer_name'),
+                Field('grap:valuerCredentials', 'valuer_credentials'),
+                Field('grap:revaluationFrequency', 'revaluation_frequency'),
+                Field('grap:revaluationSurplus', 'revaluation_surplus', float),
+                Field('grap:depreciationPolicy', 'depreciation_policy'),
+                Field('grap:depreciationMethod', 'depreciation_method'),
+                Field('grap:usefulLifeYears', 'useful_life_years'),
+                Field('grap:residualValue', 'residual_value', float),
+                Field('grap:annualDepreciation', 'annual_depreciation', float),
+                Field('grap:accumulatedDepreciation', 'accumulated_depreciation', float),
+                Field('grap:lastImpairmentDate', 'last_impairment_date', str),
+                Field('grap:impairmentIndicators', 'impairment_indicators', bool),
+                Field('grap:impairmentIndicatorsDetails', 'impairment_indicators_details'),
+                Field('grap:impairmentLoss', 'impairment_loss', float),
+                Field('grap:glAccountCode', 'gl_account_code'),
+                Field('grap:costCenter', 'cost_center'),
+                Field('grap:fundSource', 'fund_source'),
+                Field('grap:significanceStatement', 'significance_statement'),
+                Field('grap:restrictionsOnUse', 'restrictions_on_use'),
+                Field('grap:restrictionsOnDisposal', 'restrictions_on_disposal'),
+                Field('grap:conservationRequirements', 'conservation_requirements'),
+                Field('grap:conservationCommitments', 'conservation_commitments'),
+                Field('grap:insuranceRequired', 'insurance_required', bool, keep='set'),
+                Field('grap:insuranceValue', Money('insurance_value', ns='grap')),
+                Field('grap:insurancePolicyNumber', 'insurance_policy_number'),
+                Field('grap:insuranceProvider', 'insurance_provider'),
+                Field('grap:insuranceExpiryDate', 'insurance_expiry_date', str),
+                Field('grap:riskLevel', 'risk_level'),
+                Field('grap:currentLocation', 'current_location'),
+                Field('grap:conditionRating', 'condition_rating'),
+            ],
+        ),
+        # Older Spectrum table, only for records without grap_heritage_asset data
+        TableMapping(
+            'spectrum_grap_data', 'spectrum_grap_data', 'spectrum_grap_data',
+            'grap_assets', 'grap-asset', 'grap_spectrum_', ['grap:HeritageAsset'],
+            'grap:relatedRecord', record_relation='grap:hasHeritageAssetData',
+            record_column='information_object_id', key_prefix='spectrum_', fallback=True,
+            fields=[
+                Field('grap:recognitionStatus', 'recognition_status', keep='set'),
+                Field('grap:measurementBasis', 'measurement_basis', keep='set'),
+                Field('grap:assetClass', 'asset_class', keep='set'),
+                Field('grap:recognitionDate', 'initial_recognition_date', str),
+                Field('grap:initialRecognitionValue', 'initial_recognition_value', float),
+                Field('grap:currentCarryingAmount', 'carrying_amount', float),
+                Field('grap:heritageSignificance', 'heritage_significance_rating'),
+            ],
+        ),
+    ]
+    
+    def _extract_mapped(self, mappings: List[TableMapping]):
+        """Extract the tables of declarative mappings, chunk-major over the records.
         
-        if self.repository:
-            graph.append({k: v for k, v in self.repository.items() if v is not None and not k.startswith('_')})
+        Each batch of record IDs is formatted once and every mapping's
+        statement runs against it in turn, so a new table costs one more
+        statement per chunk rather than a pass of its own. Nodes are
+        staged per mapping with their sort key, sorted once across all
+        chunks and merged into the caches in mapping order, which keeps
+        the output order of one table-at-a-time extraction.
+        A mapping whose query fails (e.g. a module's table is missing) is
+        reported and skipped for the remaining chunks.
+        """
+        if not self.records:
+            return
         
-        # Phase 5: Add Spectrum/GRAP entities
-        for condition in self.condition_checks.values():
-            graph.append({k: v for k, v in condition.items() if v is not None})
+        staged = [{} for _ in mappings]
+        covered = defaultdict(set)
+        failed = set()
+        for number, total, id_count, ids, id_params in self._record_chunks():
+            for index, mapping in enumerate(mappings):
+                if index in failed:
+                    continue
+                nodes = staged[index]
+                try:
+                    for row in self._timed_fetch(mapping.phase, number, total, id_count,
+                                                 mapping.query.format(ids=ids), id_params):
+                        record_id = row[mapping.record_column]
+                        record = self.records.get(record_id)
+                        if not record:
+                            continue
+                        if mapping.fallback and record_id in covered[mapping.cache]:
+                            continue
+                        node = mapping.node(self, row, record)
+                        key = f"{mapping.key_prefix}{row['id']}" if mapping.key_prefix else row['id']
+                        nodes[key] = (mapping.sort_key(row), node)
+                        if not mapping.fallback:
+                            covered[mapping.cache].add(record_id)
+                        if mapping.record_relation:
+                            self.relations.add(record['@id'], mapping.record_relation, node['@id'])
+                except Exception as e:
+                    print(f"Warning: Could not extract {mapping.label}: {e}")
+                    failed.add(index)
         
-        for valuation in self.valuations.values():
-            graph.append({k: v for k, v in valuation.items() if v is not None})
+        for mapping, nodes in zip(mappings, staged):
+            items = nodes.items()
+            if mapping.order_column:
+                # Stable, so rows tied on the sort key keep their chunk order
+                items = sorted(items, key=lambda item: item[1][0], reverse=mapping.descending)
+            getattr(self, mapping.cache).update((key, node) for key, (_, node) in items)
+    
+    # ==================== MULTI-CULTURE LITERALS ====================
+    
+    # Translatable text per entity cache: (cache, key prefix, i18n table,
+    # {property path: i18n column, or (i18n columns, row -> text)}). Keys with
+    # a prefix, such as 'agent_12' in functions, are nodes derived from that
+    # entity ID.
+    I18N_FIELDS = [
+        ('records', '', 'information_object_i18n', {
+            ('rico:title',): 'title',
+            ('rico:scopeAndContent',): 'scope_and_content',
+            ('rico:arrangement',): 'arrangement',
+            ('rico:extentAndMedium',): 'extent_and_medium',
+            ('rico:history',): 'archival_history',
+            ('rico:conditionsOfAccess',): 'physical_characteristics',
+            ('rico:findingAids',): 'finding_aids',
+            ('rico:locationOfOriginals',): 'location_of_originals',
+            ('rico:locationOfCopies',): 'location_of_copies',
+        }),
+        ('agents', '', 'actor_i18n', {
+            ('rico:hasAgentName', 'rico:textualValue'): 'authorized_form_of_name',
+            ('rico:history',): 'history',
+            ('rico:hasBeginningDate',): 'dates_of_existence',
+            ('rico:hasOrHadLegalStatus',): 'legal_status',
+        }),
+        ('mandates', '', 'actor_i18n', {('rico:descriptiveNote',): 'mandates'}),
+        ('functions', 'agent_', 'actor_i18n', {('rico:descriptiveNote',): 'functions'}),
+        ('functions', '', 'function_object_i18n', {
+            ('rico:hasOrHadName', 'rico:textualValue'): 'authorized_form_of_name',
+            ('rico:descriptiveNote',): 'description',
+            ('rico:classification',): 'classification',
+            ('rico:history',): 'history',
+            ('rico:isOrWasRegulatedBy',): 'legislation',
+            ('rico:expressedDate',): 'dates',
+        }),
+        ('subjects', '', 'term_i18n', {('rico:hasOrHadName', 'rico:textualValue'): 'name'}),
+        ('places', '', 'term_i18n', {('rico:hasPlaceName', 'rico:textualValue'): 'name'}),
+        ('genres', '', 'term_i18n', {('rico:hasOrHadName', 'rico:textualValue'): 'name'}),
+        ('rules', '', 'rights_i18n', {('rico:descriptiveNote',): (
+            ('rights_note', 'copyright_note', 'license_terms', 'statute_note'),
+            lambda row: RiCExtractor._rights_note(row),
+        )}),
+        ('rules', 'text_', 'information_object_i18n', {('rico:descriptiveNote',): 'rules'}),
+    ]
+    
+    def _extract_translations(self):
+        """Replace translatable literals with one language-tagged value per requested culture.
         
-        for loan in self.loans_out.values():
-            graph.append({k: v for k, v in loan.items() if v is not None})
+        Each i18n table is read once for all cultures (culture IN (...)) over
+        the IDs already extracted, so a bilingual graph costs one extra batch
+        of ID queries per table instead of a second extraction. Values are
+        ordered as in self.cultures; a property with text in none of them
+        keeps the value from the main extraction.
+        """
+        placeholders = ','.join(['%s'] * len(self.cultures))
+        for cache, prefix, table, fields in self.I18N_FIELDS:
+            nodes = {}
+            for key, node in getattr(self, cache).items():
+                if not prefix and isinstance(key, int):
+                    nodes[key] = node
+                elif prefix and isinstance(key, str) and key.startswith(prefix):
+                    nodes[int(key[len(prefix):])] = node
+            if not nodes:
+                continue
+            
+            columns = ['id', 'culture']
+            for column in fields.values():
+                columns.extend(c for c in (column[0] if isinstance(column, tuple) else (column,))
+                               if c not in columns)
+            query = (f"SELECT {', '.join(columns)} FROM {table} "
+                     f"WHERE culture IN ({placeholders}) AND id IN ({{ids}})")
+            phase = f'translations:{cache}' + (f':{prefix.rstrip("_")}' if prefix else '')
+            if cache == 'records' and not prefix:
+                rows = self._fetch_for_records(phase, query, tuple(self.cultures))
+            else:
+                rows = self._fetch_by_ids(phase, query, sorted(nodes), tuple(self.cultures))
+            
+            texts = defaultdict(dict)
+            for row in rows:
+                if row['id'] not in nodes:
+                    continue
+                for path, column in fields.items():
+                    text = column[1](row) if isinstance(column, tuple) else row[column]
+                    if text:
+                        texts[(row['id'], path)][row['culture']] = text
+            
+            for (entity_id, path), by_culture in texts.items():
+                tagged = [
+                    {'@value': by_culture[culture], '@language': culture.replace('_', '-')}
+                    for culture in self.cultures if culture in by_culture
+                ]
+                self._set_path(nodes[entity_id], path, tagged[0] if len(tagged) == 1 else tagged)
+    
+    @staticmethod
+    def _set_path(node: Dict, path: Tuple[str, ...], value):
+        """Set a (possibly nested) property; nested parents that were not extracted are left alone."""
+        for key in path[:-1]:
+            node = node.get(key)
+            if not isinstance(node, dict):
+                return
+        node[path[-1]] = value
+    
+    def _build_jsonld(self, fingerprint: Optional[GraphFingerprint] = None) -> Dict:
+        graph = list(self._iter_graph_nodes(fingerprint=fingerprint))
+        return {
+            '@context': dict(self.JSONLD_CONTEXT),
+            '@graph': graph,
+            '_metadata': self._build_metadata(),
+        }
+    
+    def write_jsonld(self, fp, indent: Optional[int] = None,
+                     subjects: Optional[List[str]] = None) -> Dict:
+        """Stream the extracted graph to fp node by node and return the metadata.
         
-        for movement in self.movements.values():
-            graph.append({k: v for k, v in movement.items() if v is not None})
+        Produces the same bytes as dump_json(self._build_jsonld(), fp, indent,
+        self.json_backend), but never holds the full @graph list
+        or the encoded document in memory. Entity caches are released as each node
+        is written, so the extractor must be re-run before building another graph.
+        The @id of every written node is appended to subjects when given. With
+        fingerprint enabled, the returned metadata (not the written _metadata)
+        carries the GraphFingerprint of the graph (see _iter_graph_nodes). Canonical output writes
+        only the stable part of the metadata (see _document_metadata), so
+        compare against _build_jsonld() with that applied to its _metadata.
+        """
+        metadata = self._build_metadata()
+        fingerprint = GraphFingerprint() if self.fingerprint else None
+        writer = JsonLdStreamWriter(fp, indent=indent, backend=self.json_backend)
+        writer.begin(self.JSONLD_CONTEXT)
+        for node in self._iter_graph_nodes(release=True, fingerprint=fingerprint):
+            writer.write_node(node)
+            if subjects is not None:
+                subjects.append(node['@id'])
+        writer.end(self._document_metadata(metadata))
+        if fingerprint is not None:
+            metadata['fingerprint'] = fingerprint.hexdigest()
+        return metadata
+    
+    def write_rdf(self, fp, fmt: str, graph: Optional[str] = None,
+                  subjects: Optional[List[str]] = None, bnode_prefix: str = 'b') -> Dict:
+        """Stream the extracted graph to fp as N-Triples, N-Quads or Turtle and return the metadata.
         
-        for grap_asset in self.grap_assets.values():
-            graph.append(grap_asset)
+        Triples are serialised straight from the entity caches, which are
+        released as they are written, as in write_jsonld. There is no
+        _metadata block in RDF output; the caller gets it back instead. The
+        fingerprint is taken over the same nodes as in write_jsonld, so it does
+        not depend on the format.
+        """
+        metadata = self._build_metadata()
+        fingerprint = GraphFingerprint() if self.fingerprint else None
+        writer = RdfStreamWriter(fp, fmt, self.JSONLD_CONTEXT, graph=graph, bnode_prefix=bnode_prefix)
+        writer.begin()
+        for node in self._iter_graph_nodes(release=True, fingerprint=fingerprint):
+            writer.write_node(node)
+            if subjects is not None and '@id' in node:
+                subjects.append(node['@id'])
+        writer.end()
+        metadata['triples_count'] = writer.triple_count
+        if fingerprint is not None:
+            metadata['fingerprint'] = fingerprint.hexdigest()
+        return metadata
+    
+    @staticmethod
+    def _compact(node: Dict) -> Dict:
+        """Drop unset properties so the node can be written as stored."""
+        return {k: v for k, v in node.items() if v is not None}
+    
+    def _iter_entities(self, entities: Dict, release: bool = False):
+        """Yield a cache's nodes in insertion order, or by @id for canonical output, popping them on release."""
+        if self.canonical:
+            keys = sorted(entities, key=lambda key: entities[key]['@id'])
+        elif not release:
+            yield from entities.values()
+            return
+        else:
+            keys = list(entities)
+        for key in keys:
+            yield entities.pop(key) if release else entities[key]
+    
+    # Relation predicates written onto record and agent nodes, in output order
+    NODE_PREDICATES = (
+        'rico:hasOrHadSubject', 'rico:hasOrHadMainSubject',
+        'rico:hasOrHadPlaceOfOrigin', 'rico:hasOrHadContentOfType',
+        'rico:hasInstantiation', 'rico:isAssociatedWith',
+        'rico:isOrWasRegulatedBy', 'rico:isDescribedBy',
+        'rico:hasCreator', 'rico:hasAccumulator',
+        'rico:precedes', 'rico:follows', 'rico:includes',
+        'rico:hasOrHadFunction', 'rico:isEquivalentTo',
+        'grap:hasHeritageAssetData',
+    )
+    
+    @classmethod
+    def _add_relation_properties(cls, node: Dict, predicates: Dict[str, Dict[str, None]]):
+        if not predicates:
+            return
+        for pred in cls.NODE_PREDICATES:
+            targets = predicates.get(pred)
+            if targets:
+                if len(targets) == 1:
+                    node[pred] = {'@id': next(iter(targets))}
+                else:
+                    node[pred] = [{'@id': t} for t in targets]
+    
+    def _without_shared(self, nodes, fingerprint: Optional[GraphFingerprint]):
+        """Pass nodes on, reducing shared entities another fonds has written to their name matches."""
+        for node in nodes:
+            if fingerprint is not None:
+                fingerprint.add(node)
+            if node['@id'] in self._shared_refs:
+                # Only this fonds' rico:isEquivalentTo links are left to write
+                if 'rico:isEquivalentTo' not in node:
+                    continue
+                node = {'@id': node['@id'], 'rico:isEquivalentTo': node['rico:isEquivalentTo']}
+            yield node
+    
+    def _iter_graph_nodes(self, release: bool = False,
+                          fingerprint: Optional[GraphFingerprint] = None):
+        """Yield finalised JSON-LD nodes in output order.
         
-        # Count relations by type
-        relation_counts = defaultdict(int)
-        for rel in self.relations:
-            relation_counts[rel['predicate']] += 1
+        Nodes come section by section (records, agents, activities, ...),
+        or, for canonical output, canonicalised and merged across sections
+        by @id. Each section is already in @id order then, so the merge stays
+        lazy and release still frees nodes as they are written. fingerprint
+        takes in every node in full, shared entities included, so it is the
+        same whichever fonds of a run writes them.
+        """
+        relations = self.relations
+        if release:
+            self.relations = RelationIndex()
+            self.record_info, self.agent_info, self.activity_info = {}, {}, {}
         
-        return {
-            '@context': {
-                'rico': 'https://www.ica.org/standards/RiC/ontology#',
-                'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
-                'rdfs': 'http://www.w3.org/2000/01/rdf-schema#',
-                'xsd': 'http://www.w3.org/2001/XMLSchema#',
-                'owl': 'http://www.w3.org/2002/07/owl#',
-                'spectrum': 'https://collectionstrust.org.uk/spectrum#',
-                'grap': 'https://www.asb.co.za/grap#',
-            },
-            '@graph': graph,
-            '_metadata': {
-                'extracted': datetime.utcnow().isoformat() + 'Z',
-                'source': f'AtoM instance: {self.instance_id}',
-                'extractor_version': '5.0',
-                'records_count': len(self.records),
-                'agents_count': len(self.agents),
-                'activities_count': len(self.activities),
-                'places_count': len(self.places),
-                'subjects_count': len(self.subjects),
-                'genres_count': len(self.genres),
-                'instantiations_count': len(self.instantiations),
-                'rules_count': len(self.rules),
-                'mandates_count': len(self.mandates),
-                'functions_count': len(self.functions),
-                'condition_checks_count': len(self.condition_checks),
-                'valuations_count': len(self.valuations),
-                'loans_out_count': len(self.loans_out),
-                'movements_count': len(self.movements),
-                'grap_assets_count': len(self.grap_assets),
-                'relations_count': len(self.relations),
-                'relation_types': dict(relation_counts),
+        repository = self.repository
+        sections = [
+            self._iter_record_nodes(relations, release),
+            self._iter_agent_nodes(relations, release),
+            # Core activities
+            self._iter_entities(self.activities, release),
+            # Other entities
+            self._iter_entities(self.places, release),
+            self._iter_entities(self.subjects, release),
+            self._iter_entities(self.genres, release),
+            self._iter_entities(self.instantiations, release),
+            ({k: v for k, v in rule.items() if v is not None}
+             for rule in self._iter_entities(self.rules, release)),
+            self._iter_entities(self.mandates, release),
+            ({k: v for k, v in function.items() if v is not None}
+             for function in self._iter_entities(self.functions, release)),
+            [repository] if repository else [],
+            # Phase 5: Spectrum/GRAP entities (mapped nodes carry no None values)
+            self._iter_entities(self.condition_checks, release),
+            self._iter_entities(self.valuations, release),
+            self._iter_entities(self.loans_out, release),
+            self._iter_entities(self.movements, release),
+            self._iter_entities(self.grap_assets, release),
+        ]
+        if self._shared_refs or fingerprint is not None:
+            sections = [self._without_shared(section, fingerprint) for section in sections]
+        if not self.canonical:
+            for section in sections:
+                yield from section
+            return
+        for node in heapq.merge(*sections, key=lambda node: node['@id']):
+            yield canonical_node(node)
+    
+    def _iter_record_nodes(self, relations: RelationIndex, release: bool):
+        for record in self._iter_entities(self.records, release):
+            record_clean = record if release else dict(record)
+            
+            if self.repository:
+                record_clean['rico:isOrWasHeldBy'] = {'@id': self.repository['@id']}
+            
+            record_relations = relations.pop(record_clean.get('@id')) if release \
+                else relations.get(record_clean.get('@id'))
+            self._add_relation_properties(record_clean, record_relations)
+            yield record_clean
+    
+    def _iter_agent_nodes(self, relations: RelationIndex, release: bool):
+        for agent in self._iter_entities(self.agents, release):
+            agent_clean = agent if release else dict(agent)
+            agent_relations = relations.pop(agent_clean.get('@id')) if release \
+                else relations.get(agent_clean.get('@id'))
+            self._add_relation_properties(agent_clean, agent_relations)
+            yield agent_clean
+    
+    def _document_metadata(self, metadata: Dict) -> Dict:
+        """The _metadata written into the document: all of it, or for canonical output only what the data determines."""
+        if not self.canonical:
+            return metadata
+        stable = {key: value for key, value in metadata.items() if key not in VOLATILE_METADATA}
+        if 'relation_types' in stable:
+            stable['relation_types'] = dict(sorted(stable['relation_types'].items()))
+        return stable
+    
+    def _build_metadata(self) -> Dict:
+        metadata = {
+            'extracted': datetime.utcnow().isoformat() + 'Z',
+            'source': f'AtoM instance: {self.instance_id}',
+            'extractor_version': '5.0',
+            'records_count': len(self.records),
+            'agents_count': len(self.agents),
+            'activities_count': len(self.activities),
+            'places_count': len(self.places),
+            'subjects_count': len(self.subjects),
+            'genres_count': len(self.genres),
+            'instantiations_count': len(self.instantiations),
+            'rules_count': len(self.rules),
+            'mandates_count': len(self.mandates),
+            'functions_count': len(self.functions),
+            'condition_checks_count': len(self.condition_checks),
+            'valuations_count': len(self.valuations),
+            'loans_out_count': len(self.loans_out),
+            'movements_count': len(self.movements),
+            'grap_assets_count': len(self.grap_assets),
+            'relations_count': len(self.relations),
+            'relation_types': dict(self.relations.counts),
+        }
+        if self.cultures:
+            metadata['cultures'] = list(self.cultures)
+        if self.registry is not None:
+            metadata['shared_entities_referenced'] = len(self._shared_refs)
+        if self.profile:
+            # Extraction phases only: the metadata is written before the graph
+            metadata['profile'] = {
+                'seconds': round(sum(entry['seconds'] for entry in self.phase_stats), 4),
+                'phases': list(self.phase_stats),
+            }
+        if self._delta_since is not None:
+            metadata['delta'] = {
+                'since': self._delta_since,
+                'changed_records': len(self.changed_record_ids),
+                'context_records': len(self._context_records),
             }
+        return metadata
+
+
+# ==================== PARALLEL MULTI-FONDS EXTRACTION ====================
+
+_worker_extractor = None
+
+
+def largest_first(items, size) -> List:
+    """Order pool jobs by size(item), largest first, so the pool is not left waiting on one big job at the end."""
+    return sorted(items, key=size, reverse=True)
+
+
+def _init_worker(db_config: Dict[str, str], base_uri: str, instance_id: str,
+                 options: Dict, taxonomy_cache: Dict, registry=None,
+                 terms: Optional[TermDictionary] = None):
+    """Pool initializer: each worker process keeps one extractor and one connection."""
+    global _worker_extractor
+    _worker_extractor = RiCExtractor(db_config, base_uri, instance_id,
+                                     taxonomy_cache=taxonomy_cache, terms=terms,
+                                     registry=registry, **options)
+    try:
+        _worker_extractor.connect()
+    except Error as e:
+        # Not raised: the pool would keep replacing the dead worker and never
+        # return a result. Each job connects again and reports the error.
+        print(f"Database connection error: {e}")
+
+
+def _extract_fonds_job(job: Dict) -> Dict:
+    return extract_fonds_to_file(_worker_extractor, **job)
+
+
+def extract_fonds_to_file(extractor: RiCExtractor, fonds_id: int, output: str,
+                          indent: Optional[int] = None, since: Optional[str] = None,
+                          update_output: Optional[str] = None, fmt: str = 'jsonld',
+                          compress: bool = False, previous_fingerprint: Optional[str] = None) -> Dict:
+    """Stream one fonds to output and return its summary entry. Failures are reported, not raised.
+    
+    When the graph fingerprint equals previous_fingerprint the entry is marked
+    unchanged and output is truncated to zero bytes, so loaders can skip it.
+    A transient database error, even one a phase only warned about, makes
+    the extractor reconnect and redo the fonds up to extractor.retries times.
+    """
+    started = time.perf_counter()
+    entry = {'fonds_id': fonds_id, 'output': output, 'graph': extractor.graph_uri(fonds_id)}
+    _retry_transient(extractor, entry, f"fonds {fonds_id}", output,
+                     lambda: _extract_fonds_entry(extractor, entry, fonds_id, output, indent, since,
+                                                  update_output, fmt, compress, previous_fingerprint))
+    entry['seconds'] = round(time.perf_counter() - started, 3)
+    return entry
+
+
+def _retry_transient(extractor: RiCExtractor, entry: Dict, label: str, output: str, attempt_fn,
+                     retries: Optional[int] = None):
+    """Run attempt_fn, reconnecting and rerunning it after transient database errors.
+    
+    Every attempt first connects when the extractor has no connection, so a
+    database that stays unreachable is reported like any other failure. A
+    failed attempt's output is removed. The retry count and any final error
+    are recorded in entry. retries defaults to extractor.retries.
+    """
+    retries = extractor.retries if retries is None else retries
+    attempt = 0
+    while True:
+        try:
+            if extractor.connection is None:
+                extractor.connect()
+            attempt_fn()
+            break
+        except Exception as e:
+            if output != '-' and os.path.exists(output):
+                os.remove(output)
+            if attempt < retries and (extractor.is_transient_error(e) or extractor.connection_error):
+                attempt += 1
+                delay = extractor.backoff(attempt)
+                print(f"  {label}: {e}; reconnecting in {delay:g}s ({attempt}/{retries})")
+                time.sleep(delay)
+                extractor.disconnect()
+                continue
+            entry['status'] = 'error'
+            entry['error'] = str(e)
+            break
+    if attempt:
+        entry['retries'] = attempt
+
+
+def write_fonds(extractor: RiCExtractor, fonds_id: int, output: str, indent: Optional[int],
+                since: Optional[str], subjects: Optional[List[str]], fmt: str = 'jsonld',
+                stream: bool = False, compress: bool = False) -> Dict:
+    """Write one fonds to output ('-' for standard output) and return its metadata.
+    
+    JSON-LD is built in memory and then dumped unless stream is set; the
+    RDF formats are always streamed. subjects, when a list, collects the
+    @id of every node written.
+    """
+    if stream or fmt != 'jsonld':
+        with open_output(output, compress) as f:
+            return extractor.stream_fonds(fonds_id, f, indent=indent, since=since,
+                                          subjects=subjects, fmt=fmt)
+    fingerprint = GraphFingerprint() if extractor.fingerprint else None
+    result = extractor.extract_fonds(fonds_id, since=since, fingerprint=fingerprint)
+    meta = result['_metadata']
+    with open_output(output, compress) as f:
+        dump_json(dict(result, _metadata=extractor._document_metadata(meta)), f,
+                  indent, extractor.json_backend)
+    if subjects is not None:
+        subjects.extend(node['@id'] for node in result['@graph'])
+    if fingerprint is not None:
+        meta = dict(meta, fingerprint=fingerprint.hexdigest())
+    return meta
+
+
+def _extract_fonds_entry(extractor: RiCExtractor, entry: Dict, fonds_id: int, output: str,
+                         indent: Optional[int], since: Optional[str], update_output: Optional[str],
+                         fmt: str, compress: bool, previous_fingerprint: Optional[str]):
+    """One attempt of extract_fonds_to_file; fills entry or raises."""
+    subjects = [] if update_output else None
+    with open_output(output, compress) as f:
+        meta = extractor.stream_fonds(fonds_id, f, indent=indent, since=since,
+                                      subjects=subjects, fmt=fmt)
+    if update_output:
+        if subjects:
+            with open(update_output, 'w', encoding='utf-8') as f:
+                f.write(extractor.build_replace_update(subjects))
+            entry['update_output'] = update_output
+        elif os.path.exists(update_output):
+            os.remove(update_output)
+    entry['status'] = 'ok'
+    entry['records_count'] = meta['records_count']
+    entry['relations_count'] = meta['relations_count']
+    if 'triples_count' in meta:
+        entry['triples_count'] = meta['triples_count']
+    if 'fingerprint' in meta:
+        entry['fingerprint'] = meta['fingerprint']
+        entry['unchanged'] = meta['fingerprint'] == previous_fingerprint
+        if entry['unchanged']:
+            open(output, 'wb').close()
+    if 'shared_entities_referenced' in meta:
+        entry['shared_entities_referenced'] = meta['shared_entities_referenced']
+    if extractor.profile:
+        entry['phases'] = list(extractor.phase_stats)
+    if 'delta' in meta:
+        entry['changed_records'] = meta['delta']['changed_records']
+    entry['bytes'] = os.path.getsize(output)
+    if extractor.canonical:
+        entry['sha256'] = write_metadata_sidecar(output, meta, extractor.json_backend, indent)['sha256']
+
+
+def extract_many(db_config: Dict[str, str], base_uri: str, instance_id: str,
+                 fonds_ids: List[int], output_dir: str, workers: int = 1,
+                 options: Optional[Dict] = None, taxonomy_cache: Optional[Dict] = None,
+                 terms: Optional[TermDictionary] = None,
+                 indent: Optional[int] = None, since_by_fonds: Optional[Dict] = None,
+                 incremental: bool = False, extractor: Optional[RiCExtractor] = None,
+                 dedup_entities: bool = False, fmt: str = 'jsonld',
+                 compress: bool = False,
+                 fingerprints: Optional[Dict[str, str]] = None,
+                 journal: Optional[ExportJournal] = None) -> Tuple[List[Dict], Optional[Dict]]:
+    """Extract many fonds to output_dir/fonds_<id>.<fmt>[.gz] over a pool of worker processes.
+    
+    Every worker opens its own connection and reuses it for all the fonds it
+    is handed; the taxonomy cache and term dictionary are loaded once by the
+    caller and shared.
+    With workers <= 1 the fonds are extracted in this process, reusing
+    extractor when given. With dedup_entities, shared agents, terms, mandates
+    and functions are written by the first fonds that needs them only.
+    fingerprints maps fonds ID strings to the fingerprint of their last
+    extraction (options must enable fingerprint); fonds that match are left
+    as empty files and marked unchanged. With a journal, fonds it records
+    as finished are not extracted again (their entries come back marked
+    resumed) and every fonds that finishes is recorded as it completes.
+    
+    Returns one summary entry per fonds, in input order, and the entity
+    registry statistics (None without dedup_entities).
+    """
+    options = options or {}
+    since_by_fonds = since_by_fonds or {}
+    fingerprints = fingerprints or {}
+    os.makedirs(output_dir, exist_ok=True)
+    
+    extension = fmt + ('.gz' if compress else '')
+    jobs = []
+    results = []
+    for fonds_id in fonds_ids:
+        output = os.path.join(output_dir, f"fonds_{fonds_id}.{extension}")
+        done = journal.completed(fonds_id, output) if journal else None
+        if done:
+            results.append(dict(done, resumed=True))
+            continue
+        jobs.append({
+            'fonds_id': fonds_id,
+            'output': output,
+            'indent': indent,
+            'since': since_by_fonds.get(fonds_id),
+            'update_output': os.path.join(output_dir, f"fonds_{fonds_id}.ru") if incremental else None,
+            'fmt': fmt,
+            'compress': compress,
+            'previous_fingerprint': fingerprints.get(str(fonds_id)),
+        })
+    
+    if results:
+        print(f"  Resuming: {len(results)} fonds already finished in {journal.path}")
+    resumed = len(results)
+    
+    def report(entry):
+        results.append(entry)
+        if journal:
+            journal.record(entry)
+        detail = (f"{entry['records_count']} records" if entry['status'] == 'ok'
+                  else entry['error'])
+        if entry.get('unchanged'):
+            detail += ', unchanged'
+        print(f"  [{len(results) - resumed}/{len(jobs)}] fonds {entry['fonds_id']}: "
+              f"{entry['status']} - {detail} ({entry['seconds']}s)")
+    
+    registry_stats = None
+    if workers <= 1 or len(jobs) <= 1:
+        registry = EntityRegistry() if dedup_entities else None
+        own_extractor = extractor is None
+        if own_extractor:
+            # Connected by the first job, which reports a database that is down
+            extractor = RiCExtractor(db_config, base_uri, instance_id,
+                                     taxonomy_cache=taxonomy_cache, terms=terms, **options)
+        previous_registry, extractor.registry = extractor.registry, registry
+        try:
+            for job in jobs:
+                report(extract_fonds_to_file(extractor, **job))
+        finally:
+            extractor.registry = previous_registry
+            if own_extractor:
+                extractor.close()
+        if registry is not None:
+            registry_stats = registry.stats()
+    else:
+        manager = None
+        registry = None
+        if dedup_entities:
+            manager = EntityRegistryManager()
+            manager.start()
+            registry = manager.EntityRegistry()
+        try:
+            with multiprocessing.Pool(processes=min(workers, len(jobs)),
+                                      initializer=_init_worker,
+                                      initargs=(db_config, base_uri, instance_id,
+                                                options, taxonomy_cache or {}, registry,
+                                                terms)) as pool:
+                for entry in pool.imap_unordered(_extract_fonds_job, jobs):
+                    report(entry)
+            if registry is not None:
+                registry_stats = registry.stats()
+        finally:
+            if manager is not None:
+                manager.shutdown()
+    
+    position = {fonds_id: i for i, fonds_id in enumerate(fonds_ids)}
+    results.sort(key=lambda entry: position[entry['fonds_id']])
+    return results, registry_stats
+
+
+# ==================== SHARDED WHOLE-INSTANCE EXPORT ====================
+
+SHARD_STRATEGIES = ('repository', 'size')
+
+
+def plan_shards(top_level: List[Dict], shard_by: str, shard_count: int = 1) -> Dict[str, List[int]]:
+    """Group top-level descriptions (list_top_level rows) into named shards.
+    
+    'repository' gives one shard per repository, plus repository-none for
+    descriptions without one. 'size' spreads them over shard_count shards
+    of about the same number of descriptions, placing the largest first
+    onto the lightest shard. Shards and the fonds in them keep tree order.
+    """
+    if shard_by == 'repository':
+        shards = {}
+        for row in top_level:
+            repository_id = row['repository_id']
+            key = f"repository-{repository_id if repository_id is not None else 'none'}"
+            shards.setdefault(key, []).append(row['id'])
+        return shards
+    if shard_by != 'size':
+        raise ValueError(f"Unknown shard strategy: {shard_by}")
+    
+    shard_count = max(1, min(shard_count, len(top_level)))
+    position = {row['id']: i for i, row in enumerate(top_level)}
+    members = [[] for _ in range(shard_count)]
+    loads = [(0, index) for index in range(shard_count)]
+    for row in sorted(top_level, key=lambda row: (row['descendant_count'] or 0), reverse=True):
+        load, index = heapq.heappop(loads)
+        members[index].append(row['id'])
+        heapq.heappush(loads, (load + (row['descendant_count'] or 0) + 1, index))
+    width = len(str(shard_count))
+    return {
+        f"size-{index + 1:0{width}d}": sorted(ids, key=position.get)
+        for index, ids in enumerate(members) if ids
+    }
+
+
+def read_manifest(path: str) -> Dict:
+    """Load a shard manifest; a missing or unreadable file gives an empty one."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _extract_shard_job(job: Dict) -> Dict:
+    return extract_shard_to_file(_worker_extractor, **job)
+
+
+def extract_shard_to_file(extractor: RiCExtractor, shard: str, fonds_ids: List[int], output: str,
+                          fmt: str = 'jsonld', indent: Optional[int] = None,
+                          previous_fingerprint: Optional[str] = None) -> Dict:
+    """Stream one shard to a gzipped output and return its manifest entry. Failures are reported, not raised.
+    
+    Every shard is self-contained: shared entities are written once within
+    it, whatever other shards contain. The entry carries the byte size and
+    SHA-256 of the file and the graph fingerprint, and is marked changed
+    unless the fingerprint equals previous_fingerprint.
+    """
+    started = time.perf_counter()
+    entry = {'shard': shard, 'file': os.path.basename(output), 'fonds_ids': list(fonds_ids)}
+    _retry_transient(extractor, entry, f"shard {shard}", output,
+                     lambda: _extract_shard_entry(extractor, entry, shard, fonds_ids, output,
+                                                  fmt, indent, previous_fingerprint))
+    entry['seconds'] = round(time.perf_counter() - started, 3)
+    return entry
+
+
+def _extract_shard_entry(extractor: RiCExtractor, entry: Dict, shard: str, fonds_ids: List[int],
+                         output: str, fmt: str, indent: Optional[int],
+                         previous_fingerprint: Optional[str]):
+    """One attempt of extract_shard_to_file; fills entry or raises."""
+    previous_registry, extractor.registry = extractor.registry, EntityRegistry()
+    try:
+        with open_output(output, compress=True) as f:
+            totals = extractor.stream_shard(fonds_ids, f, fmt=fmt, indent=indent,
+                                            metadata={'shard': shard})
+    finally:
+        extractor.registry = previous_registry
+    entry['status'] = 'ok'
+    entry.update(totals)
+    entry['bytes'] = os.path.getsize(output)
+    entry['sha256'] = file_sha256(output)
+    entry['changed'] = totals['fingerprint'] != previous_fingerprint
+
+
+def extract_shards(db_config: Dict[str, str], base_uri: str, instance_id: str,
+                   shards: Dict[str, List[int]], output_dir: str, workers: int = 1,
+                   options: Optional[Dict] = None, taxonomy_cache: Optional[Dict] = None,
+                   terms: Optional[TermDictionary] = None, indent: Optional[int] = None,
+                   extractor: Optional[RiCExtractor] = None, fmt: str = 'jsonld',
+                   previous_manifest: Optional[Dict] = None) -> List[Dict]:
+    """Extract each shard to output_dir/shard_<name>.<fmt>.gz over a pool of worker processes.
+    
+    Workers are set up as in extract_many. previous_manifest is the manifest
+    of the last run, whose fingerprints decide which shards are marked
+    changed. Returns one manifest entry per shard, in shards order.
+    """
+    options = options or {}
+    os.makedirs(output_dir, exist_ok=True)
+    previous = {
+        entry['shard']: entry.get('fingerprint')
+        for entry in (previous_manifest or {}).get('shards', [])
+    }
+    jobs = [
+        {
+            'shard': shard,
+            'fonds_ids': fonds_ids,
+            'output': os.path.join(output_dir, f"shard_{shard}.{fmt}.gz"),
+            'fmt': fmt,
+            'indent': indent,
+            'previous_fingerprint': previous.get(shard),
         }
+        for shard, fonds_ids in largest_first(shards.items(), lambda item: len(item[1]))
+    ]
+    results = []
+    
+    def report(entry):
+        results.append(entry)
+        detail = (f"{entry['fonds_count']} fonds, {entry['records_count']} records, {entry['bytes']} bytes"
+                  if entry['status'] == 'ok' else entry['error'])
+        if entry['status'] == 'ok' and not entry['changed']:
+            detail += ', unchanged'
+        print(f"  [{len(results)}/{len(jobs)}] shard {entry['shard']}: "
+              f"{entry['status']} - {detail} ({entry['seconds']}s)")
+    
+    if workers <= 1 or len(jobs) <= 1:
+        own_extractor = extractor is None
+        if own_extractor:
+            # Connected by the first job, which reports a database that is down
+            extractor = RiCExtractor(db_config, base_uri, instance_id,
+                                     taxonomy_cache=taxonomy_cache, terms=terms, **options)
+        try:
+            for job in jobs:
+                report(extract_shard_to_file(extractor, **job))
+        finally:
+            if own_extractor:
+                extractor.close()
+    else:
+        with multiprocessing.Pool(processes=min(workers, len(jobs)),
+                                  initializer=_init_worker,
+                                  initargs=(db_config, base_uri, instance_id,
+                                            options, taxonomy_cache or {}, None, terms)) as pool:
+            for entry in pool.imap_unordered(_extract_shard_job, jobs):
+                report(entry)
+    
+    position = {shard: i for i, shard in enumerate(shards)}
+    results.sort(key=lambda entry: position[entry['shard']])
+    return results
 
 
 def main():
     parser = argparse.ArgumentParser(description='Extract AtoM data to RiC-O JSON-LD (v5 - Spectrum/GRAP)')
     parser.add_argument('--list-fonds', action='store_true', help='List available fonds')
     parser.add_argument('--fonds-id', type=int, help='ID of fonds to extract')
-    parser.add_argument('--output', '-o', type=str, default='output.jsonld', help='Output file')
+    parser.add_argument('--output', '-o', type=str, default='output.jsonld',
+                        help="Output file ('-' for standard output)")
+    parser.add_argument('--format', choices=RiCExtractor.OUTPUT_FORMATS, default='jsonld',
+                        help='Output serialisation; nt/nq/ttl are written straight from the entity model '
+                             '(nq puts each fonds in its own named graph and nothing in the default graph, '
+                             'so a Fuseki dataset loaded with it needs tdb2:unionDefaultGraph for '
+                             'default-graph queries)')
+    parser.add_argument('--gzip', action='store_true',
+                        help='Gzip the output (implied by a .gz output name)')
     parser.add_argument('--pretty', action='store_true', help='Pretty-print JSON')
     parser.add_argument('--list-standalone', action='store_true', help='List standalone records (non-fonds)')
+    parser.add_argument('--json', action='store_true',
+                        help='Print --list-fonds/--list-standalone as a JSON array on standard output')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write graph nodes to the output file as they are finalised (lower peak memory)')
+    parser.add_argument('--chunk-size', type=int, default=RiCExtractor.DEFAULT_CHUNK_SIZE,
+                        help='Record IDs per batched IN (...) query')
+    parser.add_argument('--fetch-batch-size', type=int, default=RiCExtractor.DEFAULT_FETCH_BATCH_SIZE,
+                        help='Rows per round trip from the unbuffered cursor (0 = buffer whole result sets)')
+    parser.add_argument('--temp-table-threshold', type=int, default=RiCExtractor.DEFAULT_TEMP_TABLE_THRESHOLD,
+                        help='Join record IDs via a temp table above this many records (0 disables)')
+    parser.add_argument('--phase-workers', type=int, default=1,
+                        help='Run independent extraction phases of a fonds concurrently, this many at a time, '
+                             'each on its own database connection (output is unchanged)')
+    parser.add_argument('--hierarchy', choices=RiCExtractor.HIERARCHY_STRATEGIES, default='auto',
+                        help='Walk the fonds via nested-set lft/rgt range or recursive parent_id CTE')
+    parser.add_argument('--since', type=str,
+                        help='Incremental: only extract changes after this timestamp (YYYY-MM-DD HH:MM:SS)')
+    parser.add_argument('--watermark-file', type=str,
+                        help='Incremental: JSON file of per-fonds watermarks, read when --since is not given')
+    parser.add_argument('--update-watermark', action='store_true',
+                        help='Advance the fonds watermark in --watermark-file after extraction')
+    parser.add_argument('--update-output', type=str,
+                        help='Incremental: SPARQL Update removing replaced subjects (default: <output>.ru)')
+    parser.add_argument('--fonds-ids', type=str, help='Comma-separated fonds IDs to extract concurrently')
+    parser.add_argument('--all-fonds', action='store_true', help='Extract every fonds concurrently')
+    parser.add_argument('--include-standalone', action='store_true',
+                        help='With --all-fonds, also extract standalone top-level records')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes for --fonds-ids/--all-fonds (default: CPU count)')
+    parser.add_argument('--output-dir', type=str, default='.',
+                        help='Directory for fonds_<id>.jsonld files and summary.json in multi-fonds mode')
+    parser.add_argument('--shard-by', choices=SHARD_STRATEGIES,
+                        help='Export every top-level description into gzipped shard files, one per repository '
+                             'or --shards size-balanced ones, with a manifest.json in --output-dir')
+    parser.add_argument('--shards', type=int,
+                        help='Number of shards for --shard-by size (default: --workers)')
+    parser.add_argument('--no-entity-dedup', action='store_true',
+                        help='In multi-fonds mode, write shared agents/terms/functions into every fonds graph '
+                             '(implied by --canonical and --format nq)')
+    parser.add_argument('--list-changed', action='store_true',
+                        help='Print the IDs of fonds (--fonds-ids, or all fonds and standalone records) '
+                             'changed since their --watermark-file entry, one per line')
+    parser.add_argument('--database-now', action='store_true',
+                        help='Print the database server time, for use with --set-watermark')
+    parser.add_argument('--set-watermark', type=str, metavar='TIMESTAMP',
+                        help='Record TIMESTAMP as the watermark of --fonds-id/--fonds-ids in --watermark-file '
+                             'without extracting')
+    parser.add_argument('--fingerprint-file', type=str,
+                        help='JSON file of per-fonds graph fingerprints: fonds whose graph is unchanged '
+                             'since the last load are left as an empty output file; new fingerprints go to '
+                             'FILE.pending until --commit-fingerprints confirms the load')
+    parser.add_argument('--commit-fingerprints', action='store_true',
+                        help='Move the pending fingerprints of --fonds-id/--fonds-ids into --fingerprint-file '
+                             'once they are loaded, without extracting')
+    parser.add_argument('--forget-fingerprints', action='store_true',
+                        help='Remove --fonds-id/--fonds-ids from --fingerprint-file (e.g. after a failed load) '
+                             'without extracting')
+    parser.add_argument('--cultures', type=str,
+                        help='Comma-separated AtoM cultures (e.g. en,af) to emit as language-tagged literals, '
+                             'fetched in the same extraction')
+    parser.add_argument('--term-cache', type=str,
+                        help='JSON file caching the term/taxonomy name dictionary between runs; '
+                             'rebuilt when a term or taxonomy changes')
+    parser.add_argument('--journal', type=str,
+                        help='Multi-fonds mode: record finished fonds in this JSON-lines journal and skip '
+                             'the ones it lists on the next run (resume after a crash)')
+    parser.add_argument('--restart', action='store_true',
+                        help='Discard the --journal and extract every fonds again')
+    parser.add_argument('--retries', type=int, default=RiCExtractor.DEFAULT_RETRIES,
+                        help='Reconnect and retry this many times after a transient database error')
+    parser.add_argument('--retry-delay', type=float, default=RiCExtractor.DEFAULT_RETRY_DELAY,
+                        help='Seconds before the first retry, doubled on each further one')
+    parser.add_argument('--max-replica-lag', type=float, default=ConnectionFactory.DEFAULT_MAX_REPLICA_LAG,
+                        help='Read from the ATOM_DB_REPLICA_HOST replica only while it is at most this many '
+                             'seconds behind; otherwise read from the primary')
+    parser.add_argument('--query-timeout', type=float,
+                        help='Abort any query running longer than this many seconds (server-side '
+                             'max_execution_time / max_statement_time)')
+    parser.add_argument('--canonical', action='store_true',
+                        help='Byte-identical output for identical data: nodes sorted by @id, sorted properties '
+                             'and values, and the extraction time and profile moved to <output>.meta.json '
+                             'with the output SHA-256 (implies --no-entity-dedup in multi-fonds mode)')
+    parser.add_argument('--json-backend', choices=JSON_BACKENDS, default='stdlib',
+                        help='JSON encoder for output (default: stdlib). orjson, or auto when it is installed, '
+                             'is faster but its compact output has no spaces after separators')
+    parser.add_argument('--benchmark-json', action='store_true',
+                        help='With --fonds-id, extract once and time encoding the graph with each '
+                             'installed JSON backend instead of writing output')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Print per-chunk query timings')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-phase bytes and peak memory, add them to _metadata and print a table')
+    parser.add_argument('--metrics-file', type=str,
+                        help='Write per-phase metrics as a Prometheus textfile (implies --profile data)')
     
     args = parser.parse_args()
     
+    if args.fingerprint_file and (args.since or args.watermark_file) \
+            and not (args.forget_fingerprints or args.commit_fingerprints):
+        parser.error('--fingerprint-file compares whole graphs and cannot be used for incremental extraction')
+    if args.output == '-' or args.list_changed or args.database_now or args.json:
+        # Keep standard output for the data; progress messages go to stderr
+        sys.stdout = sys.stderr
+    compress = args.gzip or args.output.endswith('.gz')
+    
     db_config = {
         'host': os.environ.get('ATOM_DB_HOST', 'localhost'),
         'user': os.environ.get('ATOM_DB_USER', 'root'),
@@ -1685,12 +4080,84 @@ def main():
     base_uri = os.environ.get('RIC_BASE_URI', 'https://archives.theahg.co.za/ric')
     instance_id = os.environ.get('ATOM_INSTANCE_ID', 'atom-psis')
     
-    extractor = RiCExtractor(db_config, base_uri, instance_id)
+    options = {
+        'chunk_size': args.chunk_size,
+        'temp_table_threshold': args.temp_table_threshold,
+        'hierarchy_strategy': args.hierarchy,
+        'fetch_batch_size': args.fetch_batch_size,
+        'retries': args.retries,
+        'retry_delay': args.retry_delay,
+        'phase_workers': args.phase_workers,
+        'replica_config': replica_config_from_env(db_config),
+        'max_replica_lag': args.max_replica_lag,
+        'query_timeout': args.query_timeout,
+        'canonical': args.canonical,
+        'verbose': args.verbose,
+        'profile': args.profile or bool(args.metrics_file),
+        'fingerprint': bool(args.fingerprint_file),
+        'cultures': [c.strip() for c in args.cultures.split(',') if c.strip()] if args.cultures else None,
+        'json_backend': args.json_backend,
+    }
+    extractor = RiCExtractor(db_config, base_uri, instance_id, term_cache=args.term_cache, **options)
     
     try:
-        extractor.connect()
+        # Bookkeeping on the state files does not need the database
+        if not (args.set_watermark or args.commit_fingerprints or args.forget_fingerprints):
+            if mysql is None:
+                print(MISSING_DRIVER)
+                sys.exit(1)
+            try:
+                extractor.connect()
+            except Error as e:
+                print(f"Database connection error: {e}")
+                sys.exit(1)
+        
+        if args.database_now:
+            print(extractor.database_now(), file=sys.__stdout__)
+        
+        elif args.set_watermark:
+            if not args.watermark_file:
+                parser.error('--set-watermark requires --watermark-file')
+            fonds_ids = [int(x) for x in args.fonds_ids.split(',') if x.strip()] if args.fonds_ids \
+                else [args.fonds_id] if args.fonds_id else []
+            if not fonds_ids:
+                parser.error('--set-watermark requires --fonds-id or --fonds-ids')
+            write_watermark(args.watermark_file, fonds_ids, args.set_watermark)
+        
+        elif args.forget_fingerprints:
+            if not args.fingerprint_file:
+                parser.error('--forget-fingerprints requires --fingerprint-file')
+            fonds_ids = [int(x) for x in args.fonds_ids.split(',') if x.strip()] if args.fonds_ids \
+                else [args.fonds_id] if args.fonds_id else []
+            if not fonds_ids:
+                parser.error('--forget-fingerprints requires --fonds-id or --fonds-ids')
+            write_fingerprints(args.fingerprint_file, {fonds_id: None for fonds_id in fonds_ids})
         
-        if args.list_fonds:
+        elif args.commit_fingerprints:
+            if not args.fingerprint_file:
+                parser.error('--commit-fingerprints requires --fingerprint-file')
+            fonds_ids = [int(x) for x in args.fonds_ids.split(',') if x.strip()] if args.fonds_ids \
+                else [args.fonds_id] if args.fonds_id else []
+            if not fonds_ids:
+                parser.error('--commit-fingerprints requires --fonds-id or --fonds-ids')
+            commit_fingerprints(args.fingerprint_file, fonds_ids)
+        
+        elif args.list_changed:
+            if args.fonds_ids:
+                fonds_ids = [int(x) for x in args.fonds_ids.split(',') if x.strip()]
+            else:
+                fonds_ids = [row['id'] for row in extractor.list_fonds() + extractor.list_standalone()]
+            changed = extractor.list_changed_fonds(fonds_ids, read_watermarks(args.watermark_file))
+            for fonds_id in changed:
+                print(fonds_id, file=sys.__stdout__)
+        
+        elif args.json and (args.list_fonds or args.list_standalone):
+            rows = (extractor.list_fonds() if args.list_fonds else []) + \
+                (extractor.list_standalone() if args.list_standalone else [])
+            dump_json(rows, sys.__stdout__, backend=args.json_backend)
+            sys.__stdout__.write('\n')
+        
+        elif args.list_fonds:
             fonds_list = extractor.list_fonds()
             print("\nAvailable fonds:\n")
             print(f"{'ID':<8} {'Identifier':<20} {'Title':<50} {'Descendants':<10}")
@@ -1706,15 +4173,244 @@ def main():
             for r in standalone_list:
                 print(f"{r['id']:<8} {(r['identifier'] or '')[:13]:<15} {(r['level'] or '')[:18]:<20} {(r['title'] or '')[:43]:<45} {r['descendant_count']}") 
                       
+        elif args.benchmark_json:
+            if not args.fonds_id:
+                parser.error('--benchmark-json requires --fonds-id')
+            document = extractor.extract_fonds(args.fonds_id)
+            query_seconds = sum(entry['db_seconds'] for entry in extractor.phase_stats)
+            print(f"\nJSON encoding of fonds {args.fonds_id}: {len(document['@graph'])} nodes, "
+                  f"{query_seconds:.3f}s in database queries\n")
+            print(f"{'Backend':<8} {'Indent':>6} {'Seconds':>9} {'MB':>8} {'MB/s':>8} {'vs queries':>10}")
+            print("-" * 54)
+            for entry in benchmark_json_backends(document):
+                ratio = f"{entry['seconds'] / query_seconds:.2f}x" if query_seconds else '-'
+                print(f"{entry['backend']:<8} {entry['indent'] or '-':>6} {entry['seconds']:>9.4f} "
+                      f"{entry['bytes'] / 1e6:>8.2f} {entry['mb_per_second'] or '-':>8} {ratio:>10}")
+            if orjson is None:
+                print("\norjson is not installed; pip install orjson to compare it")
+        
+        elif args.shard_by:
+            top_level = extractor.list_top_level()
+            shards = plan_shards(top_level, args.shard_by, args.shards or args.workers)
+            manifest_path = os.path.join(args.output_dir, 'manifest.json')
+            
+            print(f"\nExtracting {len(top_level)} top-level descriptions into {len(shards)} "
+                  f"shard(s) by {args.shard_by} with {args.workers} worker(s)")
+            extractor.load_terms()
+            created = datetime.utcnow().isoformat() + 'Z'
+            started = time.perf_counter()
+            results = extract_shards(
+                db_config, base_uri, instance_id, shards, args.output_dir,
+                workers=args.workers, options=options,
+                taxonomy_cache=extractor._taxonomy_cache,
+                terms=extractor.terms,
+                indent=2 if args.pretty else None,
+                extractor=extractor, fmt=args.format,
+                previous_manifest=read_manifest(manifest_path),
+            )
+            
+            ok = [entry for entry in results if entry['status'] == 'ok']
+            manifest = {
+                'created': created,
+                'source': f'AtoM instance: {instance_id}',
+                'extractor_version': '5.0',
+                'format': args.format,
+                'compression': 'gzip',
+                'shard_by': args.shard_by,
+                'seconds': round(time.perf_counter() - started, 3),
+                'shard_count': len(results),
+                'failed_count': len(results) - len(ok),
+                'changed_count': sum(1 for entry in ok if entry['changed']),
+                'fonds_count': sum(entry.get('fonds_count', 0) for entry in ok),
+                'records_count': sum(entry.get('records_count', 0) for entry in ok),
+                'relations_count': sum(entry.get('relations_count', 0) for entry in ok),
+                'bytes': sum(entry.get('bytes', 0) for entry in ok),
+                'shards': results,
+            }
+            if args.format != 'jsonld':
+                manifest['triples_count'] = sum(entry.get('triples_count', 0) for entry in ok)
+            tmp_path = manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, manifest_path)
+            
+            print(f"\n{'='*60}")
+            print(f"Sharded extraction complete (v5 - Spectrum/GRAP)")
+            print(f"{'='*60}")
+            print(f"  Shards: {len(ok)} ok ({manifest['changed_count']} changed), "
+                  f"{manifest['failed_count']} failed")
+            print(f"  Fonds: {manifest['fonds_count']}")
+            print(f"  Records: {manifest['records_count']}")
+            print(f"  Relations: {manifest['relations_count']}")
+            print(f"  Bytes: {manifest['bytes']}")
+            print(f"  Wall time: {manifest['seconds']}s")
+            phases = merge_phase_stats([entry.get('phases', []) for entry in results])
+            if args.profile:
+                print(f"\nPhase profile (summed over shards):\n")
+                print(format_profile(phases))
+            if args.metrics_file:
+                write_prometheus_textfile(args.metrics_file, phases, {
+                    'fonds': manifest['fonds_count'],
+                    'fonds_failed': sum(len(entry['fonds_ids']) for entry in results if entry['status'] != 'ok'),
+                    'records': manifest['records_count'],
+                    'relations': manifest['relations_count'],
+                    'duration_seconds': manifest['seconds'],
+                    'last_run_timestamp_seconds': int(time.time()),
+                })
+            print(f"\nManifest: {manifest_path}")
+            print(f"{'='*60}")
+            if len(ok) < len(results):
+                sys.exit(1)
+        
+        elif args.fonds_ids or args.all_fonds:
+            if args.fonds_ids:
+                fonds_ids = [int(x) for x in args.fonds_ids.split(',') if x.strip()]
+            else:
+                top_level = extractor.list_fonds()
+                if args.include_standalone:
+                    top_level += extractor.list_standalone()
+                fonds_ids = [row['id'] for row in largest_first(top_level, lambda row: row['descendant_count'] or 0)]
+            
+            incremental = bool(args.since or args.watermark_file)
+            since_by_fonds = {
+                fonds_id: args.since or read_watermark(args.watermark_file, fonds_id)
+                for fonds_id in fonds_ids
+            } if incremental else {}
+            next_watermark = extractor.database_now() if args.watermark_file and args.update_watermark else None
+            
+            journal = None
+            if args.journal:
+                if args.restart and os.path.exists(args.journal):
+                    os.remove(args.journal)
+                journal = ExportJournal(args.journal)
+            
+            print(f"\nExtracting {len(fonds_ids)} fonds with {args.workers} worker(s)")
+            extractor.load_terms()
+            started_at = datetime.utcnow().isoformat() + 'Z'
+            started = time.perf_counter()
+            results, registry_stats = extract_many(
+                db_config, base_uri, instance_id, fonds_ids, args.output_dir,
+                workers=args.workers, options=options,
+                taxonomy_cache=extractor._taxonomy_cache,
+                terms=extractor.terms,
+                indent=2 if args.pretty else None,
+                since_by_fonds=since_by_fonds, incremental=incremental,
+                extractor=extractor,
+                # Which fonds writes a shared entity depends on scheduling, so every fonds stays
+                # complete when its output is compared across runs or loaded as its own graph
+                dedup_entities=not (args.no_entity_dedup or args.canonical or args.format == 'nq'),
+                fmt=args.format, compress=compress,
+                fingerprints=read_fingerprints(args.fingerprint_file),
+                journal=journal,
+            )
+            
+            if next_watermark:
+                for entry in results:
+                    if entry['status'] == 'ok':
+                        write_watermark(args.watermark_file, entry['fonds_id'], next_watermark)
+            if args.fingerprint_file:
+                # Committed by whoever loads the files, see --commit-fingerprints
+                write_fingerprints(pending_fingerprints_path(args.fingerprint_file), {
+                    entry['fonds_id']: entry['fingerprint']
+                    for entry in results if entry['status'] == 'ok' and 'fingerprint' in entry
+                })
+            
+            failed = [entry for entry in results if entry['status'] != 'ok']
+            summary = {
+                'started': started_at,
+                'seconds': round(time.perf_counter() - started, 3),
+                'workers': args.workers,
+                'fonds_count': len(results),
+                'ok_count': len(results) - len(failed),
+                'failed_count': len(failed),
+                'unchanged_count': sum(1 for entry in results if entry.get('unchanged')),
+                'resumed_count': sum(1 for entry in results if entry.get('resumed')),
+                'records_count': sum(entry.get('records_count', 0) for entry in results),
+                'relations_count': sum(entry.get('relations_count', 0) for entry in results),
+                'entity_registry': registry_stats,
+                'fonds': results,
+            }
+            summary_path = os.path.join(args.output_dir, 'summary.json')
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            
+            print(f"\n{'='*60}")
+            print(f"Multi-fonds extraction complete (v5 - Spectrum/GRAP)")
+            print(f"{'='*60}")
+            print(f"  Fonds: {summary['ok_count']} ok, {summary['failed_count']} failed")
+            if args.fingerprint_file:
+                print(f"  Unchanged: {summary['unchanged_count']} (left empty, skip loading)")
+            if journal:
+                print(f"  Resumed: {summary['resumed_count']} finished by an earlier run")
+            print(f"  Records: {summary['records_count']}")
+            print(f"  Relations: {summary['relations_count']}")
+            if registry_stats:
+                hits = sum(kind['hits'] for kind in registry_stats.values())
+                written = sum(kind['written'] for kind in registry_stats.values())
+                print(f"  Shared entities: {written} written, {hits} cache hits")
+            print(f"  Wall time: {summary['seconds']}s")
+            
+            phases = merge_phase_stats([entry.get('phases', []) for entry in results])
+            if args.profile:
+                print(f"\nPhase profile (summed over fonds):\n")
+                print(format_profile(phases))
+            if args.metrics_file:
+                write_prometheus_textfile(args.metrics_file, phases, {
+                    'fonds': summary['ok_count'],
+                    'fonds_failed': summary['failed_count'],
+                    'records': summary['records_count'],
+                    'relations': summary['relations_count'],
+                    'duration_seconds': summary['seconds'],
+                    'last_run_timestamp_seconds': int(time.time()),
+                })
+            print(f"\nSummary: {summary_path}")
+            print(f"{'='*60}")
+            if failed:
+                sys.exit(1)
+        
         elif args.fonds_id:
             print(f"\nExtracting fonds ID: {args.fonds_id}")
-            result = extractor.extract_fonds(args.fonds_id)
-            
             indent = 2 if args.pretty else None
-            with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=indent, ensure_ascii=False, cls=DecimalEncoder)
+            incremental = bool(args.since or args.watermark_file)
+            since = args.since or read_watermark(args.watermark_file, args.fonds_id)
+            next_watermark = extractor.database_now() if args.watermark_file and args.update_watermark else None
+            entry = {'fonds_id': args.fonds_id, 'output': args.output}
+            extracted = {}
+            
+            def extract_attempt():
+                extracted['subjects'] = [] if incremental else None
+                extracted['meta'] = write_fonds(extractor, args.fonds_id, args.output, indent, since,
+                                                extracted['subjects'], args.format, args.stream, compress)
+            
+            # Whatever already went to standard output cannot be taken back, so that is not retried
+            _retry_transient(extractor, entry, f"fonds {args.fonds_id}", args.output, extract_attempt,
+                             retries=0 if args.output == '-' else None)
+            if 'error' in entry:
+                print(f"Extraction of fonds {args.fonds_id} failed: {entry['error']}")
+                sys.exit(1)
+            meta, subjects = extracted['meta'], extracted['subjects']
+            
+            unchanged = False
+            if args.fingerprint_file:
+                unchanged = meta['fingerprint'] == read_fingerprints(args.fingerprint_file).get(str(args.fonds_id))
+                if unchanged and args.output != '-':
+                    open(args.output, 'wb').close()
+                write_fingerprints(pending_fingerprints_path(args.fingerprint_file),
+                                   {args.fonds_id: meta['fingerprint']})
+            
+            if incremental:
+                update_output = args.update_output or os.path.splitext(args.output)[0] + '.ru'
+                if subjects:
+                    with open(update_output, 'w', encoding='utf-8') as f:
+                        f.write(extractor.build_replace_update(subjects))
+                elif os.path.exists(update_output):
+                    os.remove(update_output)
+            if next_watermark:
+                write_watermark(args.watermark_file, args.fonds_id, next_watermark)
+            sidecar = None
+            if args.canonical and args.output != '-':
+                sidecar = write_metadata_sidecar(args.output, meta, args.json_backend, indent)
             
-            meta = result['_metadata']
             print(f"\n{'='*60}")
             print(f"Extraction complete (v5 - Spectrum/GRAP)")
             print(f"{'='*60}")
@@ -1736,10 +4432,38 @@ def main():
             print(f"  Movements: {meta['movements_count']}")
             print(f"  GRAP Assets: {meta['grap_assets_count']}")
             print(f"\nTotal Relations: {meta['relations_count']}")
+            if 'triples_count' in meta:
+                print(f"Total Triples: {meta['triples_count']}")
             print(f"\nRelation Types:")
             for rel_type, count in sorted(meta['relation_types'].items()):
                 print(f"  {rel_type}: {count}")
+            if 'delta' in meta:
+                print(f"\nIncremental since {meta['delta']['since']}:")
+                print(f"  Changed Records: {meta['delta']['changed_records']}")
+                print(f"  Replaced Subjects: {len(subjects)}")
+            elif incremental:
+                print(f"\nIncremental: no watermark for fonds {args.fonds_id}, extracted in full")
+            if args.profile:
+                print(f"\nPhase profile:\n")
+                print(format_profile(extractor.phase_stats))
+            if args.metrics_file:
+                write_prometheus_textfile(args.metrics_file, extractor.phase_stats, {
+                    'fonds': 1,
+                    'fonds_failed': 0,
+                    'records': meta['records_count'],
+                    'relations': meta['relations_count'],
+                    'duration_seconds': round(sum(entry['seconds'] for entry in extractor.phase_stats), 4),
+                    'last_run_timestamp_seconds': int(time.time()),
+                })
             print(f"\nOutput: {args.output}")
+            if sidecar:
+                print(f"Metadata: {args.output}.meta.json (sha256 {sidecar['sha256']})")
+            if subjects:
+                print(f"Update: {update_output}")
+            if next_watermark:
+                print(f"Watermark: {next_watermark}")
+            if args.fingerprint_file:
+                print(f"Fingerprint: {meta['fingerprint']}" + (" (unchanged, output left empty)" if unchanged else ""))
             print(f"{'='*60}")
             
         else:
@@ -0,0 +1,41 @@
+import pytest
+
+from ric_extractor_v5 import AgentMatcher
+
+
+def links_for(*names):
+    matcher = AgentMatcher()
+    for index, name in enumerate(names):
+        matcher.add(f"agent/{index}", name)
+    return matcher.links()
+
+
+def test_exact_normalised_names_are_linked():
+    assert links_for('Department of Arts', 'Dept. of Arts', 'department of arts') == [
+        ('agent/1', 'agent/0'),
+        ('agent/2', 'agent/0'),
+    ]
+
+
+def test_distinct_names_are_not_linked():
+    assert links_for('Department of Arts', 'Department of Health') == []
+
+
+def test_initial_links_to_one_full_name():
+    assert links_for('Smith, Jane', 'Smith, J.') == [('agent/1', 'agent/0')]
+
+
+@pytest.mark.parametrize('names', [
+    ('Smith, Jane', 'Smith, J.', 'Smith, John'),
+    ('Smith, J.', 'Smith, Jane', 'Smith, John'),
+    ('Smith, John', 'Smith, Jane', 'Smith, J.'),
+])
+def test_initial_does_not_chain_different_names(names):
+    links = links_for(*names)
+    jane = f"agent/{names.index('Smith, Jane')}"
+    john = f"agent/{names.index('Smith, John')}"
+    clusters = {}
+    for member, representative in links:
+        clusters.setdefault(representative, {representative}).add(member)
+    assert not any({jane, john} <= cluster for cluster in clusters.values())
+    assert len(links) <= 1
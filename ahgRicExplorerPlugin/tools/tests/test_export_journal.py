@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from ric_extractor_v5 import ExportJournal, extract_many
+
+
+def finish(tmp_path, journal, fonds_id, content='{}'):
+    """Write a fonds output and record it as extract_many does."""
+    output = str(tmp_path / f"fonds_{fonds_id}.jsonld")
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(content)
+    entry = {'fonds_id': fonds_id, 'output': output, 'status': 'ok',
+             'bytes': os.path.getsize(output), 'records_count': 1}
+    journal.record(entry)
+    return entry
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'export.journal')
+
+
+def test_finished_fonds_survive_a_restart(tmp_path, journal_path):
+    entry = finish(tmp_path, ExportJournal(journal_path), 1)
+
+    assert ExportJournal(journal_path).completed(1, entry['output']) == entry
+
+
+def test_failed_fonds_are_not_recorded(journal_path):
+    journal = ExportJournal(journal_path)
+    journal.record({'fonds_id': 1, 'output': 'fonds_1.jsonld', 'status': 'error', 'error': 'boom'})
+
+    assert not os.path.exists(journal_path)
+    assert journal.completed(1, 'fonds_1.jsonld') is None
+
+
+def test_changed_or_missing_output_is_extracted_again(tmp_path, journal_path):
+    journal = ExportJournal(journal_path)
+    first = finish(tmp_path, journal, 1)
+    second = finish(tmp_path, journal, 2)
+    with open(first['output'], 'a', encoding='utf-8') as f:
+        f.write('truncated elsewhere')
+    os.remove(second['output'])
+
+    restarted = ExportJournal(journal_path)
+    assert restarted.completed(1, first['output']) is None
+    assert restarted.completed(2, second['output']) is None
+    assert restarted.completed(1, str(tmp_path / 'elsewhere.jsonld')) is None
+
+
+def test_line_cut_short_by_a_crash_is_ignored(tmp_path, journal_path):
+    journal = ExportJournal(journal_path)
+    finish(tmp_path, journal, 1, '{"old": true}')
+    latest = finish(tmp_path, journal, 1)
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"fonds_id": 2, "outp')
+
+    restarted = ExportJournal(journal_path)
+    assert restarted.completed(1, latest['output']) == latest
+    assert 2 not in restarted.entries
+
+
+def test_extract_many_resumes_without_extracting_finished_fonds(tmp_path, journal_path):
+    journal = ExportJournal(journal_path)
+    entries = [finish(tmp_path, journal, fonds_id) for fonds_id in (3, 1, 2)]
+
+    # Nothing is left to extract, so the unreachable database is never contacted
+    results, _ = extract_many({'host': 'unreachable.invalid', 'database': 'test'}, 'https://example.org/ric',
+                              'test', [1, 2, 3], str(tmp_path), journal=ExportJournal(journal_path))
+
+    assert results == [dict(entry, resumed=True) for entry in sorted(entries, key=lambda e: e['fonds_id'])]
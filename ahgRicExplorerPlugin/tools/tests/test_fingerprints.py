@@ -0,0 +1,130 @@
+import io
+import sys
+
+import pytest
+
+import ric_extractor_v5
+from ric_extractor_v5 import (
+    GraphFingerprint, RiCExtractor, commit_fingerprints, pending_fingerprints_path, read_fingerprints, write_fingerprints,
+)
+
+NODES = [
+    {'@id': 'record/1', '@type': 'rico:RecordSet', 'rico:title': 'Fonds',
+     'rico:includes': [{'@id': 'record/2'}, {'@id': 'record/3'}]},
+    {'@id': 'record/2', '@type': ['rico:Record', 'rico:RecordPart'], 'rico:title': 'Letter'},
+    {'@id': 'record/3', '@type': 'rico:Record', 'rico:title': 'Diary'},
+]
+
+
+@pytest.fixture
+def fingerprint_file(tmp_path):
+    path = str(tmp_path / 'fingerprints.json')
+    write_fingerprints(path, {1: 'loaded-1', 2: 'loaded-2'})
+    return path
+
+
+def extract(path, fingerprints):
+    """Record fingerprints the way an extraction run does."""
+    write_fingerprints(pending_fingerprints_path(path), fingerprints)
+
+
+def fingerprint(nodes):
+    digest = GraphFingerprint()
+    for node in nodes:
+        digest.add(node)
+    return digest.hexdigest()
+
+
+def reordered(value):
+    """value with dict keys and list items in reverse order."""
+    if isinstance(value, dict):
+        return {key: reordered(value[key]) for key in reversed(list(value))}
+    if isinstance(value, list):
+        return [reordered(item) for item in reversed(value)]
+    return value
+
+
+def extracted(shared=False):
+    """An extractor holding a fonds whose agent, place and repository another fonds may have written."""
+    extractor = RiCExtractor({'database': 'test'}, 'https://example.org/ric', 'test', fingerprint=True)
+    record, agent = extractor.mint_uri('record', 1), extractor.mint_uri('person', 10)
+    place, repository = extractor.mint_uri('place', 20), extractor.mint_uri('corporatebody', 5)
+    extractor.repository = {'@id': repository, '@type': 'rico:CorporateBody', 'rico:name': 'Archive'}
+    extractor.records = {1: {'@id': record, '@type': 'rico:RecordSet', 'rico:title': 'Fonds'}}
+    extractor.agents = {10: {'@id': agent, '@type': 'rico:Person', 'rico:name': 'Smith, Jane'}}
+    extractor.places = {20: {'@id': place, '@type': 'rico:Place', 'rico:name': 'Cape Town'}}
+    extractor.relations.add(record, 'rico:hasCreator', agent)
+    extractor.relations.add(agent, 'rico:isEquivalentTo', extractor.mint_uri('person', 11))
+    if shared:
+        extractor._shared_refs = {agent, place, repository}
+    return extractor
+
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['ric_extractor_v5.py', *argv])
+    ric_extractor_v5.main()
+
+
+def test_extracted_but_never_loaded_is_not_recorded(fingerprint_file):
+    extract(fingerprint_file, {1: 'changed-1'})
+
+    # The next run still compares against the last loaded graph
+    assert read_fingerprints(fingerprint_file) == {'1': 'loaded-1', '2': 'loaded-2'}
+
+
+def test_commit_moves_only_the_loaded_fonds(fingerprint_file):
+    extract(fingerprint_file, {1: 'changed-1', 2: 'changed-2'})
+
+    assert commit_fingerprints(fingerprint_file, [2]) == {'2': 'changed-2'}
+    assert read_fingerprints(fingerprint_file) == {'1': 'loaded-1', '2': 'changed-2'}
+    assert read_fingerprints(pending_fingerprints_path(fingerprint_file)) == {'1': 'changed-1'}
+
+
+def test_commit_without_pending_fingerprint_changes_nothing(fingerprint_file):
+    assert commit_fingerprints(fingerprint_file, [3]) == {}
+    assert read_fingerprints(fingerprint_file) == {'1': 'loaded-1', '2': 'loaded-2'}
+
+
+def test_commit_fingerprints_cli_needs_no_database(monkeypatch, fingerprint_file):
+    extract(fingerprint_file, {1: 'changed-1', 2: 'changed-2'})
+    monkeypatch.setenv('ATOM_DB_HOST', 'unreachable.invalid')
+
+    run_main(monkeypatch, '--commit-fingerprints', '--fonds-ids', '1,2', '--fingerprint-file', fingerprint_file)
+
+    assert read_fingerprints(fingerprint_file) == {'1': 'changed-1', '2': 'changed-2'}
+    assert read_fingerprints(pending_fingerprints_path(fingerprint_file)) == {}
+
+
+def test_graph_fingerprint_ignores_node_key_and_value_order():
+    assert fingerprint(NODES) == fingerprint(reordered(NODES))
+
+
+def test_graph_fingerprint_follows_content():
+    changed = [dict(NODES[0], **{'rico:title': 'Fonds A'})] + NODES[1:]
+    assert fingerprint(changed) != fingerprint(NODES)
+    assert fingerprint(NODES[:2]) != fingerprint(NODES)
+
+
+@pytest.mark.parametrize('fmt', ['jsonld', 'nt'])
+def test_graph_fingerprint_covers_shared_entities_written_by_another_fonds(fmt):
+    def write(extractor):
+        out = io.StringIO()
+        if fmt == 'jsonld':
+            metadata = extractor.write_jsonld(out)
+        else:
+            metadata = extractor.write_rdf(out, fmt)
+        return out.getvalue(), metadata['fingerprint']
+
+    complete, fingerprint = write(extracted())
+    deduplicated, shared_fingerprint = write(extracted(shared=True))
+
+    assert len(deduplicated) < len(complete)
+    assert shared_fingerprint == fingerprint
+
+
+def test_buffered_graph_fingerprint_matches_streamed():
+    buffered = GraphFingerprint()
+    document = extracted(shared=True)._build_jsonld(buffered)
+
+    assert len(document['@graph']) == 2
+    assert buffered.hexdigest() == extracted().write_jsonld(io.StringIO())['fingerprint']
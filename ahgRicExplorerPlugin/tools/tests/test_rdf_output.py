@@ -0,0 +1,56 @@
+import io
+from decimal import Decimal
+
+import pytest
+
+from ric_extractor_v5 import RiCExtractor
+
+rdflib = pytest.importorskip('rdflib')  # see tools/requirements-dev.txt
+from rdflib.compare import isomorphic  # noqa: E402
+
+GRAPH = 'https://example.org/ric/test/graph/1'
+
+
+def extracted():
+    """An extractor whose caches hold nodes of every shape RdfStreamWriter handles."""
+    extractor = RiCExtractor({'database': 'test'}, 'https://example.org/ric', 'test')
+    fonds, item = extractor.mint_uri('recordset', 1), extractor.mint_uri('record', 2)
+    extractor.records = {
+        1: {'@id': fonds, '@type': 'rico:RecordSet', 'rico:title': 'Line one\nLine "two" \\ three'},
+        2: {'@id': item, '@type': ['rico:Record', 'rico:RecordPart'],
+            'rico:title': [{'@value': 'Letter', '@language': 'en'}, {'@value': 'Brief', '@language': 'af'}],
+            'rico:isOrWasIncludedIn': {'@id': fonds}},
+    }
+    extractor.activities = {
+        20: {'@id': extractor.mint_uri('activity', 20), '@type': 'rico:Activity',
+             'rico:date': {'@type': 'rico:DateRange', 'rico:beginningDate': '1900-01-01', 'rico:endDate': None}},
+    }
+    extractor.valuations = {
+        30: {'@id': extractor.mint_uri('activity', 'valuation_30'), '@type': 'rico:Activity',
+             'spectrum:valuationAmount': {'@type': 'spectrum:MonetaryAmount',
+                                          'spectrum:amount': Decimal('1500.50'), 'spectrum:currency': 'ZAR'},
+             'spectrum:isCurrent': True, 'spectrum:photoCount': 2},
+    }
+    extractor.relations.add(fonds, 'rico:includes', item)
+    return extractor
+
+
+@pytest.mark.parametrize('fmt', ['nt', 'nq', 'ttl'])
+def test_rdf_output_is_isomorphic_to_jsonld(fmt):
+    jsonld = io.StringIO()
+    extracted().write_jsonld(jsonld)
+    expected = rdflib.Graph().parse(data=jsonld.getvalue(), format='json-ld')
+    out = io.StringIO()
+    metadata = extracted().write_rdf(out, fmt, graph=GRAPH if fmt == 'nq' else None)
+
+    if fmt == 'nq':
+        dataset = rdflib.Dataset()
+        dataset.parse(data=out.getvalue(), format='nquads')
+        assert len(dataset.default_graph) == 0
+        actual = rdflib.Graph()
+        for triple in dataset.graph(rdflib.URIRef(GRAPH)):
+            actual.add(triple)
+    else:
+        actual = rdflib.Graph().parse(data=out.getvalue(), format={'nt': 'nt', 'ttl': 'turtle'}[fmt])
+    assert len(actual) == metadata['triples_count'] > 0
+    assert isomorphic(expected, actual)
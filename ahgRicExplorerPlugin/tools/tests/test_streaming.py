@@ -0,0 +1,68 @@
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+import ric_extractor_v5
+from ric_extractor_v5 import RiCExtractor, dump_json
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return cls(2026, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    # Both documents carry the extraction time in _metadata
+    monkeypatch.setattr(ric_extractor_v5, 'datetime', FrozenDatetime)
+
+
+def extracted(**options):
+    """An extractor holding a small fonds in its caches, as left by _run_extraction."""
+    extractor = RiCExtractor({'database': 'test'}, 'https://example.org/ric', 'test', **options)
+    fonds, item = extractor.mint_uri('recordset', 1), extractor.mint_uri('record', 2)
+    agent = extractor.mint_uri('person', 10)
+    extractor.repository = {'@id': extractor.mint_uri('corporatebody', 5), '@type': 'rico:CorporateBody',
+                            'rico:name': 'Test Archive'}
+    extractor.records = {
+        2: {'@id': item, '@type': 'rico:Record', 'rico:title': 'Letter "one"\nand two'},
+        1: {'@id': fonds, '@type': 'rico:RecordSet', 'rico:title': 'Papers of Jane Smith'},
+    }
+    extractor.agents = {10: {'@id': agent, '@type': ['rico:Agent', 'rico:Person'], 'rico:name': 'Smith, Jane'}}
+    extractor.valuations = {
+        30: {'@id': extractor.mint_uri('activity', 'valuation_30'), '@type': 'rico:Activity',
+             'spectrum:valuationAmount': {'@type': 'spectrum:MonetaryAmount',
+                                          'spectrum:amount': Decimal('1500.50'), 'spectrum:currency': 'ZAR'}},
+    }
+    extractor.relations.add(fonds, 'rico:includes', item)
+    extractor.relations.add(fonds, 'rico:hasCreator', agent)
+    return extractor
+
+
+def streamed(extractor, indent=None) -> str:
+    out = io.StringIO()
+    extractor.write_jsonld(out, indent)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+@pytest.mark.parametrize('canonical', [False, True])
+def test_streamed_jsonld_matches_buffered(indent, canonical):
+    extractor = extracted(canonical=canonical)
+    document = extractor._build_jsonld()
+    document['_metadata'] = extractor._document_metadata(document['_metadata'])
+    buffered = io.StringIO()
+    dump_json(document, buffered, indent)
+
+    assert streamed(extracted(canonical=canonical), indent) == buffered.getvalue()
+
+
+def test_streaming_releases_entity_caches():
+    extractor = extracted()
+    streamed(extractor)
+
+    assert not extractor.records and not extractor.agents and not extractor.valuations
+    assert len(extractor.relations) == 0
@@ -0,0 +1,124 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from ric_extractor_v5 import Field, RiCExtractor, Row, TableMapping
+
+MAPPINGS = {mapping.cache: mapping for mapping in RiCExtractor.SPECTRUM_MAPPINGS if not mapping.fallback}
+
+
+def make_row(**values):
+    return Row(tuple(values.values()), {column: i for i, column in enumerate(values)})
+
+
+def mapping_row(mapping, **values):
+    """A row with every column mapping selects, None unless given."""
+    columns = ['id', mapping.record_column] + [column for field in mapping.fields for column in field.columns]
+    return make_row(**{column: values.get(column) for column in columns})
+
+
+@pytest.fixture
+def extractor():
+    return RiCExtractor({'database': 'test'}, 'https://example.org/ric', 'test')
+
+
+def test_query_selects_every_field_column_once():
+    mapping = TableMapping('things', 'things', 'thing', 'valuations', 'activity', 'thing_', 'rico:Activity',
+                           'rico:resultsOrResultedIn', order_by='made DESC', fields=[
+                               Field('ex:name', ('name', 'alt_name')),
+                               Field('ex:alt', 'alt_name'),
+                               Field('ex:where', 'place_name'),
+                           ],
+                           computed={'place_name': 'p.name'}, joins='LEFT JOIN place p ON p.id = t.place_id')
+    assert mapping.query == ("SELECT t.id, t.object_id, t.name, t.alt_name, p.name AS place_name, t.made "
+                             "FROM thing t LEFT JOIN place p ON p.id = t.place_id WHERE t.object_id IN ({ids}) "
+                             "ORDER BY t.made DESC")
+
+
+def test_valuation_node(extractor):
+    mapping = MAPPINGS['valuations']
+    record = {'@id': 'https://example.org/ric/test/record/7'}
+    row = mapping_row(mapping, id=3, object_id=7, valuation_reference='', valuation_date=date(2024, 5, 1),
+                      valuation_amount=Decimal('1500.50'), currency='USD', valuer_name='Valuer',
+                      valuer_organization='Appraisers Ltd', valuation_note='', is_current=1)
+
+    assert mapping.node(extractor, row, record) == {
+        '@id': 'https://example.org/ric/test/activity/valuation_3',
+        '@type': 'rico:Activity',
+        'rico:hasActivityType': 'Valuation',
+        'rico:resultsOrResultedIn': {'@id': record['@id']},
+        'spectrum:valuationReference': '',
+        'rico:isOrWasAssociatedWithDate': {'@type': 'rico:DateRange', 'rico:beginningDate': '2024-05-01'},
+        'spectrum:valuationAmount': {'@type': 'spectrum:MonetaryAmount', 'spectrum:amount': 1500.5,
+                                     'spectrum:currency': 'USD'},
+        'spectrum:valuer': 'Valuer (Appraisers Ltd)',
+        'spectrum:isCurrent': True,
+    }
+
+
+def test_loan_node_structs_and_fallback_columns(extractor):
+    mapping = MAPPINGS['loans_out']
+    row = mapping_row(mapping, id=4, object_id=7, loan_number='L-1', loan_start_date=date(2024, 1, 1),
+                      borrower_name='Museum', borrower_address='1 Main Rd', special_conditions='Dark room',
+                      special_requirements='Guard', courier_required=0)
+    node = mapping.node(extractor, row, {'@id': 'record/7'})
+
+    assert node['spectrum:loanNumber'] == 'L-1'
+    assert node['rico:isOrWasAssociatedWithDate'] == {
+        '@type': 'rico:DateRange', 'rico:beginningDate': '2024-01-01', 'rico:endDate': None,
+    }
+    assert node['spectrum:borrower'] == {
+        '@type': 'spectrum:Borrower', 'spectrum:name': 'Museum', 'spectrum:contact': None,
+        'spectrum:address': '1 Main Rd',
+    }
+    assert 'spectrum:venue' not in node
+    assert node['spectrum:loanConditions'] == 'Dark room | Guard'
+    assert 'spectrum:courierRequired' not in node
+
+
+def test_extract_mapped_links_records_and_skips_covered_fallback_rows(extractor):
+    rows = {
+        'grap_heritage_asset': [dict(id=1, object_id=7, recognition_status='recognised')],
+        'spectrum_grap_data': [dict(id=2, information_object_id=7, recognition_status='pending'),
+                               dict(id=3, information_object_id=8, recognition_status='pending'),
+                               dict(id=4, information_object_id=99, recognition_status='pending')],
+    }
+    mappings = [mapping for mapping in RiCExtractor.SPECTRUM_MAPPINGS if mapping.cache == 'grap_assets']
+    extractor.records = {7: {'@id': 'record/7'}, 8: {'@id': 'record/8'}}
+    extractor._record_chunks = lambda: iter([(1, 1, 2, '%s, %s', (7, 8))])
+    extractor._timed_fetch = lambda phase, number, total, count, query, params: [
+        mapping_row(mapping, **values)
+        for mapping in mappings if f" FROM {mapping.table} t " in query
+        for values in rows[mapping.table]
+    ]
+
+    extractor._extract_mapped(mappings)
+
+    assert list(extractor.grap_assets) == [1, 'spectrum_3']
+    assert extractor.grap_assets[1]['grap:recognitionStatus'] == 'recognised'
+    assert extractor.grap_assets['spectrum_3']['grap:relatedRecord'] == {'@id': 'record/8'}
+    assert extractor.relations.get('record/7') == {
+        'grap:hasHeritageAssetData': {'https://example.org/ric/test/grap-asset/grap_1': None},
+    }
+
+
+def test_extract_mapped_orders_nodes_across_chunks(extractor):
+    mapping = MAPPINGS['valuations']
+    # Each chunk arrives in the statement's ORDER BY valuation_date DESC
+    chunks = {
+        (7,): [dict(id=1, object_id=7, valuation_date=date(2020, 1, 1)),
+               dict(id=2, object_id=7, valuation_date=None)],
+        (8,): [dict(id=3, object_id=8, valuation_date=date(2024, 1, 1)),
+               dict(id=4, object_id=8, valuation_date=date(2020, 1, 1))],
+    }
+    extractor.records = {7: {'@id': 'record/7'}, 8: {'@id': 'record/8'}}
+    extractor._record_chunks = lambda: iter([(1, 2, 1, '%s', (7,)), (2, 2, 1, '%s', (8,))])
+    extractor._timed_fetch = lambda phase, number, total, count, query, params: [
+        mapping_row(mapping, **values) for values in chunks[params]
+    ]
+
+    extractor._extract_mapped([mapping])
+
+    # One statement over all records would give newest first, ties in row order, NULL last
+    assert list(extractor.valuations) == [3, 1, 4, 2]